@@ -0,0 +1,4 @@
+from animations.animations import main
+
+if __name__ == "__main__":
+    main()
@@ -2,751 +2,102 @@
 Provide animations for my lecture.
 """
 
-import tkinter as tk
-from tkinter import ttk
 from collections import deque
+import json
 import time
-import cProfile
 import click
-import logging
-
-GREEN = "#B3C7A5"
-RED = "#AE4D5B"
-WHITE = "#FEF9EB"
-GREY = "#C0C0C0"
-CHESS_SIZE = 650
-MARGIN = 25
-
-DEFAULT_N = 8
-DEFAULT_START_X = 4
-DEFAULT_START_Y = 2
-DEFAULT_END_X = 2
-DEFAULT_END_Y = 6
-DEFAULT_BISHOP_X = 2
-DEFAULT_BISHOP_Y = 3
-DEFAULT_SLEEP_TIME = 0.1
-DEFAULT_TICK_SIZE = 1
-
-
-class KnightMoves:
-    def __init__(
-        self,
-        start_x: int = DEFAULT_START_X,
-        start_y: int = DEFAULT_START_Y,
-        end_x: int = DEFAULT_END_X,
-        end_y: int = DEFAULT_END_Y,
-        bishop_x: int = DEFAULT_BISHOP_X,
-        bishop_y: int = DEFAULT_BISHOP_Y,
-        n: int = DEFAULT_N,
-        debug: bool = False,
-    ):
-        self.start_x = start_x
-        self.start_y = start_y
-        self.end_x = end_x
-        self.end_y = end_y
-        self.bishop_x = bishop_x
-        self.bishop_y = bishop_y
-        self.bishop_positions = self._get_bishop_positions(bishop_x, bishop_y, n)
-        self.n = n
-        self.logger = self._get_logger(debug)
-
-    def run_gui(self):
-        """
-        Run the GUI.
-        """
-        self.window = tk.Tk()
-        self.window.title("Knight Moves")
-        self.n_gui = tk.IntVar(value=self.n)
-        self.start_x_gui = tk.IntVar(value=self.start_x)
-        self.start_y_gui = tk.IntVar(value=self.start_y)
-        self.end_x_gui = tk.IntVar(value=self.end_x)
-        self.end_y_gui = tk.IntVar(value=self.end_y)
-        self.bishop_x_gui = tk.IntVar(value=self.bishop_x)
-        self.bishop_y_gui = tk.IntVar(value=self.bishop_y)
-        self.bishop_positions = self._get_bishop_positions(
-            self.bishop_x, self.bishop_y, self.n
-        )
-        self.sleep_time = tk.DoubleVar(value=DEFAULT_SLEEP_TIME)
-        self.tick_size = tk.IntVar(value=DEFAULT_TICK_SIZE)
-        self.running = False
-        self._init_window()
-        self.window.mainloop()
-
-    def run_cli(self):
-        """
-        Run the CLI.
-        """
-        self._validate_input()
-        self.running = True
-        click.echo(f"Shortest path length unoptimized BFS: {self.unoptimized_bfs()}")
-        click.echo(f"Shortest path length BFS: {self.bfs(with_gui=False)}")
-        click.echo(f"Shortest path length DBFS: {self.dbfs(with_gui=False)}")
-        self.running = False
-
-    def _validate_input(self):
-        """
-        Validate input.
-        """
-        if not all(
-            [
-                0 <= self.start_x < self.n,
-                0 <= self.start_y < self.n,
-                0 <= self.end_x < self.n,
-                0 <= self.end_y < self.n,
-                0 <= self.bishop_x < self.n,
-                0 <= self.bishop_y < self.n,
-            ]
-        ):
-            raise ValueError("Invalid input")
-        if (self.start_x, self.start_y) == (self.bishop_x, self.bishop_y) or (
-            self.end_x,
-            self.end_y,
-        ) == (
-            self.bishop_x,
-            self.bishop_y,
-        ):
-            raise ValueError("Invalid input")
-        if (self.start_x, self.start_y) in self.bishop_positions:
-            raise ValueError("Invalid input")
-
-    def _simple_bfs(
-        self,
-        start_x: int,
-        start_y: int,
-        end_x: int,
-        end_y: int,
-        bishop_alive: bool,
-    ) -> int:
-        """
-        Simple BFS to find shortest path from any start position to any end position while respecting bishop
-        """
-        row = [2, 2, -2, -2, 1, 1, -1, -1]
-        col = [1, -1, 1, -1, 2, -2, 2, -2]
-        visited = set()
-        # tuples of the form (x, y, distance)
-        queue = deque()
-        queue.append((start_x, start_y, 0))
-        num_visited = 0
-        while queue:
-
-            x, y, distance = queue.popleft()
-
-            # check if we found the end
-            if (x, y) == (end_x, end_y):
-                return distance
-
-            # check if we can skip this node
-            if (x, y) in visited:
-                continue
-
-            visited.add((x, y))
-            num_visited += 1
-
-            for dx, dy in zip(row, col):
-                new_x, new_y = x + dx, y + dy
-                if bishop_alive and (new_x, new_y) in self.bishop_positions:
-                    continue
-                if new_x >= 0 and new_x < self.n and new_y >= 0 and new_y < self.n:
-                    queue.append((new_x, new_y, distance + 1))
-        return -1
-
-    def unoptimized_bfs(self) -> int:
-        """
-        Certainly correct (but unoptimized) solution for testing. No GUI implementation.
-        """
-        to_bishop = self._simple_bfs(
-            self.start_x, self.start_y, self.bishop_x, self.bishop_y, True
-        )
-        to_goal = self._simple_bfs(
-            self.start_x, self.start_y, self.end_x, self.end_y, True
-        )
-        if to_bishop == -1:
-            return to_goal
-        bishop_to_goal = self._simple_bfs(
-            self.bishop_x, self.bishop_y, self.end_x, self.end_y, False
-        )
-        if to_goal == -1:
-            if bishop_to_goal == -1:
-                return -1
-            return to_bishop + bishop_to_goal
-        if bishop_to_goal == -1:
-            return to_goal
-        return min(to_bishop + bishop_to_goal, to_goal)
-
-    def bfs(self, with_gui: bool = False) -> int:
-        """
-        Run BFS to find shortest path from start to end.
-        """
-        tick_size = 1
-        try:
-            tick_size = self.tick_size.get()
-        except AttributeError:
-            pass
-        row = [2, 2, -2, -2, 1, 1, -1, -1]
-        col = [1, -1, 1, -1, 2, -2, 2, -2]
-        visited = set()
-        # tuples of the form (x, y, distance, is_bishop_alive)
-        queue = deque()
-        queue.append((self.start_x, self.start_y, 0, True))
-        num_visited = 0
-        while queue:
-            try:
-                if not self.running:
-                    return -1
-            except AttributeError:
-                pass
-
-            x, y, distance, is_bishop_alive = queue.popleft()
-
-            # check if we found the end
-            if (x, y) == (self.end_x, self.end_y):
-                if with_gui:
-                    self._update_ui(x, y, num_visited)
-                self.logger.debug(f"Found after {num_visited} nodes")
-                return distance
-
-            # check if we can skip this node
-            if (x, y, is_bishop_alive) in visited:
-                self.logger.debug(f"Already visited {(x, y, is_bishop_alive)}")
-                continue
-
-            visited.add((x, y, is_bishop_alive))
-            num_visited += 1
-
-            self.logger.debug(f"Visiting {(x, y, is_bishop_alive)}")
-            if with_gui and num_visited % tick_size == 0:
-                self.counter_text.set(f"Visited: {num_visited} nodes")
-            if with_gui:
-                self.chess_frame.itemconfig(self.chess_squares[x][y], fill=GREY)
-                if num_visited % tick_size == 0:
-                    self.chess_frame.update()
-                    time.sleep(self.sleep_time.get())
-
-            for dx, dy in zip(row, col):
-                new_x, new_y = x + dx, y + dy
-                if is_bishop_alive and (new_x, new_y) in self.bishop_positions:
-                    continue
-                if self._is_valid_position(new_x, new_y, self.n):
-                    if (new_x, new_y) == (self.bishop_x, self.bishop_y):
-                        queue.append((new_x, new_y, distance + 1, False))
-                    else:
-                        queue.append((new_x, new_y, distance + 1, is_bishop_alive))
-
-        self.logger.debug(f"Not found after {num_visited} nodes")
-        return -1
-
-    def dbfs(self, with_gui: bool = False) -> int:
-        """
-        Run double ended BFS to find shortest path from start to end.
-        """
-        tick_size = 1
-        try:
-            tick_size = self.tick_size.get()
-        except AttributeError:
-            pass
-        row = [2, 2, -2, -2, 1, 1, -1, -1]
-        col = [1, -1, 1, -1, 2, -2, 2, -2]
-        visited_start = dict()
-        visited_end = dict()
-        queue_start = deque()
-        queue_end = deque()
-        queue_start.append((self.start_x, self.start_y, 0, True))
-        # end starts in a "superposition" of being bishop being alive and not being alive, since we don't know which one is correct yet, so need to search both paths, unless the end position is threatened by the bishop, since then we must capture the bishop
-        queue_end.append((self.end_x, self.end_y, 0, False))
-        if not (self.end_x, self.end_y) in self.bishop_positions:
-            queue_end.append((self.end_x, self.end_y, 0, True))
-        num_visited = 0
-        while queue_start and queue_end:
-            try:
-                if not self.running:
-                    return -1
-            except AttributeError:
-                pass
-
-            x, y, distance, is_bishop_alive = queue_start.popleft()
-
-            if (x, y) == (self.end_x, self.end_y):
-                if with_gui:
-                    self._update_ui(x, y, num_visited)
-                self.logger.debug(f"Found after {num_visited} nodes")
-                return distance
-
-            if (x, y, is_bishop_alive) in visited_end:
-                if with_gui:
-                    self._update_ui(x, y, num_visited)
-                self.logger.debug(f"Found after {num_visited} nodes")
-                return distance + visited_end[(x, y, is_bishop_alive)]
-
-            if (x, y, is_bishop_alive) in visited_start:
-                self.logger.debug(f"Already visited {(x, y, is_bishop_alive)}")
-                continue
-
-            visited_start[(x, y, is_bishop_alive)] = distance
-            num_visited += 1
-
-            self.logger.debug(f"Visiting {(x, y, is_bishop_alive)}")
-            if with_gui:
-                self.counter_text.set(f"Visited: {num_visited} nodes")
-                self.chess_frame.itemconfig(self.chess_squares[x][y], fill=GREY)
-                if num_visited % tick_size == 0:
-                    self.chess_frame.update()
-                    time.sleep(self.sleep_time.get())
-
-            for dx, dy in zip(row, col):
-                new_x, new_y = x + dx, y + dy
-                if is_bishop_alive and (new_x, new_y) in self.bishop_positions:
-                    continue
-                if self._is_valid_position(new_x, new_y, self.n):
-                    if (new_x, new_y) == (self.bishop_x, self.bishop_y):
-                        queue_start.append((new_x, new_y, distance + 1, False))
-                    else:
-                        queue_start.append(
-                            (new_x, new_y, distance + 1, is_bishop_alive)
-                        )
-
-            try:
-                if not self.running:
-                    return -1
-            except AttributeError:
-                pass
-
-            x, y, distance, is_bishop_alive = queue_end.popleft()
-
-            if (x, y, is_bishop_alive) in visited_start:
-                if with_gui:
-                    self._update_ui(x, y, num_visited)
-                self.logger.debug(f"Found after {num_visited} nodes")
-                return distance + visited_start[(x, y, is_bishop_alive)]
-
-            if (x, y, is_bishop_alive) in visited_end:
-                self.logger.debug(f"Already visited {(x, y, is_bishop_alive)}")
-                continue
-
-            visited_end[(x, y, is_bishop_alive)] = distance
-            num_visited += 1
-
-            self.logger.debug(f"Visiting {(x, y, is_bishop_alive)}")
-            if with_gui:
-                self.counter_text.set(f"Visited: {num_visited} nodes")
-                self.chess_frame.itemconfig(self.chess_squares[x][y], fill=GREY)
-                if num_visited % tick_size == 0:
-                    self.chess_frame.update()
-                    time.sleep(self.sleep_time.get())
-
-            for dx, dy in zip(row, col):
-                new_x, new_y = x + dx, y + dy
-                if is_bishop_alive and (new_x, new_y) in self.bishop_positions:
-                    continue
-                if self._is_valid_position(new_x, new_y, self.n):
-                    queue_end.append((new_x, new_y, distance + 1, is_bishop_alive))
-        return -1
-
-    def _update_ui(self, x: int, y: int, num_visited: int):
-        self.chess_frame.itemconfig(self.chess_squares[x][y], fill=GREY)
-        # TODO: move knight here and show path ? potentially
-        self.chess_frame.update()
-        self.counter_text.set(f"Visited: {num_visited} nodes")
-
-    def _is_valid_position(self, x: int, y: int, n: int) -> bool:
-        """
-        Check if position is valid.
-        """
-        return 0 <= x < n and 0 <= y < n
-
-    def _get_bishop_positions(
-        self, bishop_x: int, bishop_y: int, n: int
-    ) -> set[tuple[int, int]]:
-        """
-        Get all possible positions for the bishop.
-        """
-        bishop_positions = set()
-        for i in range(1, n):
-            new_positions = [
-                (bishop_x + i, bishop_y + i),
-                (bishop_x + i, bishop_y - i),
-                (bishop_x - i, bishop_y + i),
-                (bishop_x - i, bishop_y - i),
-            ]
-            for new_x, new_y in new_positions:
-                if self._is_valid_position(new_x, new_y, n):
-                    bishop_positions.add((new_x, new_y))
-        self.bishop_positions = bishop_positions
-        return bishop_positions
-
-    def _get_logger(self, debug: bool) -> logging.Logger:
-        """
-        Get logger.
-        """
-        logger = logging.getLogger(__name__)
-        if debug:
-            logger.setLevel(logging.DEBUG)
-        else:
-            logger.setLevel(logging.INFO)
-        format = logging.Formatter(
-            "%(asctime)s - %(message)s",
-            datefmt="%Y-%m-%dT%H:%M:%SZ",
-        )
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(format)
-        logger.addHandler(console_handler)
-        return logger
-
-    # TKINTER ANIMATIONS
-
-    def _reset_chess_board(self) -> None:
-        """
-        Reset chess board to original state.
-        """
-        try:
-            len(self.chess_squares)
-        except AttributeError:
-            self.chess_squares = []
-
-        n = self.n_gui.get()
-
-        self._get_bishop_positions(self.bishop_x_gui.get(), self.bishop_y_gui.get(), n)
-
-        for i in range(n):
-            chess_row = None
-            new_row = False
-            if i < len(self.chess_squares):
-                chess_row = self.chess_squares[i]
-            else:
-                new_row = True
-                chess_row = []
-
-            for j in range(n):
-                square_id = chess_row[j] if j < len(chess_row) else None
-                color = (
-                    RED
-                    if (i, j) in self.bishop_positions
-                    else WHITE if (i + j) % 2 == 0 else GREEN
-                )
-                x1, y1, x2, y2 = (
-                    j * CHESS_SIZE / n,
-                    i * CHESS_SIZE / n,
-                    (j + 1) * CHESS_SIZE / n,
-                    (i + 1) * CHESS_SIZE / n,
-                )
-                if square_id is not None:
-                    self.chess_frame.coords(square_id, x1, y1, x2, y2)
-                    self.chess_frame.itemconfig(square_id, fill=color)
-                    self.chess_frame.tag_raise(square_id)
-                else:
-                    square_id = self.chess_frame.create_rectangle(
-                        x1,
-                        y1,
-                        x2,
-                        y2,
-                        fill=color,
-                    )
-                    chess_row.append(square_id)
-            if new_row:
-                self.chess_squares.append(chess_row)
-        # images
-        SQUARE_WIDTH = CHESS_SIZE / n
 
-        unscaled_knight_img = tk.PhotoImage(file="images/knight.png")
-        scale_factor = int(unscaled_knight_img.width() / SQUARE_WIDTH) + 1
-        self.knight_img = unscaled_knight_img.subsample(scale_factor, scale_factor)
-
-        unscaled_bishop_img = tk.PhotoImage(file="images/bishop.png")
-        scale_factor = int(unscaled_bishop_img.width() / SQUARE_WIDTH) + 1
-        self.bishop_img = unscaled_bishop_img.subsample(scale_factor, scale_factor)
-
-        unscaled_king_img = tk.PhotoImage(file="images/king.png")
-        scale_factor = int(unscaled_king_img.width() / SQUARE_WIDTH) + 1
-        self.king_img = unscaled_king_img.subsample(scale_factor, scale_factor)
+from animations.core import (
+    DEFAULT_BATCH_CHUNK_SIZE,
+    DEFAULT_BISHOP_X,
+    DEFAULT_BISHOP_Y,
+    DEFAULT_END_X,
+    DEFAULT_END_Y,
+    DEFAULT_HOST,
+    DEFAULT_MAX_N,
+    DEFAULT_N,
+    DEFAULT_PORT,
+    DEFAULT_START_X,
+    DEFAULT_START_Y,
+    QUERY_FIELDS,
+    DistanceFieldCache,
+    DistanceTable,
+    IncrementalSolver,
+    KnightMoves,
+    SearchMetrics,
+    read_queries,
+    write_results,
+)
 
+__all__ = [
+    "QUERY_FIELDS",
+    "DistanceFieldCache",
+    "DistanceTable",
+    "IncrementalSolver",
+    "KnightMoves",
+    "SearchMetrics",
+    "read_queries",
+    "write_results",
+    "main",
+]
+
+
+def parse_squares(ctx, param, values: tuple[str, ...]) -> list[tuple[int, int]]:
+    """
+    Parse repeated "X,Y" option values into squares.
+    """
+    squares = []
+    for value in values:
         try:
-            self.chess_frame.itemconfig(self.knight_image_id, image=self.knight_img)
-            self.chess_frame.itemconfig(self.king_image_id, image=self.king_img)
-            self.chess_frame.itemconfig(self.bishop_img_id, image=self.bishop_img)
-            self.chess_frame.coords(
-                self.knight_image_id,
-                self.start_y_gui.get() * CHESS_SIZE / n + CHESS_SIZE / (2 * n),
-                self.start_x_gui.get() * CHESS_SIZE / n + CHESS_SIZE / (2 * n),
-            )
-            self.chess_frame.coords(
-                self.king_image_id,
-                self.end_y_gui.get() * CHESS_SIZE / n + CHESS_SIZE / (2 * n),
-                self.end_x_gui.get() * CHESS_SIZE / n + CHESS_SIZE / (2 * n),
-            )
-            self.chess_frame.coords(
-                self.bishop_img_id,
-                self.bishop_y_gui.get() * CHESS_SIZE / n + CHESS_SIZE / (2 * n),
-                self.bishop_x_gui.get() * CHESS_SIZE / n + CHESS_SIZE / (2 * n),
-            )
-            self.chess_frame.tag_raise(self.knight_image_id)
-            self.chess_frame.tag_raise(self.king_image_id)
-            self.chess_frame.tag_raise(self.bishop_img_id)
-        except AttributeError:
-            self.knight_image_id = self.chess_frame.create_image(
-                self.start_y_gui.get() * CHESS_SIZE / n + CHESS_SIZE / (2 * n),
-                self.start_x_gui.get() * CHESS_SIZE / n + CHESS_SIZE / (2 * n),
-                image=self.knight_img,
-            )
-            self.king_image_id = self.chess_frame.create_image(
-                self.end_y_gui.get() * CHESS_SIZE / n + CHESS_SIZE / (2 * n),
-                self.end_x_gui.get() * CHESS_SIZE / n + CHESS_SIZE / (2 * n),
-                image=self.king_img,
-            )
-            self.bishop_img_id = self.chess_frame.create_image(
-                self.bishop_y_gui.get() * CHESS_SIZE / n + CHESS_SIZE / (2 * n),
-                self.bishop_x_gui.get() * CHESS_SIZE / n + CHESS_SIZE / (2 * n),
-                image=self.bishop_img,
-            )
-        self.chess_frame.update()
-
-    def _reset_knight_position(self):
-        """
-        Reset knight position to original state.
-        """
-        IMAGE_WIDTH = self.knight_img.width()
-        self.chess_frame.moveto(
-            self.knight_image_id,
-            (
-                self.start_y_gui.get() * CHESS_SIZE / self.n_gui.get()
-                + CHESS_SIZE / (2 * self.n_gui.get())
-            )
-            - IMAGE_WIDTH / 2,
-            (
-                self.start_x_gui.get() * CHESS_SIZE / self.n_gui.get()
-                + CHESS_SIZE / (2 * self.n_gui.get())
-            )
-            - IMAGE_WIDTH / 2,
-        )
-        self.chess_frame.update()
-
-    def _reset_bishop_position(self):
-        """
-        Reset bishop position to original state.
-        """
-        IMAGE_WIDTH = self.bishop_img.width()
-        self.chess_frame.moveto(
-            self.bishop_img_id,
-            (
-                self.bishop_y_gui.get() * CHESS_SIZE / self.n_gui.get()
-                + CHESS_SIZE / (2 * self.n_gui.get())
-            )
-            - IMAGE_WIDTH / 2,
-            (
-                self.bishop_x_gui.get() * CHESS_SIZE / self.n_gui.get()
-                + CHESS_SIZE / (2 * self.n_gui.get())
-            )
-            - IMAGE_WIDTH / 2,
-        )
-        self._reset_chess_board()
-        self.chess_frame.update()
-
-    def _reset_king_position(self):
-        """
-        Reset king position to original state.
-        """
-        IMAGE_WIDTH = self.king_img.width()
-        self.chess_frame.moveto(
-            self.king_image_id,
-            (
-                self.end_y_gui.get() * CHESS_SIZE / self.n_gui.get()
-                + CHESS_SIZE / (2 * self.n_gui.get())
-            )
-            - IMAGE_WIDTH / 2,
-            (
-                self.end_x_gui.get() * CHESS_SIZE / self.n_gui.get()
-                + CHESS_SIZE / (2 * self.n_gui.get())
-            )
-            - IMAGE_WIDTH / 2,
-        )
-        self.chess_frame.update()
-
-    def _start(self):
-        """
-        Start the animation loop
-        """
-        self.counter_text.set("Visited: 0 nodes")
-        self.start_x = self.start_x_gui.get()
-        self.start_y = self.start_y_gui.get()
-        self.end_x = self.end_x_gui.get()
-        self.end_y = self.end_y_gui.get()
-        self.bishop_x = self.bishop_x_gui.get()
-        self.bishop_y = self.bishop_y_gui.get()
-        self.bishop_positions = self._get_bishop_positions(
-            self.bishop_x, self.bishop_y, self.n
-        )
-        self.n = self.n_gui.get()
-
+            x, y = value.split(",")
+            squares.append((int(x), int(y)))
+        except ValueError:
+            raise click.BadParameter(f"Expected X,Y, got {value!r}")
+    return squares
+
+
+def load_distance_table(ctx, param, path: str | None) -> DistanceTable | None:
+    """
+    Load the distance table option, if given.
+    """
+    if path is None:
+        return None
+    try:
+        return DistanceTable.load(path)
+    except ValueError as error:
+        raise click.BadParameter(str(error))
+
+
+def parse_queries(
+    ctx, param, values: tuple[str, ...]
+) -> list[tuple[int, int, int, int, int, int, int]]:
+    """
+    Parse repeated "START_X,START_Y,END_X,END_Y,BISHOP_X,BISHOP_Y,N" option values into
+    validated queries.
+    """
+    queries = []
+    for value in values:
         try:
-            self._validate_input()
+            query = tuple(int(field) for field in value.split(","))
+            if len(query) != len(QUERY_FIELDS):
+                raise ValueError("Invalid input")
+            KnightMoves(*query)._validate_input()
         except ValueError:
-            self.counter_text.set("Invalid input!")
-            return
-
-        self.run_buttons_frame.pack_forget()
-        self.cancel_buttons_frame.pack(pady=20)
-        self.running = True
-
-    def _stop(self):
-        """
-        Stop the animation loop
-        """
-        self.running = False
-        self.cancel_buttons_frame.pack_forget()
-        self.run_buttons_frame.pack(pady=20)
-        self._reset_chess_board()
-        self.counter_text.set("Visited: 0 nodes")
-        self.result_text.set("")
-
-    def _start_bfs(self):
-        """
-        Start the BFS animation loop
-        """
-        self._start()
-        shortest_path_length = self.bfs(with_gui=True)
-        if shortest_path_length == -1 and self.running:
-            self.result_text.set("No valid path exists!")
-        elif shortest_path_length == -1 and not self.running:
-            self.result_text.set("")
-        else:
-            self.result_text.set(f"Shortest path length: {shortest_path_length}")
-
-    def _start_dbfs(self):
-        """
-        Start the double ended BFS animation loop
-        """
-        self._start()
-        shortest_path_length = self.dbfs(with_gui=True)
-        if shortest_path_length == -1 and self.running:
-            self.result_text.set("No valid path exists!")
-        elif shortest_path_length == -1 and not self.running:
-            self.result_text.set("")
-        else:
-            self.result_text.set(f"Shortest path length: {shortest_path_length}")
-
-    def _handle_n_change(self):
-        """
-        Handle n changing.
-        """
-        self.window.after_idle(self._reset_chess_board)
-
-    def _init_window(self):
-        """
-        Initialize the window and render the chess board.
-        """
-        self.content = ttk.Frame(self.window)  # TODO: make responsive/ no hardcoding
-        self.content.pack()
-        self.n_gui.trace_add("write", lambda *_: self._handle_n_change())
-        self.start_x_gui.trace_add("write", lambda *_: self._reset_knight_position())
-        self.start_y_gui.trace_add("write", lambda *_: self._reset_knight_position())
-        self.end_x_gui.trace_add("write", lambda *_: self._reset_king_position())
-        self.end_y_gui.trace_add("write", lambda *_: self._reset_king_position())
-        self.bishop_x_gui.trace_add("write", lambda *_: self._reset_bishop_position())
-        self.bishop_y_gui.trace_add("write", lambda *_: self._reset_bishop_position())
-        self.chess_frame = tk.Canvas(self.content, width=CHESS_SIZE, height=CHESS_SIZE)
-        self.chess_frame.grid(row=0, column=0, padx=MARGIN, pady=MARGIN)
-        self._reset_chess_board()
-
-        # render buttons and counter
-        self.control_frame = ttk.Frame(self.content)
-        self.control_frame.grid(row=0, column=1, padx=(0, MARGIN), pady=MARGIN)
-
-        self.counter_text = tk.StringVar(self.control_frame, value="Visited: 0 nodes")
-        self.counter = ttk.Label(
-            self.control_frame, textvariable=self.counter_text, font=("Arial", 44)
-        )
-        self.counter.pack()
-
-        self.result_text = tk.StringVar(self.control_frame, value="")
-        self.result = ttk.Label(
-            self.control_frame, textvariable=self.result_text, font=("Arial", 18)
-        )
-        self.result.pack(pady=(10, 0))
-
-        self.run_controls_frame = ttk.Frame(self.control_frame)
-        self.n_label = ttk.Label(self.run_controls_frame, text="Chess board size:")
-        self.n_entry = ttk.Entry(
-            self.run_controls_frame, textvariable=self.n_gui, width=8
-        )
-        self.n_label.grid(row=0, column=0, padx=10)
-        self.n_entry.grid(row=0, column=1, padx=10, columnspan=2)
-        self.tick_speed_label = ttk.Label(
-            self.run_controls_frame, text="Tick duration:"
-        )
-        self.tick_speed_entry = ttk.Entry(
-            self.run_controls_frame, textvariable=self.sleep_time, width=8
-        )
-        self.tick_speed_label.grid(row=1, column=0, padx=10)
-        self.tick_speed_entry.grid(row=1, column=1, padx=10, columnspan=2)
-        self.tick_size_label = ttk.Label(self.run_controls_frame, text="Tick size:")
-        self.tick_size_entry = ttk.Entry(
-            self.run_controls_frame, textvariable=self.tick_size, width=8
-        )
-        self.tick_size_label.grid(row=2, column=0, padx=10)
-        self.tick_size_entry.grid(row=2, column=1, padx=10, columnspan=2)
-        self.start_pos_label = ttk.Label(
-            self.run_controls_frame, text="Start position:"
-        )
-        self.start_x_entry = ttk.Entry(
-            self.run_controls_frame, textvariable=self.start_x_gui, width=3
-        )
-        self.start_y_entry = ttk.Entry(
-            self.run_controls_frame, textvariable=self.start_y_gui, width=3
-        )
-        self.start_pos_label.grid(row=3, column=0, padx=10)
-        self.start_x_entry.grid(row=3, column=1, padx=(10, 0))
-        self.start_y_entry.grid(row=3, column=2, padx=(0, 10))
-        self.end_pos_label = ttk.Label(self.run_controls_frame, text="End position:")
-        self.end_x_entry = ttk.Entry(
-            self.run_controls_frame, textvariable=self.end_x_gui, width=3
-        )
-        self.end_y_entry = ttk.Entry(
-            self.run_controls_frame, textvariable=self.end_y_gui, width=3
-        )
-        self.end_pos_label.grid(row=4, column=0, padx=10)
-        self.end_x_entry.grid(row=4, column=1, padx=(10, 0))
-        self.end_y_entry.grid(row=4, column=2, padx=(0, 10))
-        self.bishop_pos_label = ttk.Label(
-            self.run_controls_frame, text="Bishop position:"
-        )
-        self.bishop_x_entry = ttk.Entry(
-            self.run_controls_frame, textvariable=self.bishop_x_gui, width=3
-        )
-        self.bishop_y_entry = ttk.Entry(
-            self.run_controls_frame, textvariable=self.bishop_y_gui, width=3
-        )
-        self.bishop_pos_label.grid(row=5, column=0, padx=10)
-        self.bishop_x_entry.grid(row=5, column=1, padx=(10, 0))
-        self.bishop_y_entry.grid(row=5, column=2, padx=(0, 10))
-        self.run_controls_frame.pack(pady=20)
-
-        self.run_buttons_frame = ttk.Frame(self.control_frame)
-        self.bfs_button = tk.Button(
-            self.run_buttons_frame,
-            text="Run BFS",
-            command=lambda: self._start_bfs(),
-        )
-        self.bfs_button.grid(row=0, column=0, padx=10)
-        self.dbfs_button = tk.Button(
-            self.run_buttons_frame,
-            text="Run Double BFS",
-            command=self._start_dbfs,
-        )
-        self.dbfs_button.grid(row=0, column=1, padx=10)
-        self.run_buttons_frame.pack(pady=20)
-
-        self.cancel_buttons_frame = ttk.Frame(self.control_frame)
-        self.cancel_button = tk.Button(
-            self.cancel_buttons_frame,
-            text="Reset",
-            command=self._stop,
-        )
-        self.cancel_button.pack()
+            raise click.BadParameter(
+                f"Expected a valid {','.join(QUERY_FIELDS).upper()}, got {value!r}"
+            )
+        queries.append(query)
+    return queries
 
 
 @click.group(invoke_without_command=True)
 @click.pass_context
 def cli_wrapper(ctx):
     if ctx.invoked_subcommand is None:
-        KnightMoves().run_gui()
+        # tkinter is only loaded for the GUI
+        from animations.gui import KnightMovesGUI
+
+        KnightMovesGUI().run_gui()
 
 
 @cli_wrapper.command(help="Run the algorithm CLI in debug mode.")
@@ -766,10 +117,299 @@ def cli_wrapper(ctx):
 )
 @click.option("--n", default=DEFAULT_N, help="Chess board size.", prompt=True)
 @click.option("--debug", is_flag=True, help="Debug mode.", default=False)
-def cli(start_x, start_y, end_x, end_y, bishop_x, bishop_y, n, debug):
+@click.option(
+    "--algorithm",
+    type=click.Choice(["all", "unoptimized", "bfs", "dbfs", "astar", "multi"]),
+    default="all",
+    help="Algorithm to run.",
+)
+@click.option(
+    "--distance-table",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    callback=load_distance_table,
+    help="Knight distance table written by precompute.",
+)
+@click.option(
+    "--extra-bishop",
+    "extra_bishops",
+    multiple=True,
+    callback=parse_squares,
+    help="Another bishop as X,Y, may be repeated.",
+)
+@click.option(
+    "--obstacle",
+    "obstacles",
+    multiple=True,
+    callback=parse_squares,
+    help="Blocked square as X,Y, may be repeated.",
+)
+def cli(
+    start_x,
+    start_y,
+    end_x,
+    end_y,
+    bishop_x,
+    bishop_y,
+    n,
+    debug,
+    algorithm,
+    distance_table,
+    extra_bishops,
+    obstacles,
+):
+    if (extra_bishops or obstacles) and algorithm not in ("all", "multi"):
+        raise click.UsageError("--extra-bishop and --obstacle need --algorithm multi")
     KnightMoves(
-        start_x, start_y, end_x, end_y, bishop_x, bishop_y, n, debug=debug
-    ).run_cli()
+        start_x,
+        start_y,
+        end_x,
+        end_y,
+        bishop_x,
+        bishop_y,
+        n,
+        debug=debug,
+        distance_table=distance_table,
+        extra_bishops=extra_bishops,
+        obstacles=obstacles,
+    ).run_cli(algorithm)
+
+
+@cli_wrapper.command(help="Solve queries given as options, without prompting.")
+@click.option(
+    "--query",
+    "queries",
+    multiple=True,
+    required=True,
+    callback=parse_queries,
+    help="Query as START_X,START_Y,END_X,END_Y,BISHOP_X,BISHOP_Y,N, may be repeated.",
+)
+@click.option(
+    "--algorithm",
+    type=click.Choice(["unoptimized", "bfs", "dbfs", "astar", "multi"]),
+    default="bfs",
+    help="Algorithm to run.",
+)
+@click.option(
+    "--engine",
+    type=click.Choice(["tuple", "array", "numpy", "bitset"]),
+    default=None,
+    help="Engine of bfs and dbfs, array by default, numpy is only for bfs.",
+)
+@click.option(
+    "--output-format",
+    type=click.Choice(["int", "json"]),
+    default="int",
+    help="Print the length alone, or a JSON record with its time and nodes visited.",
+)
+@click.option(
+    "--distance-table",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    callback=load_distance_table,
+    help="Knight distance table written by precompute.",
+)
+@click.option(
+    "--extra-bishop",
+    "extra_bishops",
+    multiple=True,
+    callback=parse_squares,
+    help="Another bishop as X,Y on every board, may be repeated.",
+)
+@click.option(
+    "--obstacle",
+    "obstacles",
+    multiple=True,
+    callback=parse_squares,
+    help="Blocked square as X,Y on every board, may be repeated.",
+)
+def query(
+    queries,
+    algorithm,
+    engine,
+    output_format,
+    distance_table,
+    extra_bishops,
+    obstacles,
+):
+    if engine is not None and algorithm not in ("bfs", "dbfs"):
+        raise click.BadParameter(f"{algorithm} has no engines", param_hint="--engine")
+    if algorithm == "dbfs" and engine == "numpy":
+        raise click.BadParameter("dbfs has no numpy engine", param_hint="--engine")
+    if (extra_bishops or obstacles) and algorithm != "multi":
+        raise click.UsageError("--extra-bishop and --obstacle need --algorithm multi")
+    kwargs = {"engine": engine or "array"} if algorithm in ("bfs", "dbfs") else {}
+    lines = []
+    for values in queries:
+        knight_moves = KnightMoves(
+            *values,
+            distance_table=distance_table,
+            extra_bishops=extra_bishops,
+            obstacles=obstacles,
+        )
+        try:
+            knight_moves._validate_input()
+        except ValueError:
+            raise click.BadParameter(
+                f"{','.join(map(str, values))} is invalid with the extra bishops and "
+                "obstacles",
+                param_hint="--query",
+            )
+        started = time.perf_counter()
+        try:
+            length = knight_moves.solve(algorithm, **kwargs)
+        except ImportError:
+            # numpy is an optional dependency, only loaded by its engine
+            raise click.UsageError("--engine numpy requires numpy")
+        elapsed = time.perf_counter() - started
+        if output_format == "int":
+            lines.append(str(length))
+        else:
+            record = dict(zip(QUERY_FIELDS, values))
+            record.update(
+                {
+                    "length": length,
+                    "time": elapsed,
+                    "nodes_visited": knight_moves.num_visited,
+                }
+            )
+            lines.append(json.dumps(record, separators=(",", ":")))
+    click.echo("\n".join(lines))
+
+
+@cli_wrapper.command(help="Precompute the knight distance table for a board size.")
+@click.option(
+    "--n",
+    default=DEFAULT_N,
+    type=click.IntRange(min=1, max=DistanceTable.MAX_N),
+    help="Chess board size.",
+    prompt=True,
+)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Output file, knight_distances_<n>.bin by default.",
+)
+def precompute(n, output):
+    path = output or f"knight_distances_{n}.bin"
+    DistanceTable.build(n).save(path)
+    click.echo(f"Wrote knight distance table for n={n} to {path}")
+
+
+@cli_wrapper.command(
+    help="Solve a file of queries with a pool of worker processes. Invalid queries are "
+    "reported and written with length -1."
+)
+@click.argument("input_file", type=click.File("r"), default="-")
+@click.option(
+    "--output",
+    type=click.File("w"),
+    default="-",
+    help="Output file, standard output by default.",
+)
+@click.option(
+    "--format",
+    "file_format",
+    type=click.Choice(["csv", "jsonl"]),
+    default=None,
+    help="Query file format, guessed from the input file extension by default.",
+)
+@click.option(
+    "--workers",
+    type=int,
+    default=None,
+    help="Number of worker processes, one per CPU by default; 1 runs in this process.",
+)
+@click.option(
+    "--chunk-size",
+    default=DEFAULT_BATCH_CHUNK_SIZE,
+    help="Number of queries sent to a worker at a time.",
+)
+@click.option(
+    "--max-n",
+    default=DEFAULT_MAX_N,
+    help="Largest board size solved, larger boards are written with length -1.",
+)
+def batch(input_file, output, file_format, workers, chunk_size, max_n):
+    if file_format is None:
+        file_format = "jsonl" if input_file.name.endswith(".jsonl") else "csv"
+    # queries read but not written yet and whether they are valid, so they can be
+    # written next to their results. Invalid queries wait for the valid query before
+    # them, so a long run of them is held in memory until it is solved
+    in_flight = deque()
+    # the error of a row that could not be read, which ends the batch
+    read_errors = []
+
+    def recorded(queries):
+        try:
+            for row, query in enumerate(queries, 1):
+                try:
+                    KnightMoves(*query)._validate_input()
+                except ValueError:
+                    # a bad row must not take the rest of the batch down with it
+                    click.echo(f"Row {row}: invalid query, writing length -1", err=True)
+                    in_flight.append((query, False))
+                    continue
+                if query[-1] > max_n:
+                    # nor a board too large for a worker to search
+                    click.echo(
+                        f"Row {row}: board size above {max_n}, writing length -1",
+                        err=True,
+                    )
+                    in_flight.append((query, False))
+                    continue
+                in_flight.append((query, True))
+                yield query
+        except ValueError as error:
+            # stop reading, so the rows read so far are still solved and written
+            read_errors.append(error)
+
+    def rows(results):
+        for result in results:
+            query, valid = in_flight.popleft()
+            while not valid:
+                yield query, -1
+                query, valid = in_flight.popleft()
+            yield query, result
+        # the invalid queries after the last valid one
+        while in_flight:
+            yield in_flight.popleft()[0], -1
+
+    queries = recorded(read_queries(input_file, file_format))
+    if workers == 1:
+        results = KnightMoves.iter_solve(queries)
+    else:
+        results = KnightMoves.solve_parallel(queries, workers, chunk_size)
+    write_results(output, file_format, rows(results))
+    if read_errors:
+        raise click.ClickException(str(read_errors[0]))
+
+
+@cli_wrapper.command(help="Serve queries over HTTP from a pool of worker processes.")
+@click.option("--host", default=DEFAULT_HOST, help="Host to listen on.")
+@click.option("--port", default=DEFAULT_PORT, help="Port to listen on.")
+@click.option(
+    "--workers",
+    type=int,
+    default=None,
+    help="Number of worker processes, one per CPU by default.",
+)
+@click.option(
+    "--max-n",
+    default=DEFAULT_MAX_N,
+    help="Largest board size served, larger boards are rejected.",
+)
+def serve(host, port, workers, max_n):
+    # asyncio and the server are only loaded to serve
+    import asyncio
+
+    from animations.server import serve as run_server
+
+    try:
+        asyncio.run(run_server(host, port, workers, max_n))
+    except KeyboardInterrupt:
+        pass
 
 
 @cli_wrapper.command(help="Run the program with profiling.")
@@ -789,7 +429,9 @@ def cli(start_x, start_y, end_x, end_y, bishop_x, bishop_y, n, debug):
 )
 @click.option("--n", default=DEFAULT_N, help="Chess board size.", prompt=True)
 def profile(start_x, start_y, end_x, end_y, bishop_x, bishop_y, n):
-    cProfile.run(
+    import cProfile
+
+    cProfile.runctx(
         "KnightMoves("
         + f"{start_x}, "
         + f"{start_y}, "
@@ -800,6 +442,8 @@ def profile(start_x, start_y, end_x, end_y, bishop_x, bishop_y, n):
         + f"{n}, "
         + "debug=False"
         + ").run_cli()",
+        globals(),
+        {},
     )
 
 
@@ -821,7 +465,10 @@ def profile(start_x, start_y, end_x, end_y, bishop_x, bishop_y, n):
 @click.option("--n", default=DEFAULT_N, help="Chess board size.", prompt=True)
 @click.option("--debug", is_flag=True, help="Debug mode.", default=False)
 def gui(start_x, start_y, end_x, end_y, bishop_x, bishop_y, n, debug):
-    KnightMoves(
+    # tkinter is only loaded for the GUI
+    from animations.gui import KnightMovesGUI
+
+    KnightMovesGUI(
         start_x, start_y, end_x, end_y, bishop_x, bishop_y, n, debug=debug
     ).run_gui()
 
@@ -0,0 +1,290 @@
+"""
+Benchmark the shortest path solvers across board sizes and bishop placements.
+"""
+
+import importlib.util
+import json
+import platform
+import random
+import time
+import tracemalloc
+from typing import Callable
+
+import click
+
+from animations.core import KnightMoves
+
+DEFAULT_SIZES = (8, 64, 512, 5000)
+DEFAULT_QUERIES = 100
+DEFAULT_SEED = 0
+DEFAULT_OUTPUT = "bench_results.json"
+# the solvers and queries per case run by default on boards larger than
+# LARGE_BOARD_SIZE: one engine of each algorithm, since a query takes seconds there.
+# The other solvers only run when asked for with --solver, and are recorded as skipped
+LARGE_BOARD_SIZE = 512
+LARGE_BOARD_SOLVERS = ("unoptimized", "bfs-array", "dbfs-array", "astar")
+LARGE_BOARD_QUERIES = 10
+
+# solver names and the algorithm and keyword arguments they run with
+SOLVERS: dict[str, tuple[str, dict]] = {
+    "unoptimized": ("unoptimized", {}),
+    "bfs": ("bfs", {}),
+    "bfs-push": ("bfs", {"mark_on_push": True}),
+    "bfs-array": ("bfs", {"engine": "array"}),
+    "bfs-array-push": ("bfs", {"engine": "array", "mark_on_push": True}),
+    "bfs-numpy": ("bfs", {"engine": "numpy"}),
+    "bfs-bitset": ("bfs", {"engine": "bitset"}),
+    "dbfs": ("dbfs", {}),
+    "dbfs-push": ("dbfs", {"mark_on_push": True}),
+    "dbfs-array": ("dbfs", {"engine": "array"}),
+    "dbfs-array-push": ("dbfs", {"engine": "array", "mark_on_push": True}),
+    "dbfs-level": ("dbfs", {"level_synchronous": True}),
+    "dbfs-bitset": ("dbfs", {"engine": "bitset"}),
+    "astar": ("astar", {}),
+}
+# the numpy engine is only run by default when numpy is installed
+DEFAULT_SOLVERS = [
+    solver
+    for solver in SOLVERS
+    if solver != "bfs-numpy" or importlib.util.find_spec("numpy") is not None
+]
+PLACEMENTS = ("center", "corner", "blocking", "unreachable")
+
+
+def get_queries(
+    n: int, placement: str, count: int, rng: random.Random
+) -> list[tuple[int, int, int, int, int, int, int]]:
+    """
+    Get seeded random queries for a board size and bishop placement.
+
+    center and corner put the bishop in the middle or in a corner of the board. blocking
+    puts the start and end on opposite sides of a bishop diagonal through the middle of
+    the board. unreachable boxes the knight into a corner whose two moves are both
+    attacked, so every solver has to prove there is no path.
+    """
+    if placement == "center":
+        bishop_x, bishop_y = n // 2, n // 2
+    elif placement == "corner":
+        bishop_x, bishop_y = 0, 0
+    elif placement == "blocking":
+        bishop_x, bishop_y = n // 2, n // 2 - 1
+    elif placement == "unreachable":
+        if n < 4:
+            raise ValueError("Invalid input")
+        bishop_x, bishop_y = 3, 0
+    else:
+        raise ValueError("Invalid input")
+    bishop_diff = bishop_x - bishop_y
+    bishop_sum = bishop_x + bishop_y
+
+    def random_square(accept: Callable[[int, int], bool]) -> tuple[int, int]:
+        while True:
+            x, y = rng.randrange(n), rng.randrange(n)
+            if (x, y) != (bishop_x, bishop_y) and accept(x, y):
+                return x, y
+
+    def safe(x: int, y: int) -> bool:
+        return x - y != bishop_diff and x + y != bishop_sum
+
+    queries = []
+    for _ in range(count):
+        if placement == "blocking":
+            start_x, start_y = random_square(
+                lambda x, y: safe(x, y) and x - y < bishop_diff
+            )
+            end_x, end_y = random_square(lambda x, y: x - y > bishop_diff)
+        elif placement == "unreachable":
+            start_x, start_y = 0, 0
+            end_x, end_y = random_square(lambda x, y: (x, y) != (0, 0))
+        else:
+            start_x, start_y = random_square(safe)
+            end_x, end_y = random_square(lambda x, y: True)
+        queries.append((start_x, start_y, end_x, end_y, bishop_x, bishop_y, n))
+    return queries
+
+
+def solve(knight_moves: KnightMoves, solver: str) -> int:
+    """
+    Run a solver without instrumentation.
+    """
+    algorithm, kwargs = SOLVERS[solver]
+    return knight_moves.solve(algorithm, **kwargs)
+
+
+def run_solver(
+    solver: str,
+    queries: list[tuple[int, int, int, int, int, int, int]],
+    memory: bool = True,
+) -> dict:
+    """
+    Time a solver over queries, then solve the first query again with search metrics
+    for its max frontier size and duplicate pops, and under tracemalloc for its peak
+    memory (None if memory is False), since tracing slows the solvers down a lot.
+
+    The field cache is cleared before every query so each one is solved from scratch.
+    """
+    algorithm, kwargs = SOLVERS[solver]
+    lengths = []
+    times = []
+    nodes_visited = 0
+    for query in queries:
+        KnightMoves.field_cache.clear()
+        knight_moves = KnightMoves(*query)
+        started = time.perf_counter()
+        lengths.append(solve(knight_moves, solver))
+        times.append(time.perf_counter() - started)
+        nodes_visited += knight_moves.num_visited
+
+    KnightMoves.field_cache.clear()
+    knight_moves = KnightMoves(*queries[0])
+    peak_memory = None
+    if memory:
+        tracemalloc.start()
+    _, metrics = knight_moves.with_metrics(algorithm, **kwargs)
+    if memory:
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    KnightMoves.field_cache.clear()
+
+    return {
+        "wall_time": sum(times),
+        "mean_time": sum(times) / len(times),
+        "max_time": max(times),
+        "nodes_visited": nodes_visited,
+        "peak_memory": peak_memory,
+        "max_frontier": metrics.max_frontier,
+        "duplicate_pops": metrics.duplicate_pops,
+        "lengths": lengths,
+    }
+
+
+def default_solvers(n: int) -> list[str]:
+    """
+    Get the solvers run on a board size when none are given.
+    """
+    if n > LARGE_BOARD_SIZE:
+        return [solver for solver in DEFAULT_SOLVERS if solver in LARGE_BOARD_SOLVERS]
+    return DEFAULT_SOLVERS
+
+
+def default_queries(n: int) -> int:
+    """
+    Get the number of queries per case on a board size when none is given.
+    """
+    return LARGE_BOARD_QUERIES if n > LARGE_BOARD_SIZE else DEFAULT_QUERIES
+
+
+def compare_results(old: dict, new: dict):
+    """
+    Print the wall time of every case in new relative to the same case in old.
+    """
+    old_cases = {
+        (case["solver"], case["n"], case["placement"]): case for case in old["cases"]
+    }
+    for case in new["cases"]:
+        key = (case["solver"], case["n"], case["placement"])
+        if key not in old_cases:
+            continue
+        ratio = case["wall_time"] / max(old_cases[key]["wall_time"], 1e-9)
+        click.echo(f"{key[0]:>15} n={key[1]:<6} {key[2]:<12} {ratio:6.2f}x")
+
+
+@click.command(help="Benchmark the solvers across board sizes and bishop placements.")
+@click.option(
+    "--n",
+    "sizes",
+    type=int,
+    multiple=True,
+    default=DEFAULT_SIZES,
+    help="Chess board size, may be repeated.",
+)
+@click.option(
+    "--placement",
+    "placements",
+    type=click.Choice(PLACEMENTS),
+    multiple=True,
+    default=PLACEMENTS,
+    help="Bishop placement, may be repeated.",
+)
+@click.option(
+    "--solver",
+    "solvers",
+    type=click.Choice(list(SOLVERS)),
+    multiple=True,
+    help="Solver to run, may be repeated. By default every installed solver, and only "
+    + f"{', '.join(LARGE_BOARD_SOLVERS)} for n > {LARGE_BOARD_SIZE}.",
+)
+@click.option(
+    "--queries",
+    type=int,
+    default=None,
+    help=f"Queries per case, {DEFAULT_QUERIES} by default and {LARGE_BOARD_QUERIES} "
+    + f"for n > {LARGE_BOARD_SIZE}.",
+)
+@click.option("--seed", default=DEFAULT_SEED, help="Random seed for the queries.")
+@click.option(
+    "--memory/--no-memory",
+    default=True,
+    help="Measure peak memory, which solves the first query of every case again.",
+)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False),
+    default=DEFAULT_OUTPUT,
+    help="Output JSON file.",
+)
+@click.option(
+    "--compare",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="Earlier output JSON file to compare wall times against.",
+)
+def main(sizes, placements, solvers, queries, seed, memory, output, compare):
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "cases": [],
+        # the installed solvers not run on each board size
+        "skipped": {},
+    }
+    for n in sizes:
+        case_solvers = solvers or default_solvers(n)
+        skipped = [solver for solver in DEFAULT_SOLVERS if solver not in case_solvers]
+        if skipped:
+            results["skipped"][n] = skipped
+            click.echo(f"n={n}: skipping {', '.join(skipped)}")
+        count = queries or default_queries(n)
+        for placement in placements:
+            # the same queries for every solver of a case
+            case_queries = get_queries(
+                n, placement, count, random.Random(f"{seed}-{n}-{placement}")
+            )
+            for solver in case_solvers:
+                case = {
+                    "solver": solver,
+                    "n": n,
+                    "placement": placement,
+                    "queries": count,
+                }
+                case.update(run_solver(solver, case_queries, memory))
+                results["cases"].append(case)
+                line = (
+                    f"{solver:>15} n={n:<6} {placement:<12} "
+                    + f"{case['wall_time']:10.4f}s {case['nodes_visited']:>12} nodes "
+                    + f"{case['max_frontier']:>10} queued"
+                )
+                if memory:
+                    line += f" {case['peak_memory'] / 1024:10.1f} KiB"
+                click.echo(line)
+
+    with open(output, "w") as file:
+        json.dump(results, file, indent=2)
+    click.echo(f"Wrote benchmark results to {output}")
+    if compare:
+        with open(compare) as file:
+            compare_results(json.load(file), results)
+
+
+if __name__ == "__main__":
+    main()
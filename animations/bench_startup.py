@@ -0,0 +1,85 @@
+"""
+Benchmark the startup time of the headless CLI, with and without the modules the
+package used to import eagerly.
+"""
+
+import statistics
+import subprocess
+import sys
+import time
+
+import click
+
+DEFAULT_RUNS = 20
+
+CLI_ARGS = [
+    "cli",
+    "--start-x=4",
+    "--start-y=2",
+    "--end-x=2",
+    "--end-y=6",
+    "--bishop-x=2",
+    "--bishop-y=3",
+    "--n=8",
+    "--algorithm=bfs",
+]
+# tkinter, ttk, cProfile and the process pool were imported by every command before the
+# GUI was split out of the solver, loading them first reproduces that
+EAGER_IMPORTS = "import tkinter, tkinter.ttk, cProfile, concurrent.futures.process"
+
+COMMANDS = {
+    "python": [sys.executable, "-c", "pass"],
+    "cli": [sys.executable, "-m", "animations"] + CLI_ARGS,
+    "cli-eager": [
+        sys.executable,
+        "-c",
+        EAGER_IMPORTS + "; import runpy; runpy.run_module('animations', "
+        "run_name='__main__')",
+    ]
+    + CLI_ARGS,
+}
+
+
+def time_command(command: list[str], runs: int) -> list[float]:
+    """
+    Run a command runs times, returning the wall time of each run.
+    """
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def loads_tkinter() -> bool:
+    """
+    Check whether importing the CLI module loads tkinter.
+    """
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, animations.animations; print('tkinter' in sys.modules)",
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return output.strip() == "True"
+
+
+@click.command(help="Benchmark the startup time of python -m animations cli.")
+@click.option("--runs", default=DEFAULT_RUNS, help="Runs per command.")
+def main(runs):
+    for name, command in COMMANDS.items():
+        times = time_command(command, runs)
+        click.echo(
+            f"{name:>10} median {statistics.median(times) * 1000:8.1f} ms "
+            + f"min {min(times) * 1000:8.1f} ms"
+        )
+    click.echo(f"Importing animations.animations loads tkinter: {loads_tkinter()}")
+
+
+if __name__ == "__main__":
+    main()
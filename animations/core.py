@@ -0,0 +1,2794 @@
+"""
+Solve the knight moves problem: the shortest knight path from a start square to an end
+square on an n x n board, avoiding the squares a bishop attacks unless it is captured.
+"""
+
+from array import array
+from collections import OrderedDict, deque
+import csv
+import functools
+import heapq
+import json
+import os
+from typing import IO, Generator, Iterable, Iterator, Sequence
+import mmap
+import struct
+import sys
+import time
+import click
+import logging
+
+DEFAULT_N = 8
+DEFAULT_START_X = 4
+DEFAULT_START_Y = 2
+DEFAULT_END_X = 2
+DEFAULT_END_Y = 6
+DEFAULT_BISHOP_X = 2
+DEFAULT_BISHOP_Y = 3
+DEFAULT_FIELD_CACHE_BYTES = 64 * 1024 * 1024
+DEFAULT_BATCH_CHUNK_SIZE = 256
+DEFAULT_STREAM_CHUNK_SIZE = 4096
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_MAX_N = 4096
+
+# columns of a query in batch files
+QUERY_FIELDS = ("start_x", "start_y", "end_x", "end_y", "bishop_x", "bishop_y", "n")
+
+
+def _offset_knight_distance(dx: int, dy: int) -> int:
+    """
+    Knight distance of an offset (dx, dy) on an infinite board, which is the distance on
+    an n x n board with n >= 5 unless one of the squares is a corner.
+    """
+    dx, dy = abs(dx), abs(dy)
+    if dx < dy:
+        dx, dy = dy, dx
+    if dx == 1 and dy == 0:
+        return 3
+    if dx == 2 and dy == 2:
+        return 4
+    delta = dx - dy
+    if dy > delta:
+        return delta - 2 * ((delta - dy) // 3)
+    return delta - 2 * ((delta - dy) // 4)
+
+
+class DistanceTable:
+    """
+    Knight distances on an empty n x n board, stored compactly in a file that can be
+    memory mapped.
+
+    Once n >= 5 the distance only depends on the offset between two squares, apart from
+    a square next to a corner, so the table is indexed by abs(dx) * n + abs(dy). Smaller
+    boards store all pairs, indexed by ((x1 * n + y1) * n + x2) * n + y2.
+    """
+
+    # magic, n, bytes per entry, whether all pairs are stored, whether entries are big
+    # endian, padded so that two byte entries stay aligned
+    HEADER = struct.Struct("<4sHBBBx")
+    MAGIC = b"KNTD"
+    # the largest board size the header can hold
+    MAX_N = 65535
+
+    def __init__(self, n: int, table: Sequence[int], all_pairs: bool):
+        self.n = n
+        self.table = table
+        self.all_pairs = all_pairs
+        # the largest entry marks unreachable squares
+        self.unreachable = 255 if table.itemsize == 1 else 65535
+
+    @classmethod
+    def build(cls, n: int) -> "DistanceTable":
+        """
+        Build the table for an n x n board.
+        """
+        if not 1 <= n <= cls.MAX_N:
+            raise ValueError(f"Board size must be between 1 and {cls.MAX_N}")
+        if n < 5:
+            table = array("B", [255]) * (n**4)
+            for x in range(n):
+                for y in range(n):
+                    field = cls._empty_board_bfs(x, y, n)
+                    for square, distance in enumerate(field):
+                        if distance != -1:
+                            table[(x * n + y) * n * n + square] = distance
+            return cls(n, table, True)
+
+        # away from the corners the distance of an offset is the infinite board one,
+        # which is the same for (dx, dy) and (dy, dx)
+        table = array("H", bytes(2 * n * n))
+        for dx in range(n):
+            for dy in range(dx + 1):
+                distance = _offset_knight_distance(dx, dy)
+                table[dx * n + dy] = distance
+                table[dy * n + dx] = distance
+        if max(table) < 255:
+            table = array("B", table)
+        return cls(n, table, False)
+
+    @classmethod
+    def _empty_board_bfs(cls, x: int, y: int, n: int) -> list[int]:
+        """
+        BFS from (x, y) on an empty n x n board, returning the distance to every square
+        as a flat list indexed by x * n + y (-1 if unreachable).
+        """
+        row = [2, 2, -2, -2, 1, 1, -1, -1]
+        col = [1, -1, 1, -1, 2, -2, 2, -2]
+        field = [-1] * (n * n)
+        field[x * n + y] = 0
+        queue = deque()
+        queue.append((x, y))
+        while queue:
+            x, y = queue.popleft()
+            distance = field[x * n + y] + 1
+            for dx, dy in zip(row, col):
+                new_x, new_y = x + dx, y + dy
+                if 0 <= new_x < n and 0 <= new_y < n and field[new_x * n + new_y] == -1:
+                    field[new_x * n + new_y] = distance
+                    queue.append((new_x, new_y))
+        return field
+
+    def save(self, path: str):
+        """
+        Write the table to a file, entries are in native byte order.
+        """
+        with open(path, "wb") as file:
+            file.write(
+                self.HEADER.pack(
+                    self.MAGIC,
+                    self.n,
+                    self.table.itemsize,
+                    self.all_pairs,
+                    sys.byteorder == "big",
+                )
+            )
+            self.table.tofile(file)
+
+    @classmethod
+    def load(cls, path: str) -> "DistanceTable":
+        """
+        Memory map a table written by save, raising a ValueError if the file is not
+        a whole table written on a machine of the same byte order.
+        """
+        with open(path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size < cls.HEADER.size:
+                raise ValueError(f"Not a knight distance table: {path}")
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n, itemsize, all_pairs, big_endian = cls.HEADER.unpack_from(mapped)
+        if magic != cls.MAGIC or itemsize not in (1, 2):
+            raise ValueError(f"Not a knight distance table: {path}")
+        if bool(big_endian) != (sys.byteorder == "big"):
+            raise ValueError(f"Knight distance table of another byte order: {path}")
+        entries = n**4 if all_pairs else n * n
+        if size != cls.HEADER.size + entries * itemsize:
+            raise ValueError(f"Truncated knight distance table: {path}")
+        table = memoryview(mapped)[cls.HEADER.size :].cast(
+            "B" if itemsize == 1 else "H"
+        )
+        return cls(n, table, bool(all_pairs))
+
+    def distance(self, x1: int, y1: int, x2: int, y2: int) -> int:
+        """
+        Look up the knight distance between two squares (-1 if unreachable).
+        """
+        n = self.n
+        if self.all_pairs:
+            distance = self.table[((x1 * n + y1) * n + x2) * n + y2]
+            return -1 if distance == self.unreachable else distance
+        dx, dy = abs(x1 - x2), abs(y1 - y2)
+        if dx == 1 and dy == 1:
+            # a corner square can only leave the corner away from its diagonal neighbor
+            if (x1 in (0, n - 1) and y1 in (0, n - 1)) or (
+                x2 in (0, n - 1) and y2 in (0, n - 1)
+            ):
+                return 4
+        return self.table[dx * n + dy]
+
+
+class DistanceFieldCache:
+    """
+    LRU cache of single source distance fields, bounded by the bytes the fields take.
+
+    Keys are (n, source_x, source_y, bishop_x, bishop_y, bishop_alive), with the bishop
+    square left as None for bishop-free fields since they do not depend on it. Cached
+    fields are shared, so callers must not modify them.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_FIELD_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.fields = OrderedDict()
+
+    def get(self, key: tuple) -> array | None:
+        """
+        Get a cached field, marking it as most recently used.
+        """
+        field = self.fields.get(key)
+        if field is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.fields.move_to_end(key)
+        return field
+
+    def put(self, key: tuple, field: array):
+        """
+        Cache a field, evicting the least recently used fields until it fits.
+        """
+        size = len(field) * field.itemsize
+        if size > self.max_bytes:
+            return
+        if key in self.fields:
+            self.current_bytes -= len(self.fields[key]) * self.fields[key].itemsize
+            del self.fields[key]
+        while self.current_bytes + size > self.max_bytes:
+            _, evicted = self.fields.popitem(last=False)
+            self.current_bytes -= len(evicted) * evicted.itemsize
+        self.fields[key] = field
+        self.current_bytes += size
+
+    def clear(self):
+        """
+        Drop every cached field and reset the counters.
+        """
+        self.fields.clear()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+
+class SearchMetrics:
+    """
+    Counters filled in by a search run through KnightMoves.with_metrics.
+
+    Levels are the BFS levels of the start side only: level_times splits the time of
+    the whole search where a start side level ends, so in a DBFS every entry includes
+    the end side work done in between. meeting_depth is the depth from the start and
+    from the end where the best meeting of a DBFS happened.
+
+    Other sinks can be passed to with_metrics by subclassing this or implementing the
+    same methods and counters.
+    """
+
+    def __init__(self):
+        self.nodes_expanded = 0
+        self.duplicate_pops = 0
+        self.max_frontier = 0
+        self.meeting_depth = None
+        self.level_times = []
+        self.level = 0
+        self.level_started = time.perf_counter()
+
+    def start(self):
+        """
+        Record the start of the search.
+        """
+        self.level_started = time.perf_counter()
+
+    def pop(self, frontier_size: int, depth: int | None = None):
+        """
+        Record a pop from a frontier of frontier_size states, at depth on the start side.
+        """
+        if frontier_size > self.max_frontier:
+            self.max_frontier = frontier_size
+        if depth is not None and depth > self.level:
+            self.level = depth
+            self._end_level()
+
+    def finish(self, nodes_expanded: int):
+        """
+        Record the end of the search.
+        """
+        self.nodes_expanded = nodes_expanded
+        self._end_level()
+
+    def as_dict(self) -> dict:
+        """
+        Get the counters as a dict.
+        """
+        return {
+            "nodes_expanded": self.nodes_expanded,
+            "duplicate_pops": self.duplicate_pops,
+            "max_frontier": self.max_frontier,
+            "meeting_depth": self.meeting_depth,
+            "level_times": self.level_times,
+        }
+
+    def _end_level(self):
+        now = time.perf_counter()
+        self.level_times.append(now - self.level_started)
+        self.level_started = now
+
+
+def _canonical(solver):
+    """
+    Run a solver with the pieces moved to the canonical orientation of the query,
+    putting them back afterwards, along with the meeting state of an array dbfs.
+    """
+
+    @functools.wraps(solver)
+    def solve_canonical(self, *args, **kwargs):
+        pieces = (
+            self.start_x,
+            self.start_y,
+            self.end_x,
+            self.end_y,
+            self.bishop_x,
+            self.bishop_y,
+        )
+        n = self.n
+        symmetry = self._canonical_symmetry(pieces + (n,))
+        self.start_x, self.start_y = self._transform(
+            self.start_x, self.start_y, symmetry, n
+        )
+        self.end_x, self.end_y = self._transform(self.end_x, self.end_y, symmetry, n)
+        self.bishop_x, self.bishop_y = self._transform(
+            self.bishop_x, self.bishop_y, symmetry, n
+        )
+        self.meeting_state = -1
+        try:
+            return solver(self, *args, **kwargs)
+        finally:
+            (
+                self.start_x,
+                self.start_y,
+                self.end_x,
+                self.end_y,
+                self.bishop_x,
+                self.bishop_y,
+            ) = pieces
+            if self.meeting_state != -1:
+                x, y = self._untransform(*divmod(self.meeting_state, n), symmetry, n)
+                self.meeting_state = x * n + y
+
+    return solve_canonical
+
+
+class KnightMoves:
+    # single source distance fields shared by every instance
+    field_cache = DistanceFieldCache()
+
+    def __init__(
+        self,
+        start_x: int = DEFAULT_START_X,
+        start_y: int = DEFAULT_START_Y,
+        end_x: int = DEFAULT_END_X,
+        end_y: int = DEFAULT_END_Y,
+        bishop_x: int = DEFAULT_BISHOP_X,
+        bishop_y: int = DEFAULT_BISHOP_Y,
+        n: int = DEFAULT_N,
+        debug: bool = False,
+        distance_table: DistanceTable | None = None,
+        extra_bishops: Iterable[tuple[int, int]] = (),
+        obstacles: Iterable[tuple[int, int]] = (),
+    ):
+        self.start_x = start_x
+        self.start_y = start_y
+        self.end_x = end_x
+        self.end_y = end_y
+        self.bishop_x = bishop_x
+        self.bishop_y = bishop_y
+        self.n = n
+        self.logger = self._get_logger(debug)
+        # number of states expanded by the last search
+        self.num_visited = 0
+        # counters of the search being run by with_metrics, None when not instrumented
+        self.metrics = None
+        # precomputed empty board distances, used by knight_distance for its board size
+        self.distance_table = distance_table
+        # bishops besides (bishop_x, bishop_y) and blocked squares, only multi_astar
+        # searches boards with them
+        self.extra_bishops = [tuple(square) for square in extra_bishops]
+        self.obstacles = [tuple(square) for square in obstacles]
+        # state x * n + y where the searches of the last array dbfs met best, in the
+        # orientation of the pieces (-1 if none)
+        self.meeting_state = -1
+
+    def run_cli(self, algorithm: str = "all"):
+        """
+        Run the CLI, with either one algorithm or all of them. Boards with extra bishops
+        or obstacles are only solved by the multi-bishop A*.
+        """
+        self._validate_input()
+        if self.extra_bishops or self.obstacles:
+            if algorithm not in ("all", "multi"):
+                raise ValueError("Extra bishops and obstacles need multi_astar")
+            click.echo(f"Shortest path length multi-bishop A*: {self.multi_astar()}")
+            return
+        if algorithm in ("all", "unoptimized"):
+            click.echo(
+                f"Shortest path length unoptimized BFS: {self.unoptimized_bfs()}"
+            )
+        if algorithm in ("all", "bfs"):
+            click.echo(f"Shortest path length BFS: {self.bfs()}")
+        if algorithm in ("all", "dbfs"):
+            click.echo(f"Shortest path length DBFS: {self.dbfs()}")
+        if algorithm in ("all", "astar"):
+            click.echo(f"Shortest path length A*: {self.astar()}")
+        if algorithm in ("all", "multi"):
+            click.echo(f"Shortest path length multi-bishop A*: {self.multi_astar()}")
+
+    def _validate_input(self):
+        """
+        Validate input.
+        """
+        if not all(
+            [
+                0 <= self.start_x < self.n,
+                0 <= self.start_y < self.n,
+                0 <= self.end_x < self.n,
+                0 <= self.end_y < self.n,
+                0 <= self.bishop_x < self.n,
+                0 <= self.bishop_y < self.n,
+            ]
+        ):
+            raise ValueError("Invalid input")
+        if (self.start_x, self.start_y) == (self.bishop_x, self.bishop_y) or (
+            self.end_x,
+            self.end_y,
+        ) == (
+            self.bishop_x,
+            self.bishop_y,
+        ):
+            raise ValueError("Invalid input")
+        if self.extra_bishops or self.obstacles:
+            self._validate_board()
+        elif self._is_attacked(
+            self.start_x, self.start_y, self.bishop_x, self.bishop_y
+        ):
+            raise ValueError("Invalid input")
+
+    def _validate_board(self):
+        """
+        Validate the extra bishops and obstacles: every piece on its own square of the
+        board, away from the start and end, with the start not attacked.
+        """
+        pieces = [(self.bishop_x, self.bishop_y)] + self.extra_bishops + self.obstacles
+        if not all(0 <= x < self.n and 0 <= y < self.n for x, y in pieces):
+            raise ValueError("Invalid input")
+        if len(set(pieces)) != len(pieces):
+            raise ValueError("Invalid input")
+        if (self.start_x, self.start_y) in pieces or (self.end_x, self.end_y) in pieces:
+            raise ValueError("Invalid input")
+        if self._attackers()[self.start_x * self.n + self.start_y]:
+            raise ValueError("Invalid input")
+
+    def _check_single_bishop(self):
+        """
+        Make sure the board has a single bishop and no obstacles.
+        """
+        if self.extra_bishops or self.obstacles:
+            raise ValueError("Extra bishops and obstacles need multi_astar")
+
+    def _field_fits(self) -> bool:
+        """
+        Check whether a distance field of this board fits in the field cache.
+        """
+        return self.n * self.n * array("i").itemsize <= self.field_cache.max_bytes
+
+    def _targeted_bfs(
+        self,
+        start_x: int,
+        start_y: int,
+        end_x: int,
+        end_y: int,
+        bishop_alive: bool,
+    ) -> tuple[int, int]:
+        """
+        BFS from the start that stops as soon as it reaches the end, for boards whose
+        distance fields are not cached. Returns the distance (-1 if unreachable) and the
+        number of squares reached.
+        """
+        row = [2, 2, -2, -2, 1, 1, -1, -1]
+        col = [1, -1, 1, -1, 2, -2, 2, -2]
+        n = self.n
+        bishop_diff = self.bishop_x - self.bishop_y
+        bishop_sum = self.bishop_x + self.bishop_y
+        if (start_x, start_y) == (end_x, end_y):
+            return 0, 1
+        visited = bytearray(n * n)
+        visited[start_x * n + start_y] = 1
+        num_visited = 1
+        # tuples of the form (x, y, distance)
+        queue = deque()
+        queue.append((start_x, start_y, 0))
+        while queue:
+            x, y, distance = queue.popleft()
+            for dx, dy in zip(row, col):
+                new_x, new_y = x + dx, y + dy
+                if not (0 <= new_x < n and 0 <= new_y < n):
+                    continue
+                # on the bishop's diagonals, only the bishop square itself is safe
+                if (
+                    bishop_alive
+                    and (new_x - new_y == bishop_diff or new_x + new_y == bishop_sum)
+                    and new_x != self.bishop_x
+                ):
+                    continue
+                if (new_x, new_y) == (end_x, end_y):
+                    return distance + 1, num_visited + 1
+                if not visited[new_x * n + new_y]:
+                    visited[new_x * n + new_y] = 1
+                    num_visited += 1
+                    queue.append((new_x, new_y, distance + 1))
+        return -1, num_visited
+
+    def _distance_field(
+        self, source_x: int, source_y: int, bishop_alive: bool
+    ) -> array:
+        """
+        BFS from a single source over the whole board, returning the distance to every
+        square as a flat int array indexed by x * n + y (-1 if unreachable).
+
+        Fields are memoized in the shared field cache and must not be modified.
+        """
+        if bishop_alive:
+            key = (self.n, source_x, source_y, self.bishop_x, self.bishop_y, True)
+        else:
+            key = (self.n, source_x, source_y, None, None, False)
+        field = self.field_cache.get(key)
+        if field is not None:
+            return field
+
+        row = [2, 2, -2, -2, 1, 1, -1, -1]
+        col = [1, -1, 1, -1, 2, -2, 2, -2]
+        n = self.n
+        bishop_diff = self.bishop_x - self.bishop_y
+        bishop_sum = self.bishop_x + self.bishop_y
+        field = array("i", [-1]) * (n * n)
+        field[source_x * n + source_y] = 0
+        # tuples of the form (x, y), distances are read back from the field
+        queue = deque()
+        queue.append((source_x, source_y))
+        while queue:
+            x, y = queue.popleft()
+            distance = field[x * n + y] + 1
+            for dx, dy in zip(row, col):
+                new_x, new_y = x + dx, y + dy
+                if not (0 <= new_x < n and 0 <= new_y < n):
+                    continue
+                # on the bishop's diagonals, only the bishop square itself is safe
+                if (
+                    bishop_alive
+                    and (new_x - new_y == bishop_diff or new_x + new_y == bishop_sum)
+                    and new_x != self.bishop_x
+                ):
+                    continue
+                if field[new_x * n + new_y] == -1:
+                    field[new_x * n + new_y] = distance
+                    queue.append((new_x, new_y))
+        self.field_cache.put(key, field)
+        return field
+
+    @classmethod
+    def canonical_query(
+        cls, query: tuple[int, int, int, int, int, int, int]
+    ) -> tuple[int, int, int, int, int, int, int]:
+        """
+        Map a query (start_x, start_y, end_x, end_y, bishop_x, bishop_y, n) onto its
+        canonical orientation.
+
+        The shortest path length does not change under the 8 symmetries of the board
+        applied to every piece. Of those, the one giving the smallest (start, bishop,
+        end) is picked, start and bishop first so that queries sharing them up to
+        symmetry share one start distance field.
+        """
+        start_x, start_y, end_x, end_y, bishop_x, bishop_y, n = query
+        symmetry = cls._canonical_symmetry(query)
+        return (
+            cls._transform(start_x, start_y, symmetry, n)
+            + cls._transform(end_x, end_y, symmetry, n)
+            + cls._transform(bishop_x, bishop_y, symmetry, n)
+            + (n,)
+        )
+
+    @classmethod
+    def _canonical_symmetry(
+        cls, query: tuple[int, int, int, int, int, int, int]
+    ) -> int:
+        """
+        Get the symmetry mapping a query onto its canonical orientation.
+        """
+        start_x, start_y, end_x, end_y, bishop_x, bishop_y, n = query
+        best, best_symmetry = None, 0
+        for symmetry in range(8):
+            candidate = (
+                cls._transform(start_x, start_y, symmetry, n)
+                + cls._transform(bishop_x, bishop_y, symmetry, n)
+                + cls._transform(end_x, end_y, symmetry, n)
+            )
+            if best is None or candidate < best:
+                best, best_symmetry = candidate, symmetry
+        return best_symmetry
+
+    @classmethod
+    def board_key(
+        cls, query: tuple[int, int, int, int, int, int, int]
+    ) -> tuple[int, tuple[int, int]]:
+        """
+        Get the board size and the bishop square up to symmetry of a query, which every
+        query sharing start distance fields with it has too.
+        """
+        n = query[6]
+        bishop = min(
+            cls._transform(query[4], query[5], symmetry, n) for symmetry in range(8)
+        )
+        return n, bishop
+
+    @staticmethod
+    def _transform(x: int, y: int, symmetry: int, n: int) -> tuple[int, int]:
+        """
+        Apply one of the 8 symmetries of the board to a square: bit 2 transposes it,
+        then bits 0 and 1 mirror x and y.
+        """
+        if symmetry & 4:
+            x, y = y, x
+        if symmetry & 1:
+            x = n - 1 - x
+        if symmetry & 2:
+            y = n - 1 - y
+        return x, y
+
+    @staticmethod
+    def _untransform(x: int, y: int, symmetry: int, n: int) -> tuple[int, int]:
+        """
+        Undo _transform for one of the 8 symmetries.
+        """
+        if symmetry & 2:
+            y = n - 1 - y
+        if symmetry & 1:
+            x = n - 1 - x
+        if symmetry & 4:
+            x, y = y, x
+        return x, y
+
+    @classmethod
+    def solve_many(
+        cls,
+        queries: Iterable[tuple[int, int, int, int, int, int, int]],
+        distance_table: DistanceTable | None = None,
+    ) -> list[int]:
+        """
+        Solve many queries of the form (start_x, start_y, end_x, end_y, bishop_x, bishop_y, n),
+        returning the shortest path lengths in input order.
+
+        Queries are put in their canonical orientation and grouped by board size and
+        bishop square, so that the single source distance fields of a group are computed
+        once, for every query sharing them up to symmetry, and then served by the field
+        cache. The leg after capturing the bishop uses the closed form knight distance,
+        or the distance table for boards of its size.
+        """
+        queries = [cls.canonical_query(tuple(query)) for query in queries]
+        results = [-1] * len(queries)
+        groups = dict()
+        for index, query in enumerate(queries):
+            _, _, _, _, bishop_x, bishop_y, n = query
+            groups.setdefault((n, bishop_x, bishop_y), []).append(index)
+
+        for (n, bishop_x, bishop_y), indices in groups.items():
+            knight_moves = cls(
+                bishop_x=bishop_x,
+                bishop_y=bishop_y,
+                n=n,
+                distance_table=distance_table,
+            )
+            for index in indices:
+                start_x, start_y, end_x, end_y, _, _, _ = queries[index]
+                knight_moves.start_x, knight_moves.start_y = start_x, start_y
+                knight_moves.end_x, knight_moves.end_y = end_x, end_y
+                knight_moves._validate_input()
+
+                start_field = knight_moves._distance_field(start_x, start_y, True)
+                to_bishop = start_field[bishop_x * n + bishop_y]
+                to_goal = start_field[end_x * n + end_y]
+                bishop_to_goal = -1
+                if to_bishop != -1:
+                    bishop_to_goal = knight_moves.knight_distance(
+                        bishop_x, bishop_y, end_x, end_y, n
+                    )
+                results[index] = knight_moves._combine_legs(
+                    to_bishop, to_goal, bishop_to_goal
+                )
+        return results
+
+    @classmethod
+    def iter_solve(
+        cls,
+        queries: Iterable[tuple[int, int, int, int, int, int, int]],
+        chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+    ) -> Iterator[int]:
+        """
+        Solve queries like solve_many in this process, yielding the shortest path lengths
+        in input order while holding at most one chunk of queries in memory.
+        """
+        chunk = []
+        for query in queries:
+            chunk.append(tuple(query))
+            if len(chunk) == chunk_size:
+                yield from cls.solve_many(chunk)
+                chunk = []
+        if chunk:
+            yield from cls.solve_many(chunk)
+
+    @classmethod
+    def solve_parallel(
+        cls,
+        queries: Iterable[tuple[int, int, int, int, int, int, int]],
+        workers: int | None = None,
+        chunk_size: int = DEFAULT_BATCH_CHUNK_SIZE,
+    ) -> Iterator[int]:
+        """
+        Solve queries like solve_many, sharded across a pool of worker processes, yielding
+        the shortest path lengths in input order as soon as they are known.
+
+        Queries are read in windows of a few chunks per worker. Each window is grouped by
+        board size and bishop square, up to symmetry, before being split into chunks, so
+        a worker solves whole boards at a time and keeps their distance fields in its own
+        field cache.
+        The next window is submitted before the results of the current one are yielded.
+        """
+        # loading the process pool is slow, and only batches of queries need it
+        from concurrent.futures import ProcessPoolExecutor
+
+        workers = workers or os.cpu_count() or 1
+        window_size = 4 * workers * chunk_size
+        queries = iter(queries)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            while True:
+                window = []
+                for query in queries:
+                    window.append(tuple(query))
+                    if len(window) == window_size:
+                        break
+                if window:
+                    groups = dict()
+                    for index, query in enumerate(window):
+                        groups.setdefault(cls.board_key(query), []).append(index)
+                    chunks = []
+                    for indices in groups.values():
+                        for i in range(0, len(indices), chunk_size):
+                            chunks.append(indices[i : i + chunk_size])
+                    futures = [
+                        executor.submit(
+                            _solve_chunk, [window[index] for index in chunk]
+                        )
+                        for chunk in chunks
+                    ]
+                    pending.append((len(window), chunks, futures))
+                # keep one window queued behind the one being written out
+                if len(pending) > 1 or (pending and not window):
+                    window_length, chunks, futures = pending.popleft()
+                    results = [-1] * window_length
+                    for chunk, future in zip(chunks, futures):
+                        for index, result in zip(chunk, future.result()):
+                            results[index] = result
+                    yield from results
+                if not pending:
+                    return
+
+    def solve(self, algorithm: str = "bfs", **kwargs) -> int:
+        """
+        Run a solver by name, passing kwargs on to it.
+        """
+        solvers = {
+            "unoptimized": self.unoptimized_bfs,
+            "bfs": self.bfs,
+            "dbfs": self.dbfs,
+            "astar": self.astar,
+            "multi": self.multi_astar,
+        }
+        if algorithm not in solvers:
+            raise ValueError(f"Unknown algorithm: {algorithm}")
+        return solvers[algorithm](**kwargs)
+
+    def with_metrics(
+        self,
+        algorithm: str = "bfs",
+        metrics: SearchMetrics | None = None,
+        **kwargs,
+    ) -> tuple[int, SearchMetrics]:
+        """
+        Run a solver with instrumentation, returning its result and the metrics, a new
+        SearchMetrics unless one is given.
+
+        The tuple and array engines of bfs and dbfs fill in every counter, the other
+        solvers only the nodes expanded and the total time as a single level.
+        """
+        if metrics is None:
+            metrics = SearchMetrics()
+        metrics.start()
+        self.metrics = metrics
+        try:
+            result = self.solve(algorithm, **kwargs)
+        finally:
+            self.metrics = None
+        metrics.finish(self.num_visited)
+        return result, metrics
+
+    @_canonical
+    def unoptimized_bfs(self) -> int:
+        """
+        Unoptimized solution reading both legs from the start, no GUI implementation.
+        The query is solved in its canonical orientation, so its start distance field is
+        cached once for every query equal to it up to symmetry.
+        """
+        self._check_single_bishop()
+        if self._field_fits():
+            # both legs from the start are read from its whole distance field
+            field = self._distance_field(self.start_x, self.start_y, True)
+            to_bishop = field[self.bishop_x * self.n + self.bishop_y]
+            to_goal = field[self.end_x * self.n + self.end_y]
+            self.num_visited = len(field) - field.count(-1)
+        else:
+            # the field would be thrown away, so each leg stops as soon as it is found
+            to_bishop, bishop_visited = self._targeted_bfs(
+                self.start_x, self.start_y, self.bishop_x, self.bishop_y, True
+            )
+            to_goal, goal_visited = self._targeted_bfs(
+                self.start_x, self.start_y, self.end_x, self.end_y, True
+            )
+            self.num_visited = bishop_visited + goal_visited
+        if to_bishop == -1:
+            return to_goal
+        bishop_to_goal = self.knight_distance(
+            self.bishop_x, self.bishop_y, self.end_x, self.end_y, self.n
+        )
+        return self._combine_legs(to_bishop, to_goal, bishop_to_goal)
+
+    def _combine_legs(self, to_bishop: int, to_goal: int, bishop_to_goal: int) -> int:
+        """
+        Combine the start -> bishop, start -> goal and bishop -> goal legs into the
+        shortest path length, where -1 means a leg is unreachable.
+        """
+        if to_bishop == -1:
+            return to_goal
+        if to_goal == -1:
+            if bishop_to_goal == -1:
+                return -1
+            return to_bishop + bishop_to_goal
+        if bishop_to_goal == -1:
+            return to_goal
+        return min(to_bishop + bishop_to_goal, to_goal)
+
+    @_canonical
+    def bfs(self, engine: str = "tuple", mark_on_push: bool = False) -> int:
+        """
+        Run BFS to find shortest path from start to end.
+
+        Only the bishop-alive layer is searched, once the bishop is captured the rest of
+        the path length is given by the closed form knight distance. The "tuple" engine
+        drains bfs_steps, the "array" engine runs the same search over flat integer
+        states and the "numpy" and "bitset" engines expand a whole BFS level at a time,
+        over a boolean array or a Python int with a bit per square. With mark_on_push,
+        states are marked visited when pushed rather than popped, so each is queued only
+        once (the level at a time engines always expand each state once). The query is
+        solved in its canonical orientation.
+        """
+        self._check_single_bishop()
+        if engine == "array":
+            return self._array_bfs(mark_on_push=mark_on_push)
+        if engine == "numpy":
+            return self._numpy_bfs()
+        if engine == "bitset":
+            return self._bitset_bfs()
+        if engine != "tuple":
+            raise ValueError(f"Unknown engine: {engine}")
+        return self._run_steps(self.bfs_steps(mark_on_push))
+
+    def bfs_steps(
+        self, mark_on_push: bool = False
+    ) -> Generator[tuple[int, int], None, int]:
+        """
+        BFS as a step generator, yielding every square as it is expanded and returning
+        the shortest path length, for the GUI to animate at its own pace.
+        """
+        row = [2, 2, -2, -2, 1, 1, -1, -1]
+        col = [1, -1, 1, -1, 2, -2, 2, -2]
+        bishop_to_goal = self.knight_distance(
+            self.bishop_x, self.bishop_y, self.end_x, self.end_y, self.n
+        )
+        bishop_diff = self.bishop_x - self.bishop_y
+        bishop_sum = self.bishop_x + self.bishop_y
+        # shortest path through the bishop, -1 until the bishop is reached
+        through_bishop = -1
+        visited = set()
+        if mark_on_push:
+            visited.add((self.start_x, self.start_y))
+        # tuples of the form (x, y, distance), the bishop is always alive here
+        queue = deque()
+        queue.append((self.start_x, self.start_y, 0))
+        num_visited = 0
+        metrics = self.metrics
+        while queue:
+            x, y, distance = queue.popleft()
+            if metrics is not None:
+                metrics.pop(len(queue) + 1, distance)
+
+            # no remaining path can beat capturing the bishop
+            if through_bishop != -1 and distance >= through_bishop:
+                self.num_visited = num_visited
+                self.logger.debug(f"Found after {num_visited} nodes")
+                return through_bishop
+
+            # check if we found the end
+            if (x, y) == (self.end_x, self.end_y):
+                self.num_visited = num_visited
+                self.logger.debug(f"Found after {num_visited} nodes")
+                return distance
+
+            # check if we can skip this node
+            if not mark_on_push:
+                if (x, y) in visited:
+                    if metrics is not None:
+                        metrics.duplicate_pops += 1
+                    continue
+                visited.add((x, y))
+            num_visited += 1
+
+            yield x, y
+
+            for dx, dy in zip(row, col):
+                new_x, new_y = x + dx, y + dy
+                if not self._is_valid_position(new_x, new_y, self.n):
+                    continue
+                # on the bishop's diagonals, only the bishop square itself is safe
+                if new_x - new_y == bishop_diff or new_x + new_y == bishop_sum:
+                    # the first capture found is the earliest one
+                    if (
+                        new_x == self.bishop_x
+                        and through_bishop == -1
+                        and bishop_to_goal != -1
+                    ):
+                        through_bishop = distance + 1 + bishop_to_goal
+                    continue
+                if mark_on_push:
+                    if (new_x, new_y) in visited:
+                        continue
+                    visited.add((new_x, new_y))
+                queue.append((new_x, new_y, distance + 1))
+
+        self.num_visited = num_visited
+        self.logger.debug(f"Not found after {num_visited} nodes")
+        return through_bishop
+
+    @_canonical
+    def dbfs(
+        self,
+        engine: str = "tuple",
+        level_synchronous: bool = False,
+        mark_on_push: bool = False,
+    ) -> int:
+        """
+        Run double ended BFS to find shortest path from start to end.
+
+        Both sides only search the bishop-alive layer, capturing the bishop is handled
+        by the closed form knight distance from the bishop to the end. The "tuple" engine
+        drains dbfs_steps, the "array" engine runs the same search over flat integer
+        states and the "bitset" engine expands whole levels over Python ints with a bit
+        per square. With level_synchronous, whole levels are expanded on the side with the
+        smaller frontier instead of alternating single nodes. With mark_on_push, states
+        are labelled when pushed rather than popped, so each is queued only once per side
+        and meetings are found when pushing (level synchronous DBFS always does this).
+        The query is solved in its canonical orientation.
+        """
+        self._check_single_bishop()
+        if level_synchronous and engine != "tuple":
+            raise ValueError("Level synchronous DBFS needs the tuple engine")
+        if engine == "bitset":
+            return self._bitset_dbfs()
+        if engine == "array":
+            if mark_on_push:
+                return self._array_marked_dbfs()
+            return self._array_dbfs()
+        if engine != "tuple":
+            raise ValueError(f"Unknown engine: {engine}")
+        return self._run_steps(self.dbfs_steps(level_synchronous, mark_on_push))
+
+    def dbfs_steps(
+        self, level_synchronous: bool = False, mark_on_push: bool = False
+    ) -> Generator[tuple[int, int], None, int]:
+        """
+        Double ended BFS as a step generator, yielding every square as it is expanded
+        from either side and returning the shortest path length.
+        """
+        if level_synchronous:
+            return (yield from self._level_dbfs_steps())
+        if mark_on_push:
+            return (yield from self._marked_dbfs_steps())
+        row = [2, 2, -2, -2, 1, 1, -1, -1]
+        col = [1, -1, 1, -1, 2, -2, 2, -2]
+        bishop_to_goal = self.knight_distance(
+            self.bishop_x, self.bishop_y, self.end_x, self.end_y, self.n
+        )
+        bishop_diff = self.bishop_x - self.bishop_y
+        bishop_sum = self.bishop_x + self.bishop_y
+        # shortest path through the bishop, and shortest path where the searches met
+        through_bishop = -1
+        meeting = -1
+        visited_start = dict()
+        visited_end = dict()
+        queue_start = deque()
+        queue_end = deque()
+        queue_start.append((self.start_x, self.start_y, 0))
+        # if the end position is threatened by the bishop we must capture the bishop,
+        # so only the start side searches
+        if not self._is_attacked(self.end_x, self.end_y, self.bishop_x, self.bishop_y):
+            queue_end.append((self.end_x, self.end_y, 0))
+        num_visited = 0
+        metrics = self.metrics
+        while queue_start:
+            # stop once neither a meeting nor a capture can beat the best path so far
+            if meeting != -1 or through_bishop != -1:
+                best = min(d for d in (meeting, through_bishop) if d != -1)
+                start_distance = queue_start[0][2]
+                lowest_distance = (
+                    min(start_distance, queue_end[0][2])
+                    if queue_end
+                    else start_distance
+                )
+                if (meeting != -1 or lowest_distance >= best) and (
+                    through_bishop != -1
+                    or bishop_to_goal == -1
+                    or start_distance + 1 + bishop_to_goal >= best
+                ):
+                    self.num_visited = num_visited
+                    self.logger.debug(f"Found after {num_visited} nodes")
+                    return best
+
+            x, y, distance = queue_start.popleft()
+            if metrics is not None:
+                metrics.pop(len(queue_start) + len(queue_end) + 1, distance)
+
+            if (x, y) in visited_start:
+                if metrics is not None:
+                    metrics.duplicate_pops += 1
+                continue
+
+            # keep expanding after meeting, the capture may still be shorter
+            if (x, y) == (self.end_x, self.end_y) or (x, y) in visited_end:
+                found = distance + visited_end.get((x, y), 0)
+                if meeting == -1 or found < meeting:
+                    meeting = found
+                    if metrics is not None:
+                        metrics.meeting_depth = (distance, found - distance)
+
+            visited_start[(x, y)] = distance
+            num_visited += 1
+
+            yield x, y
+
+            for dx, dy in zip(row, col):
+                new_x, new_y = x + dx, y + dy
+                if not self._is_valid_position(new_x, new_y, self.n):
+                    continue
+                # on the bishop's diagonals, only the bishop square itself is safe
+                if new_x - new_y == bishop_diff or new_x + new_y == bishop_sum:
+                    # the first capture found is the earliest one
+                    if (
+                        new_x == self.bishop_x
+                        and through_bishop == -1
+                        and bishop_to_goal != -1
+                    ):
+                        through_bishop = distance + 1 + bishop_to_goal
+                    continue
+                queue_start.append((new_x, new_y, distance + 1))
+
+            if not queue_end:
+                continue
+
+            x, y, distance = queue_end.popleft()
+            if metrics is not None:
+                metrics.pop(len(queue_start) + len(queue_end) + 1)
+
+            if (x, y) in visited_end:
+                if metrics is not None:
+                    metrics.duplicate_pops += 1
+                continue
+
+            if (x, y) in visited_start:
+                found = distance + visited_start[(x, y)]
+                if meeting == -1 or found < meeting:
+                    meeting = found
+                    if metrics is not None:
+                        metrics.meeting_depth = (visited_start[(x, y)], distance)
+
+            visited_end[(x, y)] = distance
+            num_visited += 1
+
+            yield x, y
+
+            for dx, dy in zip(row, col):
+                new_x, new_y = x + dx, y + dy
+                # passing the bishop from the end side would mean capturing it, so the
+                # whole of the bishop's diagonals are skipped
+                if new_x - new_y == bishop_diff or new_x + new_y == bishop_sum:
+                    continue
+                if self._is_valid_position(new_x, new_y, self.n):
+                    queue_end.append((new_x, new_y, distance + 1))
+
+        self.num_visited = num_visited
+        self.logger.debug(f"Not found after {num_visited} nodes")
+        return meeting if meeting != -1 else through_bishop
+
+    def astar(self) -> int:
+        """
+        Run A* to find shortest path from start to end.
+
+        The heuristic is the smaller of the empty board knight distance to the end and
+        the empty board knight distance to the bishop plus the bishop to the end. Both
+        are exact on the empty board, so they never overestimate once the bishop is in
+        the way, and are consistent. Capturing the bishop pushes a finished path with
+        its exact length, so the first finished path popped is the shortest.
+        """
+        self._check_single_bishop()
+        return self._run_steps(self.astar_steps())
+
+    def astar_steps(self) -> Generator[tuple[int, int], None, int]:
+        """
+        A* as a step generator, yielding every square as it is expanded and returning
+        the shortest path length.
+        """
+        row = [2, 2, -2, -2, 1, 1, -1, -1]
+        col = [1, -1, 1, -1, 2, -2, 2, -2]
+        n = self.n
+        bishop_to_goal = self.knight_distance(
+            self.bishop_x, self.bishop_y, self.end_x, self.end_y, n
+        )
+        bishop_diff = self.bishop_x - self.bishop_y
+        bishop_sum = self.bishop_x + self.bishop_y
+        end_attacked = self._is_attacked(
+            self.end_x, self.end_y, self.bishop_x, self.bishop_y
+        )
+
+        start_heuristic = self._astar_heuristic(
+            self.start_x, self.start_y, end_attacked, bishop_to_goal
+        )
+        if start_heuristic == -1:
+            self.num_visited = 0
+            return -1
+        distances = {(self.start_x, self.start_y): 0}
+        # tuples of the form (estimate, heuristic, x, y), ties go to the deeper node.
+        # The bishop square is only ever pushed as a finished path through the bishop.
+        heap = [(start_heuristic, start_heuristic, self.start_x, self.start_y)]
+        num_visited = 0
+        while heap:
+            estimate, remaining, x, y = heapq.heappop(heap)
+            distance = estimate - remaining
+
+            if (x, y) == (self.end_x, self.end_y) or (x, y) == (
+                self.bishop_x,
+                self.bishop_y,
+            ):
+                self.num_visited = num_visited
+                self.logger.debug(f"Found after {num_visited} nodes")
+                return estimate
+
+            # check if we can skip this node
+            if distance > distances[(x, y)]:
+                continue
+
+            num_visited += 1
+            yield x, y
+
+            for dx, dy in zip(row, col):
+                new_x, new_y = x + dx, y + dy
+                if not self._is_valid_position(new_x, new_y, n):
+                    continue
+                # on the bishop's diagonals, only the bishop square itself is safe
+                if new_x - new_y == bishop_diff or new_x + new_y == bishop_sum:
+                    if new_x == self.bishop_x and bishop_to_goal != -1:
+                        finished = distance + 1 + bishop_to_goal
+                        heapq.heappush(heap, (finished, 0, new_x, new_y))
+                    continue
+                if (
+                    new_x,
+                    new_y,
+                ) in distances and distances[(new_x, new_y)] <= distance + 1:
+                    continue
+                new_remaining = self._astar_heuristic(
+                    new_x, new_y, end_attacked, bishop_to_goal
+                )
+                if new_remaining == -1:
+                    continue
+                distances[(new_x, new_y)] = distance + 1
+                heapq.heappush(
+                    heap,
+                    (distance + 1 + new_remaining, new_remaining, new_x, new_y),
+                )
+
+        self.num_visited = num_visited
+        self.logger.debug(f"Not found after {num_visited} nodes")
+        return -1
+
+    def _astar_heuristic(
+        self, x: int, y: int, end_attacked: bool, bishop_to_goal: int
+    ) -> int:
+        """
+        Lower bound on the moves left from (x, y), -1 if the end is unreachable.
+        """
+        bounds = []
+        if not end_attacked:
+            to_goal = self.knight_distance(x, y, self.end_x, self.end_y, self.n)
+            if to_goal != -1:
+                bounds.append(to_goal)
+        if bishop_to_goal != -1:
+            to_bishop = self.knight_distance(x, y, self.bishop_x, self.bishop_y, self.n)
+            if to_bishop != -1:
+                bounds.append(to_bishop + bishop_to_goal)
+        return min(bounds) if bounds else -1
+
+    def multi_astar(self) -> int:
+        """
+        Run A* over (square, capture mask) states on a board with several bishops and
+        obstacles, returning the shortest path length.
+
+        Bit i of the capture mask is set once bishop i (the bishop at (bishop_x,
+        bishop_y) is bishop 0, then extra_bishops) is captured. Bishops attack along
+        their diagonals up to and including the first obstacle or bishop, so a bishop
+        guarded by another cannot be captured until its guard is. A bishop blocking
+        another's diagonal is attacked by it, so diagonals never grow when a bishop is
+        captured, and a square is attacked under a mask exactly when one of its
+        attackers before any capture is still alive.
+
+        Bishops guarded, directly or not, by each other can never be captured, so the
+        squares they attack are as good as obstacles. The heuristic is the knight
+        distance to the end around those squares and the obstacles, which only grows
+        when attacked squares are taken away, so it is consistent for every mask.
+        Squares it cannot reach the end from are pruned. Capturing only ever shrinks the
+        attacked squares, so a state is also pruned when its square was already reached
+        no later with a superset of its captures.
+        """
+        self._validate_input()
+        row = [2, 2, -2, -2, 1, 1, -1, -1]
+        col = [1, -1, 1, -1, 2, -2, 2, -2]
+        moves = list(zip(row, col))
+        n = self.n
+        start = self.start_x * n + self.start_y
+        end = self.end_x * n + self.end_y
+        bishop_index = dict()
+        for index, (x, y) in enumerate(self._get_bishops()):
+            bishop_index[x * n + y] = index
+        attackers = self._attackers()
+        permanent = self._permanent_bishops(attackers)
+        # obstacles, bishops that can never be captured and the squares they attack
+        blocked = bytearray(n * n)
+        for x, y in self.obstacles:
+            blocked[x * n + y] = 1
+        for state, index in bishop_index.items():
+            if permanent >> index & 1:
+                blocked[state] = 1
+        for state in range(n * n):
+            if attackers[state] & permanent:
+                blocked[state] = 1
+        if blocked[start] or blocked[end]:
+            self.num_visited = 0
+            return -1
+
+        # knight distances to the end around the blocked squares, -1 if unreachable
+        to_goal = array("i", [-1]) * (n * n)
+        to_goal[end] = 0
+        queue = deque([end])
+        while queue:
+            state = queue.popleft()
+            x, y = divmod(state, n)
+            for dx, dy in moves:
+                new_x, new_y = x + dx, y + dy
+                if 0 <= new_x < n and 0 <= new_y < n:
+                    new_state = new_x * n + new_y
+                    if not blocked[new_state] and to_goal[new_state] == -1:
+                        to_goal[new_state] = to_goal[state] + 1
+                        queue.append(new_state)
+
+        if to_goal[start] == -1:
+            self.num_visited = 0
+            return -1
+        # per square, the (mask, distance) labels it was reached with, none of them
+        # dominating another
+        labels = {start: [(0, 0)]}
+        # tuples of the form (estimate, heuristic, state, mask), ties go to the deeper
+        # node
+        heap = [(to_goal[start], to_goal[start], start, 0)]
+        num_visited = 0
+        while heap:
+            estimate, remaining, state, mask = heapq.heappop(heap)
+            distance = estimate - remaining
+
+            if state == end:
+                self.num_visited = num_visited
+                self.logger.debug(f"Found after {num_visited} nodes")
+                return distance
+
+            # check if we can skip this node
+            if (mask, distance) not in labels[state]:
+                continue
+
+            num_visited += 1
+            x, y = divmod(state, n)
+            for dx, dy in moves:
+                new_x, new_y = x + dx, y + dy
+                if not (0 <= new_x < n and 0 <= new_y < n):
+                    continue
+                new_state = new_x * n + new_y
+                if to_goal[new_state] == -1 or attackers[new_state] & ~mask:
+                    continue
+                new_mask = mask
+                index = bishop_index.get(new_state)
+                if index is not None:
+                    new_mask = mask | 1 << index
+                new_labels = labels.get(new_state)
+                if new_labels is None:
+                    labels[new_state] = [(new_mask, distance + 1)]
+                else:
+                    if any(
+                        old_mask & new_mask == new_mask and old_distance <= distance + 1
+                        for old_mask, old_distance in new_labels
+                    ):
+                        continue
+                    # drop the labels the new one dominates
+                    new_labels[:] = [
+                        (old_mask, old_distance)
+                        for old_mask, old_distance in new_labels
+                        if old_mask & new_mask != old_mask
+                        or old_distance < distance + 1
+                    ]
+                    new_labels.append((new_mask, distance + 1))
+                new_remaining = to_goal[new_state]
+                heapq.heappush(
+                    heap,
+                    (distance + 1 + new_remaining, new_remaining, new_state, new_mask),
+                )
+
+        self.num_visited = num_visited
+        self.logger.debug(f"Not found after {num_visited} nodes")
+        return -1
+
+    def _get_bishops(self) -> list[tuple[int, int]]:
+        """
+        Get every bishop, the bishop at (bishop_x, bishop_y) first.
+        """
+        return [(self.bishop_x, self.bishop_y)] + self.extra_bishops
+
+    def _attackers(self) -> list[int]:
+        """
+        Get the bitmask of the bishops attacking each square before any capture, with the
+        obstacles and the bishops blocking each other's diagonals.
+        """
+        n = self.n
+        bishop_index = dict()
+        for index, (x, y) in enumerate(self._get_bishops()):
+            bishop_index[x * n + y] = index
+        blocked = bytearray(n * n)
+        for x, y in self.obstacles:
+            blocked[x * n + y] = 1
+        attackers = [0] * (n * n)
+        for index, (x, y) in enumerate(self._get_bishops()):
+            for dx, dy in [(1, 1), (1, -1), (-1, 1), (-1, -1)]:
+                for state in self._bishop_ray(x, y, dx, dy, bishop_index, blocked):
+                    attackers[state] |= 1 << index
+        return attackers
+
+    def _permanent_bishops(self, attackers: list[int]) -> int:
+        """
+        Get the bitmask of the bishops that can never be captured, whatever the order.
+
+        Bishops no living bishop attacks are taken away until none is left, the bishops
+        remaining all guard each other.
+        """
+        n = self.n
+        alive = (1 << len(self._get_bishops())) - 1
+        captured = True
+        while captured:
+            captured = False
+            for index, (x, y) in enumerate(self._get_bishops()):
+                if alive >> index & 1 and not attackers[x * n + y] & alive:
+                    alive ^= 1 << index
+                    captured = True
+        return alive
+
+    def _bishop_ray(
+        self,
+        x: int,
+        y: int,
+        dx: int,
+        dy: int,
+        bishop_index: dict[int, int],
+        blocked: bytearray,
+    ) -> list[int]:
+        """
+        Get the states from (x, y) in direction (dx, dy), up to and including the first
+        obstacle or bishop.
+        """
+        n = self.n
+        ray = []
+        x, y = x + dx, y + dy
+        while 0 <= x < n and 0 <= y < n:
+            state = x * n + y
+            ray.append(state)
+            if blocked[state] or state in bishop_index:
+                break
+            x, y = x + dx, y + dy
+        return ray
+
+    def _level_dbfs_steps(self) -> Generator[tuple[int, int], None, int]:
+        """
+        Double ended BFS that expands a whole level at a time, always on the side with
+        the smaller frontier.
+
+        States are labelled when discovered, so after expanding the start side to depth
+        depth_start and the end side to depth depth_end, any path not found yet has at
+        least depth_start + depth_end + 1 moves. The end square's bishop-captured state is
+        covered by the capture candidate, which can be no shorter than
+        depth_start + 1 + the knight distance from the bishop to the end until the bishop
+        is discovered. The search stops once the best path found beats both bounds.
+        """
+        row = [2, 2, -2, -2, 1, 1, -1, -1]
+        col = [1, -1, 1, -1, 2, -2, 2, -2]
+        bishop_to_goal = self.knight_distance(
+            self.bishop_x, self.bishop_y, self.end_x, self.end_y, self.n
+        )
+        bishop_diff = self.bishop_x - self.bishop_y
+        bishop_sum = self.bishop_x + self.bishop_y
+        best = -1
+        visited_start = {(self.start_x, self.start_y): 0}
+        visited_end = dict()
+        frontier_start = [(self.start_x, self.start_y)]
+        frontier_end = []
+        # if the end position is threatened by the bishop we must capture the bishop,
+        # so only the start side searches
+        if not self._is_attacked(self.end_x, self.end_y, self.bishop_x, self.bishop_y):
+            visited_end[(self.end_x, self.end_y)] = 0
+            frontier_end.append((self.end_x, self.end_y))
+            if (self.start_x, self.start_y) in visited_end:
+                best = 0
+        depth_start, depth_end = 0, 0
+        num_visited = 0
+        while frontier_start:
+            # lower bounds on the paths that have not been found yet
+            bounds = []
+            if bishop_to_goal != -1:
+                bounds.append(depth_start + 1 + bishop_to_goal)
+            if visited_end:
+                bounds.append(
+                    depth_start + depth_end + 1 if frontier_end else depth_start + 1
+                )
+            if not bounds or (best != -1 and best <= min(bounds)):
+                break
+
+            if frontier_end and len(frontier_end) < len(frontier_start):
+                next_frontier = []
+                for x, y in frontier_end:
+                    num_visited += 1
+                    yield x, y
+                    for dx, dy in zip(row, col):
+                        new_x, new_y = x + dx, y + dy
+                        # passing the bishop from the end side would mean capturing it,
+                        # so the whole of the bishop's diagonals are skipped
+                        if new_x - new_y == bishop_diff or new_x + new_y == bishop_sum:
+                            continue
+                        if not self._is_valid_position(new_x, new_y, self.n):
+                            continue
+                        if (new_x, new_y) in visited_end:
+                            continue
+                        visited_end[(new_x, new_y)] = depth_end + 1
+                        if (new_x, new_y) in visited_start:
+                            found = depth_end + 1 + visited_start[(new_x, new_y)]
+                            best = found if best == -1 else min(best, found)
+                        next_frontier.append((new_x, new_y))
+                frontier_end = next_frontier
+                depth_end += 1
+                continue
+
+            next_frontier = []
+            for x, y in frontier_start:
+                num_visited += 1
+                yield x, y
+                for dx, dy in zip(row, col):
+                    new_x, new_y = x + dx, y + dy
+                    if not self._is_valid_position(new_x, new_y, self.n):
+                        continue
+                    # on the bishop's diagonals, only the bishop square itself is safe
+                    if new_x - new_y == bishop_diff or new_x + new_y == bishop_sum:
+                        if new_x == self.bishop_x and bishop_to_goal != -1:
+                            found = depth_start + 1 + bishop_to_goal
+                            best = found if best == -1 else min(best, found)
+                        continue
+                    if (new_x, new_y) in visited_start:
+                        continue
+                    visited_start[(new_x, new_y)] = depth_start + 1
+                    if (new_x, new_y) in visited_end:
+                        found = depth_start + 1 + visited_end[(new_x, new_y)]
+                        best = found if best == -1 else min(best, found)
+                    next_frontier.append((new_x, new_y))
+            frontier_start = next_frontier
+            depth_start += 1
+
+        self.num_visited = num_visited
+        self.logger.debug(f"Searched {num_visited} nodes")
+        return best
+
+    def _marked_dbfs_steps(self) -> Generator[tuple[int, int], None, int]:
+        """
+        Double ended BFS alternating single nodes like dbfs, but labelling states when
+        they are pushed rather than popped, so each state is queued at most once per side
+        and the searches meet when one side pushes a state labelled by the other.
+
+        Once the next pops are at depth_start and depth_end, every state that close to
+        either side is labelled, so any path the sides have not met on has at least
+        depth_start + depth_end + 1 moves. The search stops once the best path found
+        beats that and the bound on a capture, as in _level_dbfs_steps.
+        """
+        row = [2, 2, -2, -2, 1, 1, -1, -1]
+        col = [1, -1, 1, -1, 2, -2, 2, -2]
+        bishop_to_goal = self.knight_distance(
+            self.bishop_x, self.bishop_y, self.end_x, self.end_y, self.n
+        )
+        bishop_diff = self.bishop_x - self.bishop_y
+        bishop_sum = self.bishop_x + self.bishop_y
+        best = -1
+        # whether the earliest capture has been found
+        captured = False
+        visited_start = {(self.start_x, self.start_y): 0}
+        visited_end = dict()
+        queue_start = deque()
+        queue_end = deque()
+        queue_start.append((self.start_x, self.start_y, 0))
+        # if the end position is threatened by the bishop we must capture the bishop,
+        # so only the start side searches
+        if not self._is_attacked(self.end_x, self.end_y, self.bishop_x, self.bishop_y):
+            visited_end[(self.end_x, self.end_y)] = 0
+            queue_end.append((self.end_x, self.end_y, 0))
+            if (self.start_x, self.start_y) in visited_end:
+                best = 0
+        num_visited = 0
+        metrics = self.metrics
+        while queue_start:
+            # lower bounds on the paths that have not been found yet
+            depth_start = queue_start[0][2]
+            bounds = []
+            if bishop_to_goal != -1 and not captured:
+                bounds.append(depth_start + 1 + bishop_to_goal)
+            if visited_end:
+                bounds.append(
+                    depth_start + queue_end[0][2] + 1 if queue_end else depth_start + 1
+                )
+            if not bounds or (best != -1 and best <= min(bounds)):
+                break
+
+            x, y, distance = queue_start.popleft()
+            if metrics is not None:
+                metrics.pop(len(queue_start) + len(queue_end) + 1, distance)
+            num_visited += 1
+            yield x, y
+
+            for dx, dy in zip(row, col):
+                new_x, new_y = x + dx, y + dy
+                if not self._is_valid_position(new_x, new_y, self.n):
+                    continue
+                # on the bishop's diagonals, only the bishop square itself is safe
+                if new_x - new_y == bishop_diff or new_x + new_y == bishop_sum:
+                    # the first capture found is the earliest one
+                    if new_x == self.bishop_x and not captured and bishop_to_goal != -1:
+                        captured = True
+                        found = distance + 1 + bishop_to_goal
+                        best = found if best == -1 else min(best, found)
+                    continue
+                if (new_x, new_y) in visited_start:
+                    continue
+                visited_start[(new_x, new_y)] = distance + 1
+                if (new_x, new_y) in visited_end:
+                    found = distance + 1 + visited_end[(new_x, new_y)]
+                    if best == -1 or found < best:
+                        best = found
+                        if metrics is not None:
+                            metrics.meeting_depth = (distance + 1, found - distance - 1)
+                queue_start.append((new_x, new_y, distance + 1))
+
+            if not queue_end:
+                continue
+
+            x, y, distance = queue_end.popleft()
+            if metrics is not None:
+                metrics.pop(len(queue_start) + len(queue_end) + 1)
+            num_visited += 1
+            yield x, y
+
+            for dx, dy in zip(row, col):
+                new_x, new_y = x + dx, y + dy
+                # passing the bishop from the end side would mean capturing it, so the
+                # whole of the bishop's diagonals are skipped
+                if new_x - new_y == bishop_diff or new_x + new_y == bishop_sum:
+                    continue
+                if not self._is_valid_position(new_x, new_y, self.n):
+                    continue
+                if (new_x, new_y) in visited_end:
+                    continue
+                visited_end[(new_x, new_y)] = distance + 1
+                if (new_x, new_y) in visited_start:
+                    found = distance + 1 + visited_start[(new_x, new_y)]
+                    if best == -1 or found < best:
+                        best = found
+                        if metrics is not None:
+                            metrics.meeting_depth = (found - distance - 1, distance + 1)
+                queue_end.append((new_x, new_y, distance + 1))
+
+        self.num_visited = num_visited
+        self.logger.debug(f"Searched {num_visited} nodes")
+        return best
+
+    def _run_steps(self, steps: Generator[tuple[int, int], None, int]) -> int:
+        """
+        Drain a step generator at full speed, returning the search result.
+        """
+        result = -1
+
+        def run():
+            nonlocal result
+            result = yield from steps
+
+        # a zero length deque consumes the steps without a Python level loop
+        deque(run(), maxlen=0)
+        return result
+
+    def _array_bfs(
+        self, parents: array | None = None, mark_on_push: bool = False
+    ) -> int:
+        """
+        BFS over flat integer states x * n + y, the same search as bfs without the
+        per-node tuples, sets and dicts.
+
+        Visited states are a preallocated bytearray and the frontier is an int ring
+        buffer, where each BFS level is tracked by counting entries instead of storing
+        a distance per entry. If given, parents (an int array of -1s indexed by state)
+        gets the predecessor of every state on its first push, including the bishop.
+        With mark_on_push, states are marked visited when pushed so each is queued once.
+        """
+        row = [2, 2, -2, -2, 1, 1, -1, -1]
+        col = [1, -1, 1, -1, 2, -2, 2, -2]
+        moves = list(zip(row, col))
+        n = self.n
+        end = self.end_x * n + self.end_y
+        bishop = self.bishop_x * n + self.bishop_y
+        bishop_to_goal = self.knight_distance(
+            self.bishop_x, self.bishop_y, self.end_x, self.end_y, n
+        )
+        through_bishop = -1
+        attacked = self._get_attacked_squares()
+        visited = bytearray(n * n)
+
+        queue = array("i", [0]) * 1024
+        mask = len(queue) - 1
+        queue[0] = self.start_x * n + self.start_y
+        if mark_on_push:
+            visited[queue[0]] = 1
+        head, tail, used = 0, 1, 1
+        distance, level_remaining, next_level = 0, 1, 0
+        num_visited = 0
+        metrics = self.metrics
+        while used:
+            if level_remaining == 0:
+                distance += 1
+                level_remaining, next_level = next_level, 0
+
+            state = queue[head]
+            if metrics is not None:
+                metrics.pop(used, distance)
+            head = (head + 1) & mask
+            used -= 1
+            level_remaining -= 1
+
+            # no remaining path can beat capturing the bishop
+            if through_bishop != -1 and distance >= through_bishop:
+                self.num_visited = num_visited
+                self.logger.debug(f"Found after {num_visited} nodes")
+                return through_bishop
+
+            if state == end:
+                self.num_visited = num_visited
+                self.logger.debug(f"Found after {num_visited} nodes")
+                return distance
+
+            if not mark_on_push:
+                if visited[state]:
+                    if metrics is not None:
+                        metrics.duplicate_pops += 1
+                    continue
+                visited[state] = 1
+            num_visited += 1
+
+            # every state pushes at most 8 neighbors
+            if used + 8 > len(queue):
+                queue = self._grow_ring_buffer(queue, head)
+                mask = len(queue) - 1
+                head, tail = 0, used
+
+            x, y = divmod(state, n)
+            for dx, dy in moves:
+                new_x, new_y = x + dx, y + dy
+                if 0 <= new_x < n and 0 <= new_y < n:
+                    new_state = new_x * n + new_y
+                    if attacked[new_state] or visited[new_state]:
+                        continue
+                    if new_state == bishop:
+                        # the first capture found is the earliest one
+                        if through_bishop == -1 and bishop_to_goal != -1:
+                            through_bishop = distance + 1 + bishop_to_goal
+                            if parents is not None:
+                                parents[bishop] = state
+                    else:
+                        if mark_on_push:
+                            visited[new_state] = 1
+                        queue[tail] = new_state
+                        tail = (tail + 1) & mask
+                        used += 1
+                        next_level += 1
+                        if parents is not None and parents[new_state] == -1:
+                            parents[new_state] = state
+
+        self.num_visited = num_visited
+        self.logger.debug(f"Not found after {num_visited} nodes")
+        return through_bishop
+
+    def _array_dbfs(
+        self,
+        parents_start: array | None = None,
+        parents_end: array | None = None,
+    ) -> int:
+        """
+        Double ended BFS over flat integer states x * n + y, the same search as dbfs
+        without the per-node tuples, sets and dicts.
+
+        Distances from each side are preallocated int arrays (-1 if not visited) and each
+        frontier is an int ring buffer with its BFS level tracked by counting entries.
+        If given, parents_start and parents_end get the predecessor of every state from
+        each side, and the state where the best meeting happened is kept in
+        meeting_state.
+        """
+        row = [2, 2, -2, -2, 1, 1, -1, -1]
+        col = [1, -1, 1, -1, 2, -2, 2, -2]
+        moves = list(zip(row, col))
+        n = self.n
+        end = self.end_x * n + self.end_y
+        bishop = self.bishop_x * n + self.bishop_y
+        bishop_to_goal = self.knight_distance(
+            self.bishop_x, self.bishop_y, self.end_x, self.end_y, n
+        )
+        # shortest path through the bishop, and shortest path where the searches met
+        through_bishop = -1
+        meeting = -1
+        self.meeting_state = -1
+        attacked = self._get_attacked_squares()
+        visited_start = array("i", [-1]) * (n * n)
+        visited_end = array("i", [-1]) * (n * n)
+
+        queue_start = array("i", [0]) * 1024
+        mask_start = len(queue_start) - 1
+        queue_start[0] = self.start_x * n + self.start_y
+        head_start, tail_start, used_start = 0, 1, 1
+        distance_start, remaining_start, next_start = 0, 1, 0
+
+        queue_end = array("i", [0]) * 1024
+        mask_end = len(queue_end) - 1
+        head_end, tail_end, used_end = 0, 0, 0
+        distance_end, remaining_end, next_end = 0, 0, 0
+        # if the end position is threatened by the bishop we must capture the bishop,
+        # so only the start side searches
+        if not attacked[end]:
+            queue_end[0] = end
+            tail_end, used_end, remaining_end = 1, 1, 1
+
+        num_visited = 0
+        metrics = self.metrics
+        while used_start:
+            if remaining_start == 0:
+                distance_start += 1
+                remaining_start, next_start = next_start, 0
+            if used_end and remaining_end == 0:
+                distance_end += 1
+                remaining_end, next_end = next_end, 0
+
+            # stop once neither a meeting nor a capture can beat the best path so far
+            if meeting != -1 or through_bishop != -1:
+                best = min(d for d in (meeting, through_bishop) if d != -1)
+                lowest_distance = (
+                    min(distance_start, distance_end) if used_end else distance_start
+                )
+                if (meeting != -1 or lowest_distance >= best) and (
+                    through_bishop != -1
+                    or bishop_to_goal == -1
+                    or distance_start + 1 + bishop_to_goal >= best
+                ):
+                    self.num_visited = num_visited
+                    self.logger.debug(f"Found after {num_visited} nodes")
+                    return best
+
+            state = queue_start[head_start]
+            if metrics is not None:
+                metrics.pop(used_start + used_end, distance_start)
+            head_start = (head_start + 1) & mask_start
+            used_start -= 1
+            remaining_start -= 1
+
+            if visited_start[state] != -1:
+                if metrics is not None:
+                    metrics.duplicate_pops += 1
+                continue
+
+            # keep expanding after meeting, the capture may still be shorter
+            if state == end or visited_end[state] != -1:
+                found = distance_start + max(visited_end[state], 0)
+                if meeting == -1 or found < meeting:
+                    meeting, self.meeting_state = found, state
+                    if metrics is not None:
+                        metrics.meeting_depth = (distance_start, found - distance_start)
+
+            visited_start[state] = distance_start
+            num_visited += 1
+
+            # every state pushes at most 8 neighbors
+            if used_start + 8 > len(queue_start):
+                queue_start = self._grow_ring_buffer(queue_start, head_start)
+                mask_start = len(queue_start) - 1
+                head_start, tail_start = 0, used_start
+
+            x, y = divmod(state, n)
+            for dx, dy in moves:
+                new_x, new_y = x + dx, y + dy
+                if 0 <= new_x < n and 0 <= new_y < n:
+                    new_state = new_x * n + new_y
+                    if attacked[new_state] or visited_start[new_state] != -1:
+                        continue
+                    if new_state == bishop:
+                        # the first capture found is the earliest one
+                        if through_bishop == -1 and bishop_to_goal != -1:
+                            through_bishop = distance_start + 1 + bishop_to_goal
+                            if parents_start is not None:
+                                parents_start[bishop] = state
+                    else:
+                        queue_start[tail_start] = new_state
+                        tail_start = (tail_start + 1) & mask_start
+                        used_start += 1
+                        next_start += 1
+                        if parents_start is not None and parents_start[new_state] == -1:
+                            parents_start[new_state] = state
+
+            if not used_end:
+                continue
+
+            state = queue_end[head_end]
+            if metrics is not None:
+                metrics.pop(used_start + used_end)
+            head_end = (head_end + 1) & mask_end
+            used_end -= 1
+            remaining_end -= 1
+
+            if visited_end[state] != -1:
+                if metrics is not None:
+                    metrics.duplicate_pops += 1
+                continue
+
+            if visited_start[state] != -1:
+                found = distance_end + visited_start[state]
+                if meeting == -1 or found < meeting:
+                    meeting, self.meeting_state = found, state
+                    if metrics is not None:
+                        metrics.meeting_depth = (visited_start[state], distance_end)
+
+            visited_end[state] = distance_end
+            num_visited += 1
+
+            if used_end + 8 > len(queue_end):
+                queue_end = self._grow_ring_buffer(queue_end, head_end)
+                mask_end = len(queue_end) - 1
+                head_end, tail_end = 0, used_end
+
+            x, y = divmod(state, n)
+            for dx, dy in moves:
+                new_x, new_y = x + dx, y + dy
+                if 0 <= new_x < n and 0 <= new_y < n:
+                    new_state = new_x * n + new_y
+                    # passing the bishop from the end side would mean capturing it
+                    if (
+                        attacked[new_state]
+                        or visited_end[new_state] != -1
+                        or new_state == bishop
+                    ):
+                        continue
+                    queue_end[tail_end] = new_state
+                    tail_end = (tail_end + 1) & mask_end
+                    used_end += 1
+                    next_end += 1
+                    if parents_end is not None and parents_end[new_state] == -1:
+                        parents_end[new_state] = state
+
+        self.num_visited = num_visited
+        self.logger.debug(f"Not found after {num_visited} nodes")
+        return meeting if meeting != -1 else through_bishop
+
+    def _array_marked_dbfs(self) -> int:
+        """
+        The search of _marked_dbfs_steps over flat integer states x * n + y, with the labels
+        of each side in preallocated int arrays (-1 if not labelled) and each frontier in
+        an int ring buffer. Since every state is pushed once per side, the buffers never
+        hold more than n * n states and need no growing.
+        """
+        row = [2, 2, -2, -2, 1, 1, -1, -1]
+        col = [1, -1, 1, -1, 2, -2, 2, -2]
+        moves = list(zip(row, col))
+        n = self.n
+        end = self.end_x * n + self.end_y
+        bishop = self.bishop_x * n + self.bishop_y
+        bishop_to_goal = self.knight_distance(
+            self.bishop_x, self.bishop_y, self.end_x, self.end_y, n
+        )
+        best = -1
+        # whether the earliest capture has been found
+        captured = False
+        attacked = self._get_attacked_squares()
+        visited_start = array("i", [-1]) * (n * n)
+        visited_end = array("i", [-1]) * (n * n)
+
+        start = self.start_x * n + self.start_y
+        queue_start = array("i", [0]) * (n * n)
+        queue_start[0] = start
+        visited_start[start] = 0
+        head_start, tail_start = 0, 1
+
+        queue_end = array("i", [0]) * (n * n)
+        head_end, tail_end = 0, 0
+        # if the end position is threatened by the bishop we must capture the bishop,
+        # so only the start side searches
+        if not attacked[end]:
+            queue_end[0] = end
+            visited_end[end] = 0
+            tail_end = 1
+            if start == end:
+                best = 0
+
+        num_visited = 0
+        metrics = self.metrics
+        while head_start < tail_start:
+            # lower bounds on the paths that have not been found yet
+            depth_start = visited_start[queue_start[head_start]]
+            bounds = []
+            if bishop_to_goal != -1 and not captured:
+                bounds.append(depth_start + 1 + bishop_to_goal)
+            if tail_end:
+                if head_end < tail_end:
+                    depth_end = visited_end[queue_end[head_end]]
+                    bounds.append(depth_start + depth_end + 1)
+                else:
+                    bounds.append(depth_start + 1)
+            if not bounds or (best != -1 and best <= min(bounds)):
+                break
+
+            state = queue_start[head_start]
+            head_start += 1
+            if metrics is not None:
+                metrics.pop(
+                    tail_start - head_start + tail_end - head_end + 1, depth_start
+                )
+            num_visited += 1
+
+            distance = depth_start + 1
+            x, y = divmod(state, n)
+            for dx, dy in moves:
+                new_x, new_y = x + dx, y + dy
+                if 0 <= new_x < n and 0 <= new_y < n:
+                    new_state = new_x * n + new_y
+                    if attacked[new_state] or visited_start[new_state] != -1:
+                        continue
+                    if new_state == bishop:
+                        # the first capture found is the earliest one
+                        if not captured and bishop_to_goal != -1:
+                            captured = True
+                            found = distance + bishop_to_goal
+                            best = found if best == -1 else min(best, found)
+                        continue
+                    visited_start[new_state] = distance
+                    if visited_end[new_state] != -1:
+                        found = distance + visited_end[new_state]
+                        if best == -1 or found < best:
+                            best = found
+                            if metrics is not None:
+                                metrics.meeting_depth = (distance, found - distance)
+                    queue_start[tail_start] = new_state
+                    tail_start += 1
+
+            if head_end == tail_end:
+                continue
+
+            state = queue_end[head_end]
+            head_end += 1
+            if metrics is not None:
+                metrics.pop(tail_start - head_start + tail_end - head_end + 1)
+            num_visited += 1
+
+            distance = visited_end[state] + 1
+            x, y = divmod(state, n)
+            for dx, dy in moves:
+                new_x, new_y = x + dx, y + dy
+                if 0 <= new_x < n and 0 <= new_y < n:
+                    new_state = new_x * n + new_y
+                    # passing the bishop from the end side would mean capturing it
+                    if (
+                        attacked[new_state]
+                        or visited_end[new_state] != -1
+                        or new_state == bishop
+                    ):
+                        continue
+                    visited_end[new_state] = distance
+                    if visited_start[new_state] != -1:
+                        found = distance + visited_start[new_state]
+                        if best == -1 or found < best:
+                            best = found
+                            if metrics is not None:
+                                metrics.meeting_depth = (found - distance, distance)
+                    queue_end[tail_end] = new_state
+                    tail_end += 1
+
+        self.num_visited = num_visited
+        self.logger.debug(f"Searched {num_visited} nodes")
+        return best
+
+    def _numpy_bfs(self) -> int:
+        """
+        BFS expanding a whole level at a time, with the frontier as a boolean mask.
+
+        Each level shifts the frontier by all 8 knight moves at once, then masks out
+        attacked and visited squares. Only the window around the frontier that the next
+        level can reach is touched.
+        """
+        # numpy is an optional dependency, only needed for this engine
+        import numpy as np
+
+        row = [2, 2, -2, -2, 1, 1, -1, -1]
+        col = [1, -1, 1, -1, 2, -2, 2, -2]
+        moves = list(zip(row, col))
+        n = self.n
+        bishop_to_goal = self.knight_distance(
+            self.bishop_x, self.bishop_y, self.end_x, self.end_y, n
+        )
+        through_bishop = -1
+        safe = (
+            np.frombuffer(self._get_attacked_squares(), dtype=np.uint8).reshape(n, n)
+            == 0
+        )
+        visited = np.zeros((n, n), dtype=bool)
+        visited[self.start_x, self.start_y] = True
+
+        # the frontier is stored cropped to its bounding box [top, bottom) x [left, right)
+        frontier = np.ones((1, 1), dtype=bool)
+        top, bottom = self.start_x, self.start_x + 1
+        left, right = self.start_y, self.start_y + 1
+        distance = 0
+        num_visited = 1
+        if (self.start_x, self.start_y) == (self.end_x, self.end_y):
+            self.num_visited = num_visited
+            return 0
+
+        while frontier.size:
+            # no remaining path can beat capturing the bishop
+            if through_bishop != -1 and distance + 1 >= through_bishop:
+                self.num_visited = num_visited
+                self.logger.debug(f"Found after {num_visited} nodes")
+                return through_bishop
+
+            window_top, window_bottom = max(top - 2, 0), min(bottom + 2, n)
+            window_left, window_right = max(left - 2, 0), min(right + 2, n)
+            height, width = window_bottom - window_top, window_right - window_left
+            current = np.zeros((height, width), dtype=bool)
+            current[
+                top - window_top : bottom - window_top,
+                left - window_left : right - window_left,
+            ] = frontier
+
+            reached = np.zeros((height, width), dtype=bool)
+            for dx, dy in moves:
+                reached[
+                    max(dx, 0) : height + min(dx, 0), max(dy, 0) : width + min(dy, 0)
+                ] |= current[
+                    max(-dx, 0) : height - max(dx, 0), max(-dy, 0) : width - max(dy, 0)
+                ]
+            window = (
+                slice(window_top, window_bottom),
+                slice(window_left, window_right),
+            )
+            reached &= safe[window]
+            reached &= ~visited[window]
+            distance += 1
+
+            end_x, end_y = self.end_x - window_top, self.end_y - window_left
+            if 0 <= end_x < height and 0 <= end_y < width and reached[end_x, end_y]:
+                self.num_visited = num_visited
+                self.logger.debug(f"Found after {num_visited} nodes")
+                return distance
+
+            bishop_x, bishop_y = self.bishop_x - window_top, self.bishop_y - window_left
+            if (
+                0 <= bishop_x < height
+                and 0 <= bishop_y < width
+                and reached[bishop_x, bishop_y]
+            ):
+                # the first capture found is the earliest one
+                if through_bishop == -1 and bishop_to_goal != -1:
+                    through_bishop = distance + bishop_to_goal
+                reached[bishop_x, bishop_y] = False
+
+            visited[window] |= reached
+            num_visited += int(np.count_nonzero(reached))
+
+            rows = np.flatnonzero(reached.any(axis=1))
+            if rows.size == 0:
+                break
+            cols = np.flatnonzero(reached.any(axis=0))
+            frontier = reached[rows[0] : rows[-1] + 1, cols[0] : cols[-1] + 1]
+            top, bottom = window_top + rows[0], window_top + rows[-1] + 1
+            left, right = window_left + cols[0], window_left + cols[-1] + 1
+
+        self.num_visited = num_visited
+        self.logger.debug(f"Not found after {num_visited} nodes")
+        return through_bishop
+
+    def _bitset_bfs(self) -> int:
+        """
+        BFS expanding a whole level at a time, with the board as a Python int bitset.
+
+        Each level ORs the frontier shifted by all 8 knight moves, then masks out
+        attacked and visited squares. The capture is handled as in the numpy engine.
+        """
+        n = self.n
+        width, safe, shifts = self._bitset_board()
+        start = 1 << (self.start_x * width + self.start_y)
+        end = 1 << (self.end_x * width + self.end_y)
+        bishop = 1 << (self.bishop_x * width + self.bishop_y)
+        bishop_to_goal = self.knight_distance(
+            self.bishop_x, self.bishop_y, self.end_x, self.end_y, n
+        )
+        through_bishop = -1
+        frontier = start
+        unvisited = safe & ~start
+        distance = 0
+        num_visited = 1
+        if start == end:
+            self.num_visited = num_visited
+            return 0
+
+        while frontier:
+            # no remaining path can beat capturing the bishop
+            if through_bishop != -1 and distance + 1 >= through_bishop:
+                self.num_visited = num_visited
+                self.logger.debug(f"Found after {num_visited} nodes")
+                return through_bishop
+
+            reached = 0
+            for shift in shifts:
+                if shift > 0:
+                    reached |= frontier << shift
+                else:
+                    reached |= frontier >> -shift
+            reached &= unvisited
+            distance += 1
+
+            if reached & end:
+                self.num_visited = num_visited
+                self.logger.debug(f"Found after {num_visited} nodes")
+                return distance
+
+            if reached & bishop:
+                # the bishop's square is only ever reached once
+                if bishop_to_goal != -1:
+                    through_bishop = distance + bishop_to_goal
+                reached ^= bishop
+                unvisited ^= bishop
+
+            unvisited ^= reached
+            num_visited += reached.bit_count()
+            frontier = reached
+
+        self.num_visited = num_visited
+        self.logger.debug(f"Not found after {num_visited} nodes")
+        return through_bishop
+
+    def _bitset_dbfs(self) -> int:
+        """
+        Double ended BFS over Python int bitsets, expanding a whole level at a time on
+        the side with the smaller frontier.
+
+        The backward side never enters the bishop's square, so the sides meet on paths
+        that keep the bishop alive, and the first levels to meet give the shortest of
+        those. The forward side then goes on only as long as capturing the bishop could
+        still give a shorter path.
+        """
+        n = self.n
+        width, safe, shifts = self._bitset_board()
+        start = 1 << (self.start_x * width + self.start_y)
+        end = 1 << (self.end_x * width + self.end_y)
+        bishop = 1 << (self.bishop_x * width + self.bishop_y)
+        if start == end:
+            self.num_visited = 1
+            return 0
+        if not safe & end:
+            # only capturing the bishop reaches an attacked end
+            return self._bitset_bfs()
+        bishop_to_goal = self.knight_distance(
+            self.bishop_x, self.bishop_y, self.end_x, self.end_y, n
+        )
+        through_bishop = -1
+        meeting = -1
+
+        def expand(frontier: int, unvisited: int) -> int:
+            reached = 0
+            for shift in shifts:
+                if shift > 0:
+                    reached |= frontier << shift
+                else:
+                    reached |= frontier >> -shift
+            return reached & unvisited
+
+        frontier_start, frontier_end = start, end
+        visited_start, visited_end = start, end
+        unvisited_start = safe & ~start
+        unvisited_end = safe & ~end & ~bishop
+        distance_start = distance_end = 0
+        num_visited = 2
+        while frontier_start and frontier_end:
+            # no path keeping the bishop alive is shorter than the levels searched
+            if (
+                through_bishop != -1
+                and distance_start + distance_end + 1 >= through_bishop
+            ):
+                self.num_visited = num_visited
+                self.logger.debug(f"Found after {num_visited} nodes")
+                return through_bishop
+
+            if frontier_start.bit_count() <= frontier_end.bit_count():
+                reached = expand(frontier_start, unvisited_start)
+                distance_start += 1
+                if reached & bishop:
+                    if bishop_to_goal != -1:
+                        through_bishop = distance_start + bishop_to_goal
+                    reached ^= bishop
+                    unvisited_start ^= bishop
+                num_visited += reached.bit_count()
+                unvisited_start ^= reached
+                frontier_start = reached
+                visited_start |= reached
+                if reached & visited_end:
+                    meeting = distance_start + distance_end
+                    break
+            else:
+                reached = expand(frontier_end, unvisited_end)
+                distance_end += 1
+                num_visited += reached.bit_count()
+                unvisited_end ^= reached
+                frontier_end = reached
+                visited_end |= reached
+                if reached & visited_start:
+                    meeting = distance_start + distance_end
+                    break
+
+        # capturing the bishop may still be shorter, if the bishop is close enough
+        while (
+            through_bishop == -1
+            and bishop_to_goal != -1
+            and frontier_start
+            and (meeting == -1 or distance_start + 1 + bishop_to_goal < meeting)
+        ):
+            reached = expand(frontier_start, unvisited_start)
+            distance_start += 1
+            if reached & bishop:
+                through_bishop = distance_start + bishop_to_goal
+                reached ^= bishop
+            num_visited += reached.bit_count()
+            unvisited_start ^= reached
+            frontier_start = reached
+
+        self.num_visited = num_visited
+        self.logger.debug(f"Searched {num_visited} nodes")
+        if through_bishop == -1:
+            return meeting
+        if meeting == -1:
+            return through_bishop
+        return min(meeting, through_bishop)
+
+    def _bitset_board(self) -> tuple[int, int, list[int]]:
+        """
+        Get the row width, the mask of squares the bishop does not attack and the shift
+        of every knight move for the bitset engines.
+
+        Square (x, y) is bit x * (n + 2) + y. The 2 padding bits at the end of each row
+        are never set, so a move off either side of the board lands in the padding and
+        is masked out along with the attacked squares, and a move off the top or bottom
+        is shifted out or masked out past the last row.
+        """
+        row = [2, 2, -2, -2, 1, 1, -1, -1]
+        col = [1, -1, 1, -1, 2, -2, 2, -2]
+        n = self.n
+        width = n + 2
+        # every row of the board, by summing the geometric series of row offsets
+        board = ((1 << n) - 1) * (((1 << (width * n)) - 1) // ((1 << width) - 1))
+        attacked = bytearray((width * n + 7) // 8)
+        for x, y in self._diagonal_squares(self.bishop_x, self.bishop_y, n):
+            if x != self.bishop_x:
+                bit = x * width + y
+                attacked[bit >> 3] |= 1 << (bit & 7)
+        safe = board & ~int.from_bytes(attacked, "little")
+        shifts = [dx * width + dy for dx, dy in zip(row, col)]
+        return width, safe, shifts
+
+    def _grow_ring_buffer(self, queue: array, head: int) -> array:
+        """
+        Double the capacity of a ring buffer, unrolling it so that it starts at index 0.
+        """
+        return queue[head:] + queue[:head] + array(queue.typecode, [0]) * len(queue)
+
+    def _get_attacked_squares(self) -> bytearray:
+        """
+        Get the squares attacked by the bishop as a flat bytearray indexed by x * n + y,
+        walking the bishop's two diagonals.
+        """
+        n = self.n
+        attacked = bytearray(n * n)
+        for x in range(n):
+            if x == self.bishop_x:
+                continue
+            for y in (
+                x - self.bishop_x + self.bishop_y,
+                self.bishop_x + self.bishop_y - x,
+            ):
+                if 0 <= y < n:
+                    attacked[x * n + y] = 1
+        return attacked
+
+    def shortest_path(self, algorithm: str = "bfs") -> list[tuple[int, int]]:
+        """
+        Get the squares on a shortest path from start to end, including the bishop's
+        square if it is captured along the way. Empty if there is no path.
+
+        Runs the array engine of bfs or dbfs with predecessor arrays, the part of the
+        path after capturing the bishop is walked with the closed form knight distance.
+        """
+        self._check_single_bishop()
+        n = self.n
+        end = self.end_x * n + self.end_y
+        bishop = self.bishop_x * n + self.bishop_y
+        parents_start = array("i", [-1]) * (n * n)
+        if algorithm == "bfs":
+            length = self._array_bfs(parents_start)
+            parents_end = None
+            meeting_state = end
+        elif algorithm == "dbfs":
+            parents_end = array("i", [-1]) * (n * n)
+            length = self._array_dbfs(parents_start, parents_end)
+            meeting_state = self.meeting_state
+        else:
+            raise ValueError(f"Unknown algorithm: {algorithm}")
+        if length == -1:
+            return []
+
+        if meeting_state != -1:
+            path = self._parent_chain(parents_start, meeting_state)
+            if parents_end is not None:
+                path += self._parent_chain(parents_end, meeting_state)[-2::-1]
+            if path[0] == (self.start_x, self.start_y) and len(path) == length + 1:
+                return path
+
+        # otherwise the shortest path captures the bishop
+        return self._parent_chain(parents_start, bishop) + self._knight_path(
+            self.bishop_x, self.bishop_y, self.end_x, self.end_y
+        )
+
+    def field_path(self, field: array, length: int) -> list[tuple[int, int]]:
+        """
+        Get the squares on a shortest path of the given length, like shortest_path, from
+        the bishop alive distance field from the start instead of searching again.
+        """
+        if length == -1:
+            return []
+        row = [2, 2, -2, -2, 1, 1, -1, -1]
+        col = [1, -1, 1, -1, 2, -2, 2, -2]
+        n = self.n
+        if field[self.end_x * n + self.end_y] == length:
+            x, y, tail = self.end_x, self.end_y, []
+        else:
+            # otherwise the shortest path captures the bishop
+            x, y = self.bishop_x, self.bishop_y
+            tail = self._knight_path(
+                self.bishop_x, self.bishop_y, self.end_x, self.end_y
+            )
+        # walk back to the start through squares one move closer to it
+        path = [(x, y)]
+        distance = field[x * n + y]
+        while distance > 0:
+            for dx, dy in zip(row, col):
+                new_x, new_y = x + dx, y + dy
+                if not self._is_valid_position(new_x, new_y, n):
+                    continue
+                if field[new_x * n + new_y] == distance - 1:
+                    break
+            x, y, distance = new_x, new_y, distance - 1
+            path.append((x, y))
+        path.reverse()
+        return path + tail
+
+    def _parent_chain(self, parents: array, state: int) -> list[tuple[int, int]]:
+        """
+        Follow predecessors back from a state, returning the squares from the root of
+        the search to the state.
+        """
+        chain = []
+        while state != -1:
+            chain.append(divmod(state, self.n))
+            state = parents[state]
+        chain.reverse()
+        return chain
+
+    def _knight_path(self, x1: int, y1: int, x2: int, y2: int) -> list[tuple[int, int]]:
+        """
+        Get the squares after (x1, y1) on a shortest knight path to (x2, y2) on the empty
+        board, stepping to any neighbor one move closer by the closed form distance.
+        """
+        row = [2, 2, -2, -2, 1, 1, -1, -1]
+        col = [1, -1, 1, -1, 2, -2, 2, -2]
+        path = []
+        x, y = x1, y1
+        distance = self.knight_distance(x, y, x2, y2, self.n)
+        while distance > 0:
+            for dx, dy in zip(row, col):
+                new_x, new_y = x + dx, y + dy
+                if not self._is_valid_position(new_x, new_y, self.n):
+                    continue
+                if self.knight_distance(new_x, new_y, x2, y2, self.n) == distance - 1:
+                    break
+            x, y, distance = new_x, new_y, distance - 1
+            path.append((x, y))
+        return path
+
+    def _is_valid_position(self, x: int, y: int, n: int) -> bool:
+        """
+        Check if position is valid.
+        """
+        return 0 <= x < n and 0 <= y < n
+
+    def knight_distance(self, x1: int, y1: int, x2: int, y2: int, n: int) -> int:
+        """
+        Closed form knight distance between two squares on an empty n x n board (-1 if
+        unreachable).
+
+        Uses the infinite board formula, with the corner correction that is the only
+        exception once n >= 5. Smaller boards fall back to a BFS. If a distance table is
+        loaded for this board size, it is a lookup instead.
+        """
+        if self.distance_table is not None and self.distance_table.n == n:
+            return self.distance_table.distance(x1, y1, x2, y2)
+        if n < 5:
+            row = [2, 2, -2, -2, 1, 1, -1, -1]
+            col = [1, -1, 1, -1, 2, -2, 2, -2]
+            visited = {(x1, y1)}
+            # tuples of the form (x, y, distance)
+            queue = deque()
+            queue.append((x1, y1, 0))
+            while queue:
+                x, y, distance = queue.popleft()
+                if (x, y) == (x2, y2):
+                    return distance
+                for dx, dy in zip(row, col):
+                    new_x, new_y = x + dx, y + dy
+                    if (
+                        self._is_valid_position(new_x, new_y, n)
+                        and (new_x, new_y) not in visited
+                    ):
+                        visited.add((new_x, new_y))
+                        queue.append((new_x, new_y, distance + 1))
+            return -1
+
+        dx, dy = abs(x1 - x2), abs(y1 - y2)
+        if dx < dy:
+            dx, dy = dy, dx
+        if dx == 1 and dy == 1:
+            # a corner square can only leave the corner away from its diagonal neighbor
+            if (x1 in (0, n - 1) and y1 in (0, n - 1)) or (
+                x2 in (0, n - 1) and y2 in (0, n - 1)
+            ):
+                return 4
+        return _offset_knight_distance(dx, dy)
+
+    def _is_attacked(self, x: int, y: int, bishop_x: int, bishop_y: int) -> bool:
+        """
+        Check if position is attacked by the bishop, i.e. on one of its diagonals.
+        """
+        return (x - y == bishop_x - bishop_y or x + y == bishop_x + bishop_y) and (
+            x != bishop_x
+        )
+
+    def _get_logger(self, debug: bool) -> logging.Logger:
+        """
+        Get logger.
+        """
+        logger = logging.getLogger(__name__)
+        if debug:
+            logger.setLevel(logging.DEBUG)
+        else:
+            logger.setLevel(logging.INFO)
+        format = logging.Formatter(
+            "%(asctime)s - %(message)s",
+            datefmt="%Y-%m-%dT%H:%M:%SZ",
+        )
+        # only attach a handler once, since many instances share the module logger
+        if not logger.handlers:
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(format)
+            logger.addHandler(console_handler)
+        return logger
+
+    def _diagonal_squares(
+        self, bishop_x: int, bishop_y: int, n: int
+    ) -> list[tuple[int, int]]:
+        """
+        Get the squares on the board on either diagonal through the bishop.
+        """
+        squares = []
+        for x in range(n):
+            for y in (x - bishop_x + bishop_y, bishop_x + bishop_y - x):
+                if 0 <= y < n:
+                    squares.append((x, y))
+        return squares
+
+
+class IncrementalSolver:
+    """
+    Solve a sequence of queries where usually one piece moves at a time, keeping the
+    bishop alive distance field from the start of the previous query.
+
+    When only the end moves the answer is a lookup, and when the bishop moves only the
+    squares whose distance depends on its old or new diagonals are searched again. A
+    new start or board size searches the whole field.
+    """
+
+    def __init__(self, distance_table: DistanceTable | None = None):
+        self.distance_table = distance_table
+        # the previous query and its field, which is a private copy updated in place
+        self.knight_moves = None
+        self.field = None
+        # number of squares whose distance was set by the last query
+        self.num_visited = 0
+        # how the queries so far were answered
+        self.searches = 0
+        self.repairs = 0
+        self.lookups = 0
+
+    def solve(
+        self,
+        start_x: int,
+        start_y: int,
+        end_x: int,
+        end_y: int,
+        bishop_x: int,
+        bishop_y: int,
+        n: int,
+    ) -> int:
+        """
+        Get the shortest path length of a query, reusing the previous query's field.
+        """
+        knight_moves = KnightMoves(
+            start_x,
+            start_y,
+            end_x,
+            end_y,
+            bishop_x,
+            bishop_y,
+            n,
+            distance_table=self.distance_table,
+        )
+        knight_moves._validate_input()
+        previous = self.knight_moves
+        if (
+            previous is None
+            or previous.n != n
+            or (previous.start_x, previous.start_y) != (start_x, start_y)
+        ):
+            self.field = array(
+                "i", knight_moves._distance_field(start_x, start_y, True)
+            )
+            self.num_visited = len(self.field) - self.field.count(-1)
+            self.searches += 1
+        elif (previous.bishop_x, previous.bishop_y) != (bishop_x, bishop_y):
+            self.num_visited = self._repair(previous, knight_moves)
+            self.repairs += 1
+        else:
+            self.num_visited = 0
+            self.lookups += 1
+        self.knight_moves = knight_moves
+
+        to_bishop = self.field[bishop_x * n + bishop_y]
+        to_goal = self.field[end_x * n + end_y]
+        bishop_to_goal = -1
+        if to_bishop != -1:
+            bishop_to_goal = knight_moves.knight_distance(
+                bishop_x, bishop_y, end_x, end_y, n
+            )
+        return knight_moves._combine_legs(to_bishop, to_goal, bishop_to_goal)
+
+    def _repair(self, previous: KnightMoves, knight_moves: KnightMoves) -> int:
+        """
+        Update the field for the bishop moving from its square in previous to its square
+        in knight_moves, returning the number of squares given a new distance.
+
+        Squares whose every shortest path runs over a newly attacked square lose their
+        distance, found in order of distance so a square's parents are decided before
+        it is. They are then searched again from their neighbours together with the
+        newly safe squares, which may also shorten the distance of squares around them.
+        """
+        row = [2, 2, -2, -2, 1, 1, -1, -1]
+        col = [1, -1, 1, -1, 2, -2, 2, -2]
+        moves = list(zip(row, col))
+        n = knight_moves.n
+        field = self.field
+        old_x, old_y = previous.bishop_x, previous.bishop_y
+        new_x, new_y = knight_moves.bishop_x, knight_moves.bishop_y
+        blocked = knight_moves._get_attacked_squares()
+
+        # only squares on the old or new diagonals change between attacked and safe
+        attacked, freed = [], []
+        changed = set(knight_moves._diagonal_squares(old_x, old_y, n))
+        changed.update(knight_moves._diagonal_squares(new_x, new_y, n))
+        for x, y in changed:
+            was_attacked = knight_moves._is_attacked(x, y, old_x, old_y)
+            if blocked[x * n + y] and not was_attacked:
+                attacked.append(x * n + y)
+            elif was_attacked and not blocked[x * n + y]:
+                freed.append(x * n + y)
+
+        # squares by distance, both passes go through the distances in order since
+        # every step adds one
+        levels = dict()
+        for state in attacked:
+            if field[state] != -1:
+                levels.setdefault(field[state], []).append(state)
+        distance = min(levels, default=0)
+        lost = bytearray(n * n)
+        lost_states = []
+        while levels:
+            for state in levels.pop(distance, []):
+                if lost[state]:
+                    continue
+                x, y = divmod(state, n)
+                # keep the distance if a parent still has its own
+                kept = False
+                if not blocked[state]:
+                    for dx, dy in moves:
+                        parent_x, parent_y = x + dx, y + dy
+                        if not (0 <= parent_x < n and 0 <= parent_y < n):
+                            continue
+                        parent = parent_x * n + parent_y
+                        if (
+                            field[parent] == distance - 1
+                            and not blocked[parent]
+                            and not lost[parent]
+                        ):
+                            kept = True
+                            break
+                if kept:
+                    continue
+                lost[state] = 1
+                lost_states.append(state)
+                for dx, dy in moves:
+                    child_x, child_y = x + dx, y + dy
+                    if 0 <= child_x < n and 0 <= child_y < n:
+                        child = child_x * n + child_y
+                        if field[child] == distance + 1 and not lost[child]:
+                            levels.setdefault(distance + 1, []).append(child)
+            distance += 1
+        for state in lost_states:
+            field[state] = -1
+
+        # start from the distances offered by neighbours that kept theirs
+        for state in lost_states + freed:
+            if blocked[state]:
+                continue
+            x, y = divmod(state, n)
+            best = -1
+            for dx, dy in moves:
+                neighbour_x, neighbour_y = x + dx, y + dy
+                if 0 <= neighbour_x < n and 0 <= neighbour_y < n:
+                    offered = field[neighbour_x * n + neighbour_y]
+                    if offered != -1 and (best == -1 or offered + 1 < best):
+                        best = offered + 1
+            if best != -1:
+                levels.setdefault(best, []).append(state)
+        distance = min(levels, default=0)
+        num_visited = 0
+        while levels:
+            for state in levels.pop(distance, []):
+                if field[state] != -1 and field[state] <= distance:
+                    continue
+                field[state] = distance
+                num_visited += 1
+                x, y = divmod(state, n)
+                for dx, dy in moves:
+                    neighbour_x, neighbour_y = x + dx, y + dy
+                    if not (0 <= neighbour_x < n and 0 <= neighbour_y < n):
+                        continue
+                    neighbour = neighbour_x * n + neighbour_y
+                    if not blocked[neighbour] and (
+                        field[neighbour] == -1 or field[neighbour] > distance + 1
+                    ):
+                        levels.setdefault(distance + 1, []).append(neighbour)
+            distance += 1
+        return num_visited
+
+
+def _solve_chunk(
+    queries: list[tuple[int, int, int, int, int, int, int]],
+) -> list[int]:
+    """
+    Solve a chunk of queries in a worker process of solve_parallel.
+    """
+    return KnightMoves.solve_many(queries)
+
+
+def read_queries(
+    file: IO[str], file_format: str
+) -> Iterator[tuple[int, int, int, int, int, int, int]]:
+    """
+    Read queries from a CSV file with a header row, or from a JSONL file with one object
+    per line, both using the names in QUERY_FIELDS.
+
+    A row that cannot be read as a query raises a ValueError naming the row, counting
+    the rows after the header, or the non-blank lines, from 1.
+    """
+    if file_format == "csv":
+        records = csv.DictReader(file)
+    elif file_format == "jsonl":
+        records = (line for line in file if line.strip())
+    else:
+        raise ValueError("Invalid input")
+    for row, record in enumerate(records, 1):
+        try:
+            if file_format == "jsonl":
+                record = json.loads(record)
+            # short CSV rows fill the missing fields with None
+            if not isinstance(record, dict) or any(
+                record.get(field) is None for field in QUERY_FIELDS
+            ):
+                raise ValueError(f"expected the fields {', '.join(QUERY_FIELDS)}")
+            query = tuple(int(record[field]) for field in QUERY_FIELDS)
+        except (TypeError, ValueError) as error:
+            raise ValueError(f"Row {row}: cannot read query: {error}") from error
+        yield query
+
+
+def write_results(
+    file: IO[str],
+    file_format: str,
+    rows: Iterable[tuple[tuple[int, int, int, int, int, int, int], int]],
+    chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+):
+    """
+    Write (query, shortest path length) rows in the same format as read_queries, adding
+    a length column or key. Rows are written and flushed a chunk at a time.
+    """
+    if file_format == "csv":
+        lines = [",".join(QUERY_FIELDS + ("length",)) + "\n"]
+    elif file_format == "jsonl":
+        lines = []
+    else:
+        raise ValueError("Invalid input")
+    for query, result in rows:
+        if file_format == "csv":
+            lines.append(",".join(map(str, query + (result,))) + "\n")
+        else:
+            record = dict(zip(QUERY_FIELDS, query))
+            record["length"] = result
+            lines.append(json.dumps(record) + "\n")
+        if len(lines) >= chunk_size:
+            file.write("".join(lines))
+            file.flush()
+            lines = []
+    file.write("".join(lines))
+    file.flush()
@@ -0,0 +1,628 @@
+"""
+Animate the knight moves searches in a tkinter window.
+"""
+
+import tkinter as tk
+from tkinter import ttk
+from typing import Generator
+
+from animations.core import IncrementalSolver, KnightMoves
+
+GREEN = "#B3C7A5"
+RED = "#AE4D5B"
+WHITE = "#FEF9EB"
+GREY = "#C0C0C0"
+BLUE = "#3B5B92"
+CHESS_SIZE = 650
+MARGIN = 25
+
+DEFAULT_SLEEP_TIME = 0.1
+DEFAULT_TICK_SIZE = 1
+# seconds the pieces must stay put before their shortest path length is previewed, and
+# the largest board previewed at all, since a new start searches the whole board
+PREVIEW_DELAY = 0.2
+PREVIEW_MAX_N = 250
+
+
+class KnightMovesGUI(KnightMoves):
+    """
+    KnightMoves with a tkinter window animating its searches step by step.
+    """
+
+    def run_gui(self):
+        """
+        Run the GUI.
+        """
+        self.window = tk.Tk()
+        self.window.title("Knight Moves")
+        self.n_gui = tk.IntVar(value=self.n)
+        self.start_x_gui = tk.IntVar(value=self.start_x)
+        self.start_y_gui = tk.IntVar(value=self.start_y)
+        self.end_x_gui = tk.IntVar(value=self.end_x)
+        self.end_y_gui = tk.IntVar(value=self.end_y)
+        self.bishop_x_gui = tk.IntVar(value=self.bishop_x)
+        self.bishop_y_gui = tk.IntVar(value=self.bishop_y)
+        self.sleep_time = tk.DoubleVar(value=DEFAULT_SLEEP_TIME)
+        self.tick_size = tk.IntVar(value=DEFAULT_TICK_SIZE)
+        self.running = False
+        self._init_window()
+        self.window.mainloop()
+
+    def _animate(self, steps: Generator[tuple[int, int], None, int]):
+        """
+        Animate a search from window.after callbacks, expanding tick_size squares every
+        sleep_time seconds so the window stays responsive while it runs. Each tick paints
+        its squares into the visited layer and updates the counter once.
+        """
+        self.steps = steps
+        self.animation_visited = 0
+        self.animation_id = self.window.after(0, self._animation_tick)
+
+    def _animation_tick(self):
+        """
+        Expand the next tick of the running search, then schedule the one after it.
+        """
+        if not self.running:
+            return
+        try:
+            tick_size = max(1, self.tick_size.get())
+            sleep_time = max(0.0, self.sleep_time.get())
+        except tk.TclError:
+            tick_size, sleep_time = DEFAULT_TICK_SIZE, DEFAULT_SLEEP_TIME
+        # the squares visited this tick are painted together once the tick is done
+        squares = []
+        result = None
+        try:
+            for _ in range(tick_size):
+                squares.append(next(self.steps))
+        except StopIteration as stop:
+            result = stop.value
+        if squares:
+            self._paint_visited(squares)
+        self.animation_visited += len(squares)
+        if result is not None:
+            self.animation_id = None
+            self._finish_animation(result)
+            return
+        self.counter_text.set(f"Visited: {self.animation_visited} nodes")
+        self.animation_id = self.window.after(
+            int(sleep_time * 1000), self._animation_tick
+        )
+
+    def _finish_animation(self, shortest_path_length: int):
+        """
+        Show the result of an animated search.
+        """
+        self.counter_text.set(f"Visited: {self.animation_visited} nodes")
+        if shortest_path_length == -1:
+            self.result_text.set("No valid path exists!")
+            return
+        self._paint_visited([(self.end_x, self.end_y)])
+        self.result_text.set(f"Shortest path length: {shortest_path_length}")
+        self._show_path(shortest_path_length)
+
+    def _show_path(self, length: int):
+        """
+        Draw a shortest path of the given length over the board, reusing a single line
+        item.
+
+        The path is walked back through the field the preview already has for these
+        pieces, only searching again if the preview did not solve them.
+        """
+        n = self.n
+        solver = getattr(self, "incremental_solver", None)
+        previous = solver.knight_moves if solver is not None else None
+        if previous is not None and (
+            previous.start_x,
+            previous.start_y,
+            previous.end_x,
+            previous.end_y,
+            previous.bishop_x,
+            previous.bishop_y,
+            previous.n,
+        ) == (
+            self.start_x,
+            self.start_y,
+            self.end_x,
+            self.end_y,
+            self.bishop_x,
+            self.bishop_y,
+            n,
+        ):
+            path = self.field_path(solver.field, length)
+        else:
+            path = self.shortest_path()
+        coords = []
+        for x, y in path:
+            coords += [
+                y * CHESS_SIZE / n + CHESS_SIZE / (2 * n),
+                x * CHESS_SIZE / n + CHESS_SIZE / (2 * n),
+            ]
+        if len(coords) < 4:
+            return
+        try:
+            self.chess_frame.coords(self.path_line_id, *coords)
+            self.chess_frame.itemconfig(self.path_line_id, state="normal")
+        except AttributeError:
+            self.path_line_id = self.chess_frame.create_line(
+                *coords, fill=BLUE, width=3
+            )
+        self.chess_frame.tag_raise(self.path_line_id)
+        self.chess_frame.update()
+
+    def _reset_chess_board(self) -> None:
+        """
+        Reset chess board to original state.
+
+        The squares are only moved, created or deleted when n changes, and when the
+        bishop moves only the squares on its old and new diagonals are recolored.
+        """
+        try:
+            len(self.chess_squares)
+        except AttributeError:
+            self.chess_squares = []
+            self.board_n = None
+            self.board_bishop = None
+
+        n = self.n_gui.get()
+        bishop_x, bishop_y = self.bishop_x_gui.get(), self.bishop_y_gui.get()
+
+        if n != self.board_n:
+            self._resize_chess_squares(n, bishop_x, bishop_y)
+        elif (bishop_x, bishop_y) != self.board_bishop:
+            old_x, old_y = self.board_bishop
+            changed = self._diagonal_squares(old_x, old_y, n)
+            changed += self._diagonal_squares(bishop_x, bishop_y, n)
+            for i, j in changed:
+                self.chess_frame.itemconfig(
+                    self.chess_squares[i][j],
+                    fill=self._square_color(i, j, bishop_x, bishop_y),
+                )
+        self.board_n, self.board_bishop = n, (bishop_x, bishop_y)
+        self._reset_visited_layer()
+        # images
+        square_width = CHESS_SIZE / n
+        self.knight_img = self._get_piece_image("knight", square_width)
+        self.bishop_img = self._get_piece_image("bishop", square_width)
+        self.king_img = self._get_piece_image("king", square_width)
+
+        try:
+            self.chess_frame.itemconfig(self.knight_image_id, image=self.knight_img)
+            self.chess_frame.itemconfig(self.king_image_id, image=self.king_img)
+            self.chess_frame.itemconfig(self.bishop_img_id, image=self.bishop_img)
+            self.chess_frame.coords(
+                self.knight_image_id,
+                self.start_y_gui.get() * CHESS_SIZE / n + CHESS_SIZE / (2 * n),
+                self.start_x_gui.get() * CHESS_SIZE / n + CHESS_SIZE / (2 * n),
+            )
+            self.chess_frame.coords(
+                self.king_image_id,
+                self.end_y_gui.get() * CHESS_SIZE / n + CHESS_SIZE / (2 * n),
+                self.end_x_gui.get() * CHESS_SIZE / n + CHESS_SIZE / (2 * n),
+            )
+            self.chess_frame.coords(
+                self.bishop_img_id,
+                self.bishop_y_gui.get() * CHESS_SIZE / n + CHESS_SIZE / (2 * n),
+                self.bishop_x_gui.get() * CHESS_SIZE / n + CHESS_SIZE / (2 * n),
+            )
+            self.chess_frame.tag_raise(self.knight_image_id)
+            self.chess_frame.tag_raise(self.king_image_id)
+            self.chess_frame.tag_raise(self.bishop_img_id)
+        except AttributeError:
+            self.knight_image_id = self.chess_frame.create_image(
+                self.start_y_gui.get() * CHESS_SIZE / n + CHESS_SIZE / (2 * n),
+                self.start_x_gui.get() * CHESS_SIZE / n + CHESS_SIZE / (2 * n),
+                image=self.knight_img,
+            )
+            self.king_image_id = self.chess_frame.create_image(
+                self.end_y_gui.get() * CHESS_SIZE / n + CHESS_SIZE / (2 * n),
+                self.end_x_gui.get() * CHESS_SIZE / n + CHESS_SIZE / (2 * n),
+                image=self.king_img,
+            )
+            self.bishop_img_id = self.chess_frame.create_image(
+                self.bishop_y_gui.get() * CHESS_SIZE / n + CHESS_SIZE / (2 * n),
+                self.bishop_x_gui.get() * CHESS_SIZE / n + CHESS_SIZE / (2 * n),
+                image=self.bishop_img,
+            )
+        self.chess_frame.update()
+
+    def _resize_chess_squares(self, n: int, bishop_x: int, bishop_y: int):
+        """
+        Lay the squares out for an n x n board, deleting the rectangles that no longer
+        fit and creating the missing ones, then lower them all below the other items.
+        """
+        for chess_row in self.chess_squares[n:]:
+            self.chess_frame.delete(*chess_row)
+        del self.chess_squares[n:]
+        for chess_row in self.chess_squares:
+            if len(chess_row) > n:
+                self.chess_frame.delete(*chess_row[n:])
+                del chess_row[n:]
+
+        for i in range(n):
+            if i == len(self.chess_squares):
+                self.chess_squares.append([])
+            chess_row = self.chess_squares[i]
+            for j in range(n):
+                color = self._square_color(i, j, bishop_x, bishop_y)
+                x1, y1, x2, y2 = (
+                    j * CHESS_SIZE / n,
+                    i * CHESS_SIZE / n,
+                    (j + 1) * CHESS_SIZE / n,
+                    (i + 1) * CHESS_SIZE / n,
+                )
+                if j < len(chess_row):
+                    self.chess_frame.coords(chess_row[j], x1, y1, x2, y2)
+                    self.chess_frame.itemconfig(chess_row[j], fill=color)
+                else:
+                    chess_row.append(
+                        self.chess_frame.create_rectangle(
+                            x1, y1, x2, y2, fill=color, tags="square"
+                        )
+                    )
+        self.chess_frame.tag_lower("square")
+
+    def _square_color(self, x: int, y: int, bishop_x: int, bishop_y: int) -> str:
+        """
+        Get the color of a square, red if the bishop attacks it.
+        """
+        if self._is_attacked(x, y, bishop_x, bishop_y):
+            return RED
+        return WHITE if (x + y) % 2 == 0 else GREEN
+
+    def _get_piece_image(self, name: str, square_width: float) -> tk.PhotoImage:
+        """
+        Get a piece image subsampled to fit in a square, decoding each image and
+        subsampling it for each square size only once.
+        """
+        try:
+            piece_images = self.piece_images
+        except AttributeError:
+            piece_images = self.piece_images = dict()
+        if name not in piece_images:
+            piece_images[name] = tk.PhotoImage(file=f"images/{name}.png")
+        unscaled_img = piece_images[name]
+        scale_factor = int(unscaled_img.width() / square_width) + 1
+        if (name, scale_factor) not in piece_images:
+            piece_images[(name, scale_factor)] = unscaled_img.subsample(
+                scale_factor, scale_factor
+            )
+        return piece_images[(name, scale_factor)]
+
+    def _reset_visited_layer(self):
+        """
+        Clear the visited layer, a single image over the squares that visited squares
+        are painted into, and raise it above the squares.
+
+        The pixel bounds of every row and column are kept for painting, leaving the
+        square outlines visible where the squares are big enough.
+        """
+        n = self.n_gui.get()
+        edges = [round(k * CHESS_SIZE / n) for k in range(n + 1)]
+        self.visited_low = [
+            edges[k] + 1 if edges[k + 1] - edges[k] > 2 else edges[k] for k in range(n)
+        ]
+        self.visited_high = [
+            max(edges[k + 1], self.visited_low[k] + 1) for k in range(n)
+        ]
+        try:
+            self.visited_image.blank()
+            self.chess_frame.tag_raise(self.visited_image_id)
+        except AttributeError:
+            self.visited_image = tk.PhotoImage(width=CHESS_SIZE, height=CHESS_SIZE)
+            self.visited_image_id = self.chess_frame.create_image(
+                0, 0, image=self.visited_image, anchor="nw"
+            )
+
+    def _paint_visited(self, squares: list[tuple[int, int]]):
+        """
+        Paint squares into the visited layer in one Tcl round trip.
+        """
+        low, high = self.visited_low, self.visited_high
+        name = str(self.visited_image)
+        self.window.tk.eval(
+            "\n".join(
+                f"{name} put {GREY} -to {low[y]} {low[x]} {high[y]} {high[x]}"
+                for x, y in squares
+            )
+        )
+
+    def _reset_knight_position(self):
+        """
+        Reset knight position to original state.
+        """
+        IMAGE_WIDTH = self.knight_img.width()
+        self.chess_frame.moveto(
+            self.knight_image_id,
+            (
+                self.start_y_gui.get() * CHESS_SIZE / self.n_gui.get()
+                + CHESS_SIZE / (2 * self.n_gui.get())
+            )
+            - IMAGE_WIDTH / 2,
+            (
+                self.start_x_gui.get() * CHESS_SIZE / self.n_gui.get()
+                + CHESS_SIZE / (2 * self.n_gui.get())
+            )
+            - IMAGE_WIDTH / 2,
+        )
+        self.chess_frame.update()
+        self._preview_result()
+
+    def _reset_bishop_position(self):
+        """
+        Reset bishop position to original state.
+        """
+        IMAGE_WIDTH = self.bishop_img.width()
+        self.chess_frame.moveto(
+            self.bishop_img_id,
+            (
+                self.bishop_y_gui.get() * CHESS_SIZE / self.n_gui.get()
+                + CHESS_SIZE / (2 * self.n_gui.get())
+            )
+            - IMAGE_WIDTH / 2,
+            (
+                self.bishop_x_gui.get() * CHESS_SIZE / self.n_gui.get()
+                + CHESS_SIZE / (2 * self.n_gui.get())
+            )
+            - IMAGE_WIDTH / 2,
+        )
+        self._reset_chess_board()
+        self.chess_frame.update()
+        self._preview_result()
+
+    def _reset_king_position(self):
+        """
+        Reset king position to original state.
+        """
+        IMAGE_WIDTH = self.king_img.width()
+        self.chess_frame.moveto(
+            self.king_image_id,
+            (
+                self.end_y_gui.get() * CHESS_SIZE / self.n_gui.get()
+                + CHESS_SIZE / (2 * self.n_gui.get())
+            )
+            - IMAGE_WIDTH / 2,
+            (
+                self.end_x_gui.get() * CHESS_SIZE / self.n_gui.get()
+                + CHESS_SIZE / (2 * self.n_gui.get())
+            )
+            - IMAGE_WIDTH / 2,
+        )
+        self.chess_frame.update()
+        self._preview_result()
+
+    def _preview_result(self):
+        """
+        Schedule a preview of the shortest path length once the pieces stop moving,
+        replacing any preview already scheduled.
+        """
+        if getattr(self, "preview_id", None) is not None:
+            self.window.after_cancel(self.preview_id)
+        self.preview_id = self.window.after(
+            int(PREVIEW_DELAY * 1000), self._run_preview
+        )
+
+    def _run_preview(self):
+        """
+        Show the shortest path length for the pieces where they are, solved
+        incrementally from the previous position.
+        """
+        self.preview_id = None
+        if self.running:
+            return
+        try:
+            self.incremental_solver
+        except AttributeError:
+            self.incremental_solver = IncrementalSolver()
+        try:
+            if self.n_gui.get() > PREVIEW_MAX_N:
+                raise ValueError("Board too large to preview")
+            length = self.incremental_solver.solve(
+                self.start_x_gui.get(),
+                self.start_y_gui.get(),
+                self.end_x_gui.get(),
+                self.end_y_gui.get(),
+                self.bishop_x_gui.get(),
+                self.bishop_y_gui.get(),
+                self.n_gui.get(),
+            )
+        except (tk.TclError, ValueError):
+            self.result_text.set("")
+            return
+        if length == -1:
+            self.result_text.set("No valid path exists!")
+        else:
+            self.result_text.set(f"Shortest path length: {length}")
+
+    def _start(self) -> bool:
+        """
+        Start the animation loop, returning whether the input is valid
+        """
+        self.counter_text.set("Visited: 0 nodes")
+        self.start_x = self.start_x_gui.get()
+        self.start_y = self.start_y_gui.get()
+        self.end_x = self.end_x_gui.get()
+        self.end_y = self.end_y_gui.get()
+        self.bishop_x = self.bishop_x_gui.get()
+        self.bishop_y = self.bishop_y_gui.get()
+        self.n = self.n_gui.get()
+
+        try:
+            self._validate_input()
+        except ValueError:
+            self.counter_text.set("Invalid input!")
+            return False
+
+        self.run_buttons_frame.pack_forget()
+        self.cancel_buttons_frame.pack(pady=20)
+        self.running = True
+        return True
+
+    def _stop(self):
+        """
+        Stop the animation loop
+        """
+        self.running = False
+        # stop the animation straight away rather than at its next tick
+        try:
+            if self.animation_id is not None:
+                self.window.after_cancel(self.animation_id)
+                self.animation_id = None
+            self.steps.close()
+        except AttributeError:
+            pass
+        self.cancel_buttons_frame.pack_forget()
+        self.run_buttons_frame.pack(pady=20)
+        try:
+            self.chess_frame.itemconfig(self.path_line_id, state="hidden")
+        except AttributeError:
+            pass
+        self._reset_chess_board()
+        self.counter_text.set("Visited: 0 nodes")
+        self.result_text.set("")
+
+    def _start_bfs(self):
+        """
+        Start the BFS animation loop
+        """
+        if self._start():
+            self._animate(self.bfs_steps())
+
+    def _start_dbfs(self):
+        """
+        Start the double ended BFS animation loop
+        """
+        if self._start():
+            self._animate(self.dbfs_steps())
+
+    def _start_astar(self):
+        """
+        Start the A* animation loop
+        """
+        if self._start():
+            self._animate(self.astar_steps())
+
+    def _handle_n_change(self):
+        """
+        Handle n changing.
+        """
+        self.window.after_idle(self._reset_chess_board)
+
+    def _init_window(self):
+        """
+        Initialize the window and render the chess board.
+        """
+        self.content = ttk.Frame(self.window)  # TODO: make responsive/ no hardcoding
+        self.content.pack()
+        self.n_gui.trace_add("write", lambda *_: self._handle_n_change())
+        self.start_x_gui.trace_add("write", lambda *_: self._reset_knight_position())
+        self.start_y_gui.trace_add("write", lambda *_: self._reset_knight_position())
+        self.end_x_gui.trace_add("write", lambda *_: self._reset_king_position())
+        self.end_y_gui.trace_add("write", lambda *_: self._reset_king_position())
+        self.bishop_x_gui.trace_add("write", lambda *_: self._reset_bishop_position())
+        self.bishop_y_gui.trace_add("write", lambda *_: self._reset_bishop_position())
+        self.chess_frame = tk.Canvas(self.content, width=CHESS_SIZE, height=CHESS_SIZE)
+        self.chess_frame.grid(row=0, column=0, padx=MARGIN, pady=MARGIN)
+        self._reset_chess_board()
+
+        # render buttons and counter
+        self.control_frame = ttk.Frame(self.content)
+        self.control_frame.grid(row=0, column=1, padx=(0, MARGIN), pady=MARGIN)
+
+        self.counter_text = tk.StringVar(self.control_frame, value="Visited: 0 nodes")
+        self.counter = ttk.Label(
+            self.control_frame, textvariable=self.counter_text, font=("Arial", 44)
+        )
+        self.counter.pack()
+
+        self.result_text = tk.StringVar(self.control_frame, value="")
+        self.result = ttk.Label(
+            self.control_frame, textvariable=self.result_text, font=("Arial", 18)
+        )
+        self.result.pack(pady=(10, 0))
+
+        self.run_controls_frame = ttk.Frame(self.control_frame)
+        self.n_label = ttk.Label(self.run_controls_frame, text="Chess board size:")
+        self.n_entry = ttk.Entry(
+            self.run_controls_frame, textvariable=self.n_gui, width=8
+        )
+        self.n_label.grid(row=0, column=0, padx=10)
+        self.n_entry.grid(row=0, column=1, padx=10, columnspan=2)
+        self.tick_speed_label = ttk.Label(
+            self.run_controls_frame, text="Tick duration:"
+        )
+        self.tick_speed_entry = ttk.Entry(
+            self.run_controls_frame, textvariable=self.sleep_time, width=8
+        )
+        self.tick_speed_label.grid(row=1, column=0, padx=10)
+        self.tick_speed_entry.grid(row=1, column=1, padx=10, columnspan=2)
+        self.tick_size_label = ttk.Label(self.run_controls_frame, text="Tick size:")
+        self.tick_size_entry = ttk.Entry(
+            self.run_controls_frame, textvariable=self.tick_size, width=8
+        )
+        self.tick_size_label.grid(row=2, column=0, padx=10)
+        self.tick_size_entry.grid(row=2, column=1, padx=10, columnspan=2)
+        self.start_pos_label = ttk.Label(
+            self.run_controls_frame, text="Start position:"
+        )
+        self.start_x_entry = ttk.Entry(
+            self.run_controls_frame, textvariable=self.start_x_gui, width=3
+        )
+        self.start_y_entry = ttk.Entry(
+            self.run_controls_frame, textvariable=self.start_y_gui, width=3
+        )
+        self.start_pos_label.grid(row=3, column=0, padx=10)
+        self.start_x_entry.grid(row=3, column=1, padx=(10, 0))
+        self.start_y_entry.grid(row=3, column=2, padx=(0, 10))
+        self.end_pos_label = ttk.Label(self.run_controls_frame, text="End position:")
+        self.end_x_entry = ttk.Entry(
+            self.run_controls_frame, textvariable=self.end_x_gui, width=3
+        )
+        self.end_y_entry = ttk.Entry(
+            self.run_controls_frame, textvariable=self.end_y_gui, width=3
+        )
+        self.end_pos_label.grid(row=4, column=0, padx=10)
+        self.end_x_entry.grid(row=4, column=1, padx=(10, 0))
+        self.end_y_entry.grid(row=4, column=2, padx=(0, 10))
+        self.bishop_pos_label = ttk.Label(
+            self.run_controls_frame, text="Bishop position:"
+        )
+        self.bishop_x_entry = ttk.Entry(
+            self.run_controls_frame, textvariable=self.bishop_x_gui, width=3
+        )
+        self.bishop_y_entry = ttk.Entry(
+            self.run_controls_frame, textvariable=self.bishop_y_gui, width=3
+        )
+        self.bishop_pos_label.grid(row=5, column=0, padx=10)
+        self.bishop_x_entry.grid(row=5, column=1, padx=(10, 0))
+        self.bishop_y_entry.grid(row=5, column=2, padx=(0, 10))
+        self.run_controls_frame.pack(pady=20)
+
+        self.run_buttons_frame = ttk.Frame(self.control_frame)
+        self.bfs_button = tk.Button(
+            self.run_buttons_frame,
+            text="Run BFS",
+            command=lambda: self._start_bfs(),
+        )
+        self.bfs_button.grid(row=0, column=0, padx=10)
+        self.dbfs_button = tk.Button(
+            self.run_buttons_frame,
+            text="Run Double BFS",
+            command=self._start_dbfs,
+        )
+        self.dbfs_button.grid(row=0, column=1, padx=10)
+        self.astar_button = tk.Button(
+            self.run_buttons_frame,
+            text="Run A*",
+            command=self._start_astar,
+        )
+        self.astar_button.grid(row=0, column=2, padx=10)
+        self.run_buttons_frame.pack(pady=20)
+
+        self.cancel_buttons_frame = ttk.Frame(self.control_frame)
+        self.cancel_button = tk.Button(
+            self.cancel_buttons_frame,
+            text="Reset",
+            command=self._stop,
+        )
+        self.cancel_button.pack()
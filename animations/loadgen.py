@@ -0,0 +1,120 @@
+"""
+Generate load against a running serve command and report its latency percentiles.
+"""
+
+import asyncio
+import json
+import random
+import statistics
+import time
+from urllib.parse import urlencode
+
+import click
+
+from animations.bench import PLACEMENTS, get_queries
+from animations.core import DEFAULT_HOST, DEFAULT_PORT, QUERY_FIELDS
+
+DEFAULT_REQUESTS = 2000
+DEFAULT_CONCURRENCY = 16
+DEFAULT_DISTINCT = 100
+DEFAULT_SEED = 0
+
+
+async def request(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    host: str,
+    query: tuple[int, int, int, int, int, int, int],
+) -> dict:
+    """
+    Send GET /solve for a query over a kept alive connection, returning the JSON record
+    of the response.
+    """
+    target = "/solve?" + urlencode(dict(zip(QUERY_FIELDS, query)))
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+    await writer.drain()
+    status = await reader.readline()
+    headers = dict()
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers["content-length"]))
+    if b" 200 " not in status:
+        raise ValueError(f"Request failed: {status.decode().strip()}")
+    return json.loads(body)
+
+
+async def run_load(
+    host: str,
+    port: int,
+    queries: list[tuple[int, int, int, int, int, int, int]],
+    concurrency: int,
+) -> list[float]:
+    """
+    Send every query from concurrency connections at once, returning the latency of each
+    request in seconds.
+    """
+    pending = iter(queries)
+    latencies = []
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for query in pending:
+                started = time.perf_counter()
+                await request(reader, writer, host, query)
+                latencies.append(time.perf_counter() - started)
+        finally:
+            writer.close()
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies
+
+
+@click.command(help="Measure the latency of a running serve command.")
+@click.option("--host", default=DEFAULT_HOST, help="Server host.")
+@click.option("--port", default=DEFAULT_PORT, help="Server port.")
+@click.option(
+    "--requests",
+    default=DEFAULT_REQUESTS,
+    type=click.IntRange(min=2),
+    help="Number of requests, at least 2 for the percentiles.",
+)
+@click.option(
+    "--concurrency", default=DEFAULT_CONCURRENCY, help="Number of open connections."
+)
+@click.option("--n", default=64, help="Chess board size.")
+@click.option(
+    "--placement",
+    type=click.Choice(PLACEMENTS),
+    default="center",
+    help="Bishop placement.",
+)
+@click.option(
+    "--distinct",
+    default=DEFAULT_DISTINCT,
+    help="Number of distinct queries the requests are drawn from.",
+)
+@click.option("--seed", default=DEFAULT_SEED, help="Random seed for the queries.")
+def main(host, port, requests, concurrency, n, placement, distinct, seed):
+    rng = random.Random(seed)
+    distinct_queries = get_queries(n, placement, distinct, rng)
+    queries = [rng.choice(distinct_queries) for _ in range(requests)]
+
+    started = time.perf_counter()
+    latencies = asyncio.run(run_load(host, port, queries, concurrency))
+    elapsed = time.perf_counter() - started
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    click.echo(f"{len(latencies)} requests in {elapsed:.2f}s")
+    click.echo(f"throughput {len(latencies) / elapsed:10.1f} requests/s")
+    click.echo(f"p50        {percentiles[49] * 1000:10.2f} ms")
+    click.echo(f"p99        {percentiles[98] * 1000:10.2f} ms")
+    click.echo(f"max        {max(latencies) * 1000:10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Serve shortest path queries over HTTP on localhost, solved in a pool of worker processes.
+"""
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import json
+import multiprocessing
+import os
+from urllib.parse import parse_qs, urlsplit
+
+import click
+
+from animations.core import DEFAULT_MAX_N, QUERY_FIELDS, KnightMoves
+
+
+class SolverService:
+    """
+    Solve queries in worker processes, each owning a shard of the boards.
+
+    Queries are sharded by board size and bishop square up to symmetry, so every query
+    of a board goes to the same worker and finds its start distance fields warm in that
+    worker's field cache. A query that is already being solved, up to symmetry, waits
+    for that result instead of being solved again. Boards larger than max_n are
+    rejected, since their searches would not fit in a worker's memory.
+    """
+
+    def __init__(self, workers: int | None = None, max_n: int = DEFAULT_MAX_N):
+        workers = workers or os.cpu_count() or 1
+        self.max_n = max_n
+        # a single process per shard, so a board always lands on the same field cache.
+        # The processes are spawned rather than forked, since a forked process would
+        # keep a copy of every connection open at the time and they would never close
+        self.context = multiprocessing.get_context("spawn")
+        self.executors = [self._new_executor() for _ in range(workers)]
+        # futures of the queries being solved, by canonical query
+        self.in_flight = dict()
+        # queries sent to a worker, and queries that waited for one being solved
+        self.solved = 0
+        self.coalesced = 0
+
+    async def solve(self, query: tuple[int, int, int, int, int, int, int]) -> int:
+        """
+        Get the shortest path length of a validated query.
+        """
+        key = KnightMoves.canonical_query(query)
+        future = self.in_flight.get(key)
+        if future is None:
+            shard = hash(KnightMoves.board_key(key)) % len(self.executors)
+            executor = self.executors[shard]
+            loop = asyncio.get_running_loop()
+            try:
+                future = loop.run_in_executor(executor, KnightMoves.solve_many, [key])
+            except BrokenProcessPool:
+                # the worker died while idle, so nothing of this query has run yet
+                executor = self._replace_executor(shard, executor)
+                future = loop.run_in_executor(executor, KnightMoves.solve_many, [key])
+
+            def done(future: asyncio.Future):
+                self.in_flight.pop(key, None)
+                # the worker died during the search, the next query of the shard
+                # needs a new one
+                if not future.cancelled() and isinstance(
+                    future.exception(), BrokenProcessPool
+                ):
+                    self._replace_executor(shard, executor)
+
+            self.in_flight[key] = future
+            future.add_done_callback(done)
+            self.solved += 1
+        else:
+            self.coalesced += 1
+        # one caller going away must not cancel the search for the others
+        (length,) = await asyncio.shield(future)
+        return length
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Answer the HTTP requests of one connection, keeping it open between requests
+        unless the client asks to close it.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = dict()
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                status, record = await self._respond(request_line, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                data = json.dumps(record).encode()
+                head = (
+                    f"HTTP/1.1 {status}\r\n"
+                    + "Content-Type: application/json\r\n"
+                    + f"Content-Length: {len(data)}\r\n"
+                    + ("" if keep_alive else "Connection: close\r\n")
+                    + "\r\n"
+                )
+                writer.write(head.encode() + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, request_line: bytes, body: bytes) -> tuple[str, dict]:
+        """
+        Get the status and JSON record answering a request, either GET /solve with the
+        query fields as parameters or POST /solve with them in a JSON object.
+        """
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            return "400 Bad Request", {"error": "Invalid request"}
+        url = urlsplit(target)
+        if url.path != "/solve":
+            return "404 Not Found", {"error": "Not found"}
+        try:
+            if method == "GET":
+                fields = {key: values[0] for key, values in parse_qs(url.query).items()}
+            elif method == "POST":
+                fields = json.loads(body)
+            else:
+                return "405 Method Not Allowed", {"error": "Method not allowed"}
+            query = tuple(int(fields[field]) for field in QUERY_FIELDS)
+            KnightMoves(*query)._validate_input()
+        except (KeyError, TypeError, ValueError):
+            return "400 Bad Request", {"error": "Invalid input"}
+        if query[-1] > self.max_n:
+            return "400 Bad Request", {"error": f"Board size above {self.max_n}"}
+
+        record = dict(zip(QUERY_FIELDS, query))
+        try:
+            record["length"] = await self.solve(query)
+        except Exception:
+            # such as a worker running out of memory or dying
+            return "500 Internal Server Error", {"error": "Solver failed"}
+        return "200 OK", record
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        """
+        Start the single worker process of a shard.
+        """
+        return ProcessPoolExecutor(max_workers=1, mp_context=self.context)
+
+    def _replace_executor(
+        self, shard: int, executor: ProcessPoolExecutor
+    ) -> ProcessPoolExecutor:
+        """
+        Replace the broken executor of a shard, unless it was replaced already, returning
+        the executor now serving the shard.
+        """
+        if self.executors[shard] is executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.executors[shard] = self._new_executor()
+        return self.executors[shard]
+
+    def close(self):
+        """
+        Shut down the worker processes.
+        """
+        for executor in self.executors:
+            executor.shutdown()
+
+
+async def serve(
+    host: str, port: int, workers: int | None = None, max_n: int = DEFAULT_MAX_N
+):
+    """
+    Serve queries until cancelled.
+    """
+    service = SolverService(workers, max_n)
+    server = await asyncio.start_server(service.handle, host, port)
+    try:
+        async with server:
+            for listener in server.sockets:
+                address, bound_port = listener.getsockname()[:2]
+                click.echo(f"Serving on http://{address}:{bound_port}/solve")
+            await server.serve_forever()
+    finally:
+        service.close()
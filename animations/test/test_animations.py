@@ -1,13 +1,38 @@
+from collections import deque
+import csv
+import io
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
 import unittest
-from animations.animations import KnightMoves
+from click.testing import CliRunner
+from animations.animations import (
+    QUERY_FIELDS,
+    DistanceFieldCache,
+    DistanceTable,
+    IncrementalSolver,
+    KnightMoves,
+    SearchMetrics,
+    cli_wrapper,
+    read_queries,
+    write_results,
+)
 import random as r
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 class TestKnightMoves(unittest.TestCase):
 
     def test_algorithms_match(self):
         """
-        test that all 3 algorithms return the same result
+        test that all algorithms and engines return the same result
         """
         for _ in range(1_000):
             start_x, start_y, end_x, end_y, bishop_x, bishop_y, n = (
@@ -25,15 +50,27 @@ class TestKnightMoves(unittest.TestCase):
                 knight_moves = KnightMoves(
                     start_x, start_y, end_x, end_y, bishop_x, bishop_y, n, False
                 )
-                control = knight_moves.unoptimized_bfs()
-                bfs = knight_moves.bfs(with_gui=False)
-                dbfs = knight_moves.dbfs(with_gui=False)
+                control = self._reference_bfs(
+                    start_x, start_y, end_x, end_y, bishop_x, bishop_y, n
+                )
+                unoptimized = knight_moves.unoptimized_bfs()
+                bfs = knight_moves.bfs()
+                dbfs = knight_moves.dbfs()
+                array_bfs = knight_moves.bfs(engine="array")
+                array_dbfs = knight_moves.dbfs(engine="array")
+                level_dbfs = knight_moves.dbfs(level_synchronous=True)
+                astar = knight_moves.astar()
+                self.assertEqual(control, unoptimized)
                 self.assertEqual(control, bfs)
                 self.assertEqual(control, dbfs)
+                self.assertEqual(control, array_bfs)
+                self.assertEqual(control, array_dbfs)
+                self.assertEqual(control, level_dbfs)
+                self.assertEqual(control, astar)
 
     def test_valid_cases(self):
         """
-        test all 3 algorithms on known cases
+        test all algorithms and engines on known cases
         """
         test_cases = [
             (4, 2, 2, 6, 2, 3, 8, 4),
@@ -58,12 +95,737 @@ class TestKnightMoves(unittest.TestCase):
                 knight_moves = KnightMoves(
                     start_x, start_y, end_x, end_y, bishop_x, bishop_y, n, False
                 )
-                control = knight_moves.unoptimized_bfs()
-                bfs = knight_moves.bfs(with_gui=False)
-                dbfs = knight_moves.dbfs(with_gui=False)
+                control = self._reference_bfs(
+                    start_x, start_y, end_x, end_y, bishop_x, bishop_y, n
+                )
+                unoptimized = knight_moves.unoptimized_bfs()
+                bfs = knight_moves.bfs()
+                dbfs = knight_moves.dbfs()
+                array_bfs = knight_moves.bfs(engine="array")
+                array_dbfs = knight_moves.dbfs(engine="array")
+                level_dbfs = knight_moves.dbfs(level_synchronous=True)
+                astar = knight_moves.astar()
                 self.assertEqual(expected, control)
+                self.assertEqual(expected, unoptimized)
                 self.assertEqual(expected, bfs)
                 self.assertEqual(expected, dbfs)
+                self.assertEqual(expected, array_bfs)
+                self.assertEqual(expected, array_dbfs)
+                self.assertEqual(expected, level_dbfs)
+                self.assertEqual(expected, astar)
+
+    def test_diagonal_squares(self):
+        """
+        test that the squares recolored when the bishop moves are exactly its diagonals
+        """
+        for _ in range(100):
+            _, _, _, _, bishop_x, bishop_y, n = self._get_test_case()
+            knight_moves = KnightMoves(bishop_x=bishop_x, bishop_y=bishop_y, n=n)
+            expected = self._get_bishop_positions(bishop_x, bishop_y, n)
+            expected.add((bishop_x, bishop_y))
+            with self.subTest(bishop_x=bishop_x, bishop_y=bishop_y, n=n):
+                self.assertEqual(
+                    expected,
+                    set(knight_moves._diagonal_squares(bishop_x, bishop_y, n)),
+                )
+
+    def test_steps(self):
+        """
+        test that the step generators yield every expanded square and return the result
+        """
+        for _ in range(100):
+            test_case = self._get_test_case()
+            knight_moves = KnightMoves(*test_case)
+            control = knight_moves.unoptimized_bfs()
+            for name, steps in [
+                ("bfs", knight_moves.bfs_steps),
+                ("dbfs", knight_moves.dbfs_steps),
+                ("astar", knight_moves.astar_steps),
+            ]:
+                with self.subTest(test_case=test_case, name=name):
+                    squares = []
+                    generator = steps()
+                    while True:
+                        try:
+                            squares.append(next(generator))
+                        except StopIteration as stop:
+                            result = stop.value
+                            break
+                    self.assertEqual(control, result)
+                    self.assertEqual(knight_moves.num_visited, len(squares))
+                    for x, y in squares:
+                        self.assertTrue(0 <= x < test_case[6] and 0 <= y < test_case[6])
+
+    def test_mark_on_push(self):
+        """
+        test that the engines marking states visited on push return the same result
+        """
+        for _ in range(300):
+            test_case = self._get_test_case()
+            with self.subTest(test_case=test_case):
+                knight_moves = KnightMoves(*test_case)
+                control = knight_moves.unoptimized_bfs()
+                for engine in ["tuple", "array"]:
+                    self.assertEqual(
+                        control, knight_moves.bfs(engine=engine, mark_on_push=True)
+                    )
+                    self.assertEqual(
+                        control, knight_moves.dbfs(engine=engine, mark_on_push=True)
+                    )
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_numpy_engine(self):
+        """
+        test that the numpy engine matches the unoptimized algorithm
+        """
+        for _ in range(200):
+            start_x, start_y, end_x, end_y, bishop_x, bishop_y, n = (
+                self._get_test_case()
+            )
+            with self.subTest(
+                start_x=start_x,
+                start_y=start_y,
+                end_x=end_x,
+                end_y=end_y,
+                bishop_x=bishop_x,
+                bishop_y=bishop_y,
+                n=n,
+            ):
+                knight_moves = KnightMoves(
+                    start_x, start_y, end_x, end_y, bishop_x, bishop_y, n, False
+                )
+                self.assertEqual(
+                    knight_moves.unoptimized_bfs(),
+                    knight_moves.bfs(engine="numpy"),
+                )
+
+    def test_bitset_engine(self):
+        """
+        test that the bitset engines match the unoptimized algorithm, on random boards
+        and on every valid query of the smallest boards
+        """
+        cases = [self._get_test_case() for _ in range(300)]
+        for n in (3, 4):
+            for query in itertools.product(range(n), repeat=6):
+                try:
+                    KnightMoves(*query, n)._validate_input()
+                except ValueError:
+                    continue
+                cases.append(query + (n,))
+        for start_x, start_y, end_x, end_y, bishop_x, bishop_y, n in cases:
+            with self.subTest(
+                start_x=start_x,
+                start_y=start_y,
+                end_x=end_x,
+                end_y=end_y,
+                bishop_x=bishop_x,
+                bishop_y=bishop_y,
+                n=n,
+            ):
+                knight_moves = KnightMoves(
+                    start_x, start_y, end_x, end_y, bishop_x, bishop_y, n, False
+                )
+                expected = knight_moves.unoptimized_bfs()
+                self.assertEqual(expected, knight_moves.bfs(engine="bitset"))
+                self.assertEqual(expected, knight_moves.dbfs(engine="bitset"))
+
+    def test_knight_distance(self):
+        """
+        test that the closed form knight distance matches BFS on an empty board
+        """
+        for _ in range(1_000):
+            n = r.randint(1, 30)
+            start_x, start_y = self._get_random_position(n)
+            end_x, end_y = self._get_random_position(n)
+            with self.subTest(
+                start_x=start_x, start_y=start_y, end_x=end_x, end_y=end_y, n=n
+            ):
+                knight_moves = KnightMoves(
+                    start_x, start_y, end_x, end_y, 0, 0, n, False
+                )
+                self.assertEqual(
+                    knight_moves._distance_field(start_x, start_y, False)[
+                        end_x * n + end_y
+                    ],
+                    knight_moves.knight_distance(start_x, start_y, end_x, end_y, n),
+                )
+
+    def test_shortest_path(self):
+        """
+        test that the reconstructed paths, searched again or walked back through the
+        start distance field, are valid and as short as the path length
+        """
+        for _ in range(300):
+            test_case = self._get_test_case()
+            start_x, start_y, end_x, end_y, bishop_x, bishop_y, n = test_case
+            knight_moves = KnightMoves(*test_case)
+            control = knight_moves.unoptimized_bfs()
+            bishop_positions = self._get_bishop_positions(bishop_x, bishop_y, n)
+            field = knight_moves._distance_field(start_x, start_y, True)
+            for algorithm in ["bfs", "dbfs", "field"]:
+                with self.subTest(test_case=test_case, algorithm=algorithm):
+                    if algorithm == "field":
+                        path = knight_moves.field_path(field, control)
+                    else:
+                        path = knight_moves.shortest_path(algorithm)
+                    if control == -1:
+                        self.assertEqual([], path)
+                        continue
+                    self.assertEqual(control + 1, len(path))
+                    self.assertEqual((start_x, start_y), path[0])
+                    self.assertEqual((end_x, end_y), path[-1])
+                    bishop_alive = True
+                    for (x, y), (new_x, new_y) in zip(path, path[1:]):
+                        self.assertIn(
+                            (abs(new_x - x), abs(new_y - y)), [(1, 2), (2, 1)]
+                        )
+                        self.assertTrue(self._is_valid_position(new_x, new_y, n))
+                        if bishop_alive:
+                            self.assertNotIn((new_x, new_y), bishop_positions)
+                        if (new_x, new_y) == (bishop_x, bishop_y):
+                            bishop_alive = False
+
+    def test_distance_table(self):
+        """
+        test that a saved and memory mapped distance table matches BFS on an empty board
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            for n in [1, 2, 3, 4, 5, 8, 47]:
+                path = os.path.join(directory, f"knight_distances_{n}.bin")
+                DistanceTable.build(n).save(path)
+                distance_table = DistanceTable.load(path)
+                for _ in range(200):
+                    x1, y1 = self._get_random_position(n)
+                    x2, y2 = self._get_random_position(n)
+                    with self.subTest(n=n, x1=x1, y1=y1, x2=x2, y2=y2):
+                        field = KnightMoves(n=n)._distance_field(x1, y1, False)
+                        self.assertEqual(
+                            field[x2 * n + y2],
+                            distance_table.distance(x1, y1, x2, y2),
+                        )
+                # release the memory map before the directory is removed
+                del distance_table
+
+        # files that are not whole tables of this byte order are rejected
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "knight_distances_8.bin")
+            DistanceTable.build(8).save(path)
+            with open(path, "rb") as file:
+                data = file.read()
+            other_order = bytearray(data)
+            other_order[DistanceTable.HEADER.size - 2] ^= 1
+            for name, contents in [
+                ("empty", b""),
+                ("magic", b"a,b,c\n" * 20),
+                ("truncated", data[:-1]),
+                ("byte order", bytes(other_order)),
+            ]:
+                with self.subTest(name=name):
+                    with open(path, "wb") as file:
+                        file.write(contents)
+                    with self.assertRaises(ValueError):
+                        DistanceTable.load(path)
+                    result = CliRunner().invoke(
+                        cli_wrapper,
+                        ["query", "--query", "0,0,7,7,3,4,8", "--distance-table", path],
+                    )
+                    self.assertEqual(2, result.exit_code, result.output)
+
+        # and so are boards too large for the header
+        with self.assertRaises(ValueError):
+            DistanceTable.build(DistanceTable.MAX_N + 1)
+        result = CliRunner().invoke(
+            cli_wrapper, ["precompute", "--n", str(DistanceTable.MAX_N + 1)]
+        )
+        self.assertEqual(2, result.exit_code, result.output)
+
+        # boards whose distances do not fit in a byte store two bytes per entry
+        self.assertEqual("B", DistanceTable.build(300).table.typecode)
+        self.assertEqual("H", DistanceTable.build(400).table.typecode)
+
+    def test_solve_many(self):
+        """
+        test that batched queries match solving each query on its own
+        """
+        queries = []
+        for _ in range(20):
+            start_x, start_y, end_x, end_y, bishop_x, bishop_y, n = (
+                self._get_test_case()
+            )
+            bishop_positions = self._get_bishop_positions(bishop_x, bishop_y, n)
+            # several queries per board so that distance fields are shared
+            for _ in range(10):
+                start_x, start_y = self._get_random_position(n)
+                end_x, end_y = self._get_random_position(n)
+                if (
+                    (start_x, start_y) in bishop_positions
+                    or (start_x, start_y) == (bishop_x, bishop_y)
+                    or (end_x, end_y) == (bishop_x, bishop_y)
+                ):
+                    continue
+                queries.append((start_x, start_y, end_x, end_y, bishop_x, bishop_y, n))
+
+        results = KnightMoves.solve_many(queries)
+        self.assertEqual(len(queries), len(results))
+        for query, result in zip(queries, results):
+            with self.subTest(query=query):
+                self.assertEqual(KnightMoves(*query).unoptimized_bfs(), result)
+
+    def test_solve_parallel(self):
+        """
+        test that the process pool returns the same results as solve_many in input order
+        """
+        queries = []
+        for _ in range(50):
+            start_x, start_y, end_x, end_y, bishop_x, bishop_y, n = (
+                self._get_test_case()
+            )
+            queries.append((start_x, start_y, end_x, end_y, bishop_x, bishop_y, n))
+
+        results = list(KnightMoves.solve_parallel(queries, workers=2, chunk_size=4))
+        self.assertEqual(KnightMoves.solve_many(queries), results)
+
+        for file_format in ["csv", "jsonl"]:
+            with self.subTest(file_format=file_format):
+                output = io.StringIO()
+                write_results(output, file_format, zip(queries, results))
+                output.seek(0)
+                self.assertEqual(queries, list(read_queries(output, file_format)))
+
+    def test_iter_solve(self):
+        """
+        test that streamed queries give the same results as solve_many
+        """
+        queries = [self._get_test_case() for _ in range(50)]
+        results = KnightMoves.iter_solve(iter(queries), chunk_size=8)
+        self.assertNotIsInstance(results, list)
+        self.assertEqual(KnightMoves.solve_many(queries), list(results))
+
+    def test_with_metrics(self):
+        """
+        test that instrumented searches return the same results and consistent counters
+        """
+        for _ in range(20):
+            test_case = self._get_test_case()
+            for algorithm, engine in [
+                ("bfs", "tuple"),
+                ("bfs", "array"),
+                ("dbfs", "tuple"),
+                ("dbfs", "array"),
+            ]:
+                with self.subTest(
+                    test_case=test_case, algorithm=algorithm, engine=engine
+                ):
+                    knight_moves = KnightMoves(*test_case)
+                    result, metrics = knight_moves.with_metrics(
+                        algorithm, engine=engine
+                    )
+                    self.assertIsNone(knight_moves.metrics)
+                    self.assertEqual(knight_moves.num_visited, metrics.nodes_expanded)
+                    self.assertEqual(knight_moves.unoptimized_bfs(), result)
+                    self.assertGreaterEqual(metrics.max_frontier, 1)
+                    self.assertEqual(metrics.level, len(metrics.level_times) - 1)
+                    if metrics.meeting_depth is not None:
+                        self.assertGreaterEqual(sum(metrics.meeting_depth), result)
+
+        # a caller can supply its own sink
+        class LevelCounter(SearchMetrics):
+            def __init__(self):
+                super().__init__()
+                self.levels_seen = 0
+
+            def _end_level(self):
+                super()._end_level()
+                self.levels_seen += 1
+
+        sink = LevelCounter()
+        knight_moves = KnightMoves(0, 0, 7, 7, 3, 4, 8)
+        result, metrics = knight_moves.with_metrics("bfs", metrics=sink, engine="array")
+        self.assertIs(sink, metrics)
+        self.assertEqual(knight_moves.unoptimized_bfs(), result)
+        self.assertEqual(len(sink.level_times), sink.levels_seen)
+
+    def test_field_cache(self):
+        """
+        test that distance fields are reused and evicted once over the byte budget
+        """
+        knight_moves = KnightMoves(0, 0, 7, 7, 3, 4, 8)
+        field_bytes = 8 * 8 * 4
+        knight_moves.field_cache = DistanceFieldCache(max_bytes=2 * field_bytes)
+
+        first = knight_moves._distance_field(0, 0, True)
+        self.assertIs(first, knight_moves._distance_field(0, 0, True))
+        self.assertEqual(1, knight_moves.field_cache.hits)
+        self.assertEqual(1, knight_moves.field_cache.misses)
+
+        # the field without the bishop is stored separately
+        knight_moves._distance_field(0, 0, False)
+        self.assertEqual(2 * field_bytes, knight_moves.field_cache.current_bytes)
+
+        # a third field evicts the least recently used one
+        knight_moves._distance_field(0, 1, True)
+        self.assertEqual(2 * field_bytes, knight_moves.field_cache.current_bytes)
+        self.assertIsNot(first, knight_moves._distance_field(0, 0, True))
+        self.assertEqual(
+            first.tolist(), knight_moves._distance_field(0, 0, True).tolist()
+        )
+
+        # fields larger than the budget are not cached
+        knight_moves.field_cache = DistanceFieldCache(max_bytes=field_bytes - 1)
+        knight_moves._distance_field(0, 0, True)
+        self.assertEqual(0, knight_moves.field_cache.current_bytes)
+
+        # so the unoptimized solver searches each leg only up to its end instead
+        misses = knight_moves.field_cache.misses
+        for end_x in range(8):
+            for end_y in range(8):
+                with self.subTest(end_x=end_x, end_y=end_y):
+                    self.assertEqual(
+                        first[end_x * 8 + end_y],
+                        knight_moves._targeted_bfs(0, 0, end_x, end_y, True)[0],
+                    )
+        expected = knight_moves.unoptimized_bfs()
+        self.assertEqual(misses, knight_moves.field_cache.misses)
+
+        # and otherwise reads both of its legs from a single field
+        knight_moves.field_cache = DistanceFieldCache(max_bytes=field_bytes)
+        self.assertEqual(expected, knight_moves.unoptimized_bfs())
+        self.assertEqual(1, knight_moves.field_cache.misses)
+        self.assertEqual(0, knight_moves.field_cache.hits)
+
+    def test_symmetry(self):
+        """
+        test that results are invariant under the 8 symmetries of the board
+        """
+        for _ in range(50):
+            test_case = self._get_test_case()
+            start_x, start_y, end_x, end_y, bishop_x, bishop_y, n = test_case
+            control = KnightMoves(*test_case).unoptimized_bfs()
+            canonical = KnightMoves.canonical_query(test_case)
+            for symmetry in range(8):
+                query = (
+                    KnightMoves._transform(start_x, start_y, symmetry, n)
+                    + KnightMoves._transform(end_x, end_y, symmetry, n)
+                    + KnightMoves._transform(bishop_x, bishop_y, symmetry, n)
+                    + (n,)
+                )
+                with self.subTest(test_case=test_case, symmetry=symmetry):
+                    self.assertEqual(canonical, KnightMoves.canonical_query(query))
+                    knight_moves = KnightMoves(*query)
+                    # the solvers undecorated, searching the transformed pieces as given
+                    self.assertEqual(
+                        control, KnightMoves.unoptimized_bfs.__wrapped__(knight_moves)
+                    )
+                    self.assertEqual(
+                        control,
+                        KnightMoves.bfs.__wrapped__(knight_moves, engine="array"),
+                    )
+                    self.assertEqual(
+                        control, KnightMoves.dbfs.__wrapped__(knight_moves)
+                    )
+                    self.assertEqual(control, knight_moves.astar())
+                    # and canonicalized, giving the meeting state back in this
+                    # orientation, on a shortest path that keeps the bishop alive
+                    self.assertEqual(control, knight_moves.dbfs(engine="array"))
+                    meeting_state = knight_moves.meeting_state
+                    if meeting_state != -1:
+                        from_start = knight_moves._distance_field(
+                            query[0], query[1], True
+                        )
+                        from_end = knight_moves._distance_field(
+                            query[2], query[3], True
+                        )
+                        self.assertEqual(
+                            from_start[query[2] * n + query[3]],
+                            from_start[meeting_state] + from_end[meeting_state],
+                        )
+                    # the pieces are put back after solving
+                    self.assertEqual(
+                        query,
+                        (
+                            knight_moves.start_x,
+                            knight_moves.start_y,
+                            knight_moves.end_x,
+                            knight_moves.end_y,
+                            knight_moves.bishop_x,
+                            knight_moves.bishop_y,
+                            knight_moves.n,
+                        ),
+                    )
+
+        # the mirror images of a query share one start distance field
+        field_cache = KnightMoves.field_cache
+        KnightMoves.field_cache = DistanceFieldCache()
+        try:
+            queries = [
+                KnightMoves._transform(1, 0, symmetry, 8)
+                + KnightMoves._transform(7, 6, symmetry, 8)
+                + KnightMoves._transform(3, 4, symmetry, 8)
+                + (8,)
+                for symmetry in range(8)
+            ]
+            results = KnightMoves.solve_many(queries)
+            self.assertEqual([results[0]] * 8, results)
+            self.assertEqual(1, KnightMoves.field_cache.misses)
+        finally:
+            KnightMoves.field_cache = field_cache
+
+    def test_incremental_solver(self):
+        """
+        test that nudging one piece at a time gives the same results as solving afresh
+        """
+        for _ in range(30):
+            test_case = list(self._get_test_case())
+            n = test_case[-1]
+            solver = IncrementalSolver()
+            for _ in range(20):
+                # move the end or the bishop by one square, or sometimes the start
+                index = r.choice([0, 2, 3, 4, 5])
+                query = test_case[:]
+                query[index] = min(max(query[index] + r.choice([-1, 1]), 0), n - 1)
+                try:
+                    KnightMoves(*query)._validate_input()
+                except ValueError:
+                    continue
+                test_case = query
+                with self.subTest(test_case=test_case):
+                    self.assertEqual(
+                        KnightMoves(*test_case).unoptimized_bfs(),
+                        solver.solve(*test_case),
+                    )
+
+        solver = IncrementalSolver()
+        solver.solve(0, 0, 7, 7, 3, 4, 8)
+        solver.solve(0, 0, 6, 7, 3, 4, 8)
+        self.assertEqual((1, 0, 1), (solver.searches, solver.repairs, solver.lookups))
+        self.assertEqual(0, solver.num_visited)
+        solver.solve(0, 0, 6, 7, 3, 5, 8)
+        self.assertEqual(1, solver.repairs)
+
+    def test_multi_bishop(self):
+        """
+        test the multi-bishop A* against single bishop boards and a brute force search
+        """
+        for _ in range(200):
+            test_case = self._get_test_case()
+            with self.subTest(test_case=test_case):
+                knight_moves = KnightMoves(*test_case)
+                self.assertEqual(
+                    knight_moves.unoptimized_bfs(), knight_moves.multi_astar()
+                )
+
+        for _ in range(300):
+            test_case, extra_bishops, obstacles = self._get_multi_bishop_case()
+            with self.subTest(
+                test_case=test_case, extra_bishops=extra_bishops, obstacles=obstacles
+            ):
+                knight_moves = KnightMoves(
+                    *test_case, extra_bishops=extra_bishops, obstacles=obstacles
+                )
+                self.assertEqual(
+                    self._multi_bishop_bfs(*test_case, extra_bishops, obstacles),
+                    knight_moves.multi_astar(),
+                )
+                if extra_bishops or obstacles:
+                    with self.assertRaises(ValueError):
+                        knight_moves.bfs()
+
+        # a bishop guarded by another bishop cannot be captured until the guard is
+        knight_moves = KnightMoves(0, 0, 7, 7, 2, 1, 8, extra_bishops=[(4, 3)])
+        self.assertEqual(
+            self._multi_bishop_bfs(0, 0, 7, 7, 2, 1, 8, [(4, 3)], []),
+            knight_moves.multi_astar(),
+        )
+
+        # an end attacked by bishops guarding each other is given up without searching
+        knight_moves = KnightMoves(
+            0, 0, 3, 2, 2, 1, 8, extra_bishops=[(4, 3), (6, 0), (0, 6)]
+        )
+        self.assertEqual(
+            self._multi_bishop_bfs(0, 0, 3, 2, 2, 1, 8, [(4, 3), (6, 0), (0, 6)], []),
+            knight_moves.multi_astar(),
+        )
+        self.assertEqual(0, knight_moves.num_visited)
+
+        for extra_bishops, obstacles in [
+            ([(8, 0)], []),
+            ([], [(3, 4)]),
+            ([(0, 1)], [(0, 1)]),
+            ([], [(7, 7)]),
+            ([(1, 1)], []),
+        ]:
+            with self.subTest(extra_bishops=extra_bishops, obstacles=obstacles):
+                with self.assertRaises(ValueError):
+                    KnightMoves(
+                        0,
+                        0,
+                        7,
+                        7,
+                        3,
+                        4,
+                        8,
+                        extra_bishops=extra_bishops,
+                        obstacles=obstacles,
+                    ).multi_astar()
+
+    def test_query_command(self):
+        """
+        test that the query command prints one result per query without prompting
+        """
+        queries = [self._get_test_case() for _ in range(10)]
+        args = ["query"]
+        for query in queries:
+            args += ["--query", ",".join(map(str, query))]
+        expected = [KnightMoves(*query).unoptimized_bfs() for query in queries]
+        runner = CliRunner()
+        for algorithm in ["unoptimized", "bfs", "dbfs", "astar", "multi"]:
+            with self.subTest(algorithm=algorithm):
+                result = runner.invoke(cli_wrapper, args + ["--algorithm", algorithm])
+                self.assertEqual(0, result.exit_code, result.output)
+                self.assertEqual(expected, list(map(int, result.output.split())))
+
+        result = runner.invoke(cli_wrapper, args + ["--output-format", "json"])
+        self.assertEqual(0, result.exit_code, result.output)
+        records = [json.loads(line) for line in result.output.splitlines()]
+        self.assertEqual(expected, [record["length"] for record in records])
+        self.assertEqual(
+            queries,
+            [tuple(record[field] for field in QUERY_FIELDS) for record in records],
+        )
+        for record in records:
+            self.assertGreaterEqual(record["time"], 0)
+            self.assertGreaterEqual(record["nodes_visited"], 0)
+
+        # extra bishops and obstacles are put on every board of the multi-bishop A*
+        pieces = ["--extra-bishop", "6,2", "--obstacle", "2,5", "--obstacle", "5,6"]
+        result = runner.invoke(
+            cli_wrapper,
+            ["query", "--query", "0,0,7,7,3,4,8", "--algorithm", "multi"] + pieces,
+        )
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertEqual(
+            KnightMoves(
+                0, 0, 7, 7, 3, 4, 8, extra_bishops=[(6, 2)], obstacles=[(2, 5), (5, 6)]
+            ).multi_astar(),
+            int(result.output),
+        )
+        for args in [
+            ["--query", "0,0,7,7,3,4,8", "--algorithm", "bfs"] + pieces,
+            ["--query", "0,0,7,7,3,4,8", "--algorithm", "multi", "--obstacle", "7,7"],
+            # engines are only for bfs and dbfs
+            ["--query", "0,0,7,7,3,4,8", "--algorithm", "astar", "--engine", "array"],
+        ]:
+            with self.subTest(args=args):
+                result = runner.invoke(cli_wrapper, ["query"] + args)
+                self.assertEqual(2, result.exit_code, result.output)
+
+        # the prompting cli reports them the same way
+        result = runner.invoke(
+            cli_wrapper,
+            ["cli", "--algorithm", "bfs", "--extra-bishop", "6,2"],
+            input="\n" * 7,
+        )
+        self.assertEqual(2, result.exit_code, result.output)
+        self.assertIn("need --algorithm multi", result.output)
+
+        # invalid queries are rejected before anything is solved
+        result = runner.invoke(cli_wrapper, ["query", "--query", "0,0,7,7,0,0,8"])
+        self.assertNotEqual(0, result.exit_code)
+
+    def test_batch_command(self):
+        """
+        test that the batch command writes invalid rows with length -1 and keeps going
+        """
+        queries = [self._get_test_case() for _ in range(6)]
+        # the start is attacked by the bishop
+        invalid = (1, 1, 5, 5, 2, 2, 8)
+        rows = [invalid] + queries[:3] + [invalid] + queries[3:] + [invalid]
+        lines = [",".join(QUERY_FIELDS)] + [",".join(map(str, row)) for row in rows]
+        expected = [
+            -1 if row == invalid else KnightMoves(*row).unoptimized_bfs()
+            for row in rows
+        ]
+        runner = CliRunner()
+        for workers in ["1", "2"]:
+            with self.subTest(workers=workers):
+                result = runner.invoke(
+                    cli_wrapper,
+                    ["batch", "--format", "csv", "--workers", workers],
+                    input="\n".join(lines) + "\n",
+                )
+                self.assertEqual(0, result.exit_code, result.output)
+                written = list(csv.DictReader(io.StringIO(result.stdout)))
+                self.assertEqual(
+                    rows,
+                    [
+                        tuple(int(row[field]) for field in QUERY_FIELDS)
+                        for row in written
+                    ],
+                )
+                self.assertEqual(expected, [int(row["length"]) for row in written])
+                self.assertIn("Row 1: invalid query", result.stderr)
+
+        # boards above --max-n are written with length -1 too
+        result = runner.invoke(
+            cli_wrapper,
+            ["batch", "--format", "csv", "--workers", "1", "--max-n", "9"],
+            input="\n".join([lines[0], "0,0,7,7,3,4,8", "0,0,7,7,3,4,10"]) + "\n",
+        )
+        self.assertEqual(0, result.exit_code, result.output)
+        written = list(csv.DictReader(io.StringIO(result.stdout)))
+        self.assertEqual(
+            [KnightMoves(0, 0, 7, 7, 3, 4, 8).unoptimized_bfs(), -1],
+            [int(row["length"]) for row in written],
+        )
+        self.assertIn("Row 2: board size above 9", result.stderr)
+
+        # rows that cannot be read stop the batch with a clean error
+        for file_format, bad_row in [
+            ("csv", "1,2,x,4,5,6,8"),
+            ("csv", "4,2"),
+            ("jsonl", "[1,2]"),
+            ("jsonl", '{"start_x": 1}'),
+        ]:
+            with self.subTest(file_format=file_format, bad_row=bad_row):
+                header = [lines[0]] if file_format == "csv" else []
+                result = runner.invoke(
+                    cli_wrapper,
+                    ["batch", "--format", file_format, "--workers", "1"],
+                    input="\n".join(header + [bad_row]) + "\n",
+                )
+                self.assertEqual(1, result.exit_code)
+                # not a traceback
+                self.assertIsInstance(result.exception, SystemExit)
+                self.assertIn("Row 1: cannot read query", result.stderr)
+
+        # the rows solved before a row that cannot be read are still written
+        for workers in ["1", "2"]:
+            with self.subTest(workers=workers):
+                result = runner.invoke(
+                    cli_wrapper,
+                    ["batch", "--format", "csv", "--workers", workers],
+                    input="\n".join(lines[:3] + ["1,2,x,4,5,6,8"]) + "\n",
+                )
+                self.assertEqual(1, result.exit_code)
+                self.assertIn("Row 3: cannot read query", result.stderr)
+                written = list(csv.DictReader(io.StringIO(result.stdout)))
+                self.assertEqual(expected[:2], [int(row["length"]) for row in written])
+
+    def test_lazy_gui_import(self):
+        """
+        test that the solvers and the headless CLI do not load tkinter
+        """
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys, animations.animations; print('tkinter' in sys.modules)",
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        self.assertEqual("False", output.strip())
 
     def _get_test_case(self):
         """
@@ -85,12 +847,135 @@ class TestKnightMoves(unittest.TestCase):
 
         return start_x, start_y, end_x, end_y, bishop_x, bishop_y, n
 
+    def _get_multi_bishop_case(self):
+        """
+        get a small board with up to four bishops and some obstacles
+        """
+        while True:
+            n = r.randint(3, 12)
+            squares = set()
+            while len(squares) < min(n * n, r.randint(2, 14)):
+                squares.add(self._get_random_position(n))
+            squares = list(squares)
+            r.shuffle(squares)
+            start, end = squares[0], squares[1]
+            pieces = squares[2:]
+            if not pieces:
+                continue
+            num_bishops = min(len(pieces), r.randint(1, 4))
+            bishops = pieces[:num_bishops]
+            obstacles = pieces[num_bishops:]
+            if start in self._get_attacked_squares(bishops, obstacles, n):
+                continue
+            test_case = start + end + bishops[0] + (n,)
+            return test_case, bishops[1:], obstacles
+
+    def _get_attacked_squares(
+        self,
+        bishops: list[tuple[int, int]],
+        obstacles: list[tuple[int, int]],
+        n: int,
+    ) -> set[tuple[int, int]]:
+        """
+        Get the squares attacked by the bishops, blocked by obstacles and each other.
+        """
+        blockers = set(bishops) | set(obstacles)
+        attacked = set()
+        for bishop_x, bishop_y in bishops:
+            for dx, dy in [(1, 1), (1, -1), (-1, 1), (-1, -1)]:
+                x, y = bishop_x + dx, bishop_y + dy
+                while self._is_valid_position(x, y, n):
+                    attacked.add((x, y))
+                    if (x, y) in blockers:
+                        break
+                    x, y = x + dx, y + dy
+        return attacked
+
+    def _multi_bishop_bfs(
+        self,
+        start_x: int,
+        start_y: int,
+        end_x: int,
+        end_y: int,
+        bishop_x: int,
+        bishop_y: int,
+        n: int,
+        extra_bishops: list[tuple[int, int]],
+        obstacles: list[tuple[int, int]],
+    ) -> int:
+        """
+        Brute force BFS over (position, living bishops), with the attacked squares
+        computed from scratch for every state.
+        """
+        start = ((start_x, start_y), frozenset([(bishop_x, bishop_y)] + extra_bishops))
+        distances = {start: 0}
+        queue = [start]
+        for position, bishops in queue:
+            if position == (end_x, end_y):
+                return distances[(position, bishops)]
+            attacked = self._get_attacked_squares(list(bishops), obstacles, n)
+            x, y = position
+            for dx, dy in [(1, 2), (2, 1), (-1, 2), (-2, 1)]:
+                for sign in [1, -1]:
+                    new_position = (x + sign * dx, y + sign * dy)
+                    if (
+                        not self._is_valid_position(*new_position, n)
+                        or new_position in obstacles
+                        or new_position in attacked
+                    ):
+                        continue
+                    new_state = (new_position, bishops - {new_position})
+                    if new_state not in distances:
+                        distances[new_state] = distances[(position, bishops)] + 1
+                        queue.append(new_state)
+        return -1
+
     def _get_random_position(self, n):
         """
         get a random position
         """
         return r.randint(0, n - 1), r.randint(0, n - 1)
 
+    def _reference_bfs(
+        self,
+        start_x: int,
+        start_y: int,
+        end_x: int,
+        end_y: int,
+        bishop_x: int,
+        bishop_y: int,
+        n: int,
+    ) -> int:
+        """
+        certainly correct (but unoptimized) solution, independent of the solvers: a plain
+        BFS over (x, y, bishop alive) states, with no caching, symmetry or closed forms
+        """
+        row = [2, 2, -2, -2, 1, 1, -1, -1]
+        col = [1, -1, 1, -1, 2, -2, 2, -2]
+        bishop_positions = self._get_bishop_positions(bishop_x, bishop_y, n)
+        visited = {(start_x, start_y, True)}
+        # tuples of the form (x, y, bishop alive, distance)
+        queue = deque([(start_x, start_y, True, 0)])
+        while queue:
+            x, y, bishop_alive, distance = queue.popleft()
+            if (x, y) == (end_x, end_y):
+                return distance
+            for dx, dy in zip(row, col):
+                new_x, new_y = x + dx, y + dy
+                if not self._is_valid_position(new_x, new_y, n):
+                    continue
+                if bishop_alive and (new_x, new_y) in bishop_positions:
+                    continue
+                state = (
+                    new_x,
+                    new_y,
+                    bishop_alive and (new_x, new_y) != (bishop_x, bishop_y),
+                )
+                if state not in visited:
+                    visited.add(state)
+                    queue.append(state + (distance + 1,))
+        return -1
+
     def _get_bishop_positions(
         self, bishop_x: int, bishop_y: int, n: int
     ) -> set[tuple[int, int]]:
@@ -0,0 +1,91 @@
+import json
+import os
+import tempfile
+import unittest
+from click.testing import CliRunner
+from animations.animations import KnightMoves
+from animations.bench import (
+    DEFAULT_QUERIES,
+    DEFAULT_SOLVERS,
+    LARGE_BOARD_QUERIES,
+    LARGE_BOARD_SIZE,
+    LARGE_BOARD_SOLVERS,
+    PLACEMENTS,
+    default_queries,
+    default_solvers,
+    get_queries,
+    main,
+    run_solver,
+)
+import random as r
+
+
+class TestBench(unittest.TestCase):
+    def test_get_queries(self):
+        """
+        test that benchmark queries are valid, seeded and solved the same by every solver
+        """
+        for n in [8, 20]:
+            for placement in PLACEMENTS:
+                with self.subTest(n=n, placement=placement):
+                    queries = get_queries(n, placement, 5, r.Random(n))
+                    self.assertEqual(queries, get_queries(n, placement, 5, r.Random(n)))
+                    for query in queries:
+                        KnightMoves(*query)._validate_input()
+
+                    expected = run_solver("unoptimized", queries)["lengths"]
+                    for solver in ["bfs-array", "dbfs-array", "astar"]:
+                        self.assertEqual(
+                            expected, run_solver(solver, queries)["lengths"]
+                        )
+                    if placement == "unreachable":
+                        self.assertEqual([-1] * 5, expected)
+
+    def test_unreachable_queries(self):
+        """
+        test that the unreachable placement never puts the end on the start, whatever
+        the seed
+        """
+        for seed in range(50):
+            with self.subTest(seed=seed):
+                queries = get_queries(4, "unreachable", 20, r.Random(seed))
+                self.assertEqual(
+                    [-1] * 20,
+                    [KnightMoves(*query).unoptimized_bfs() for query in queries],
+                )
+
+    def test_default_solvers(self):
+        """
+        test that large boards run one engine of every algorithm and fewer queries by
+        default, recording the solvers they skip
+        """
+        self.assertEqual(DEFAULT_SOLVERS, default_solvers(LARGE_BOARD_SIZE))
+        self.assertEqual(
+            list(LARGE_BOARD_SOLVERS), default_solvers(LARGE_BOARD_SIZE + 1)
+        )
+        for algorithm in ["unoptimized", "bfs", "dbfs"]:
+            self.assertTrue(
+                any(solver.startswith(algorithm) for solver in LARGE_BOARD_SOLVERS)
+            )
+        self.assertEqual(DEFAULT_QUERIES, default_queries(LARGE_BOARD_SIZE))
+        self.assertEqual(LARGE_BOARD_QUERIES, default_queries(LARGE_BOARD_SIZE + 1))
+
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "results.json")
+            result = CliRunner().invoke(
+                main,
+                ["--n", "8", "--placement", "center", "--no-memory"]
+                + ["--solver", "astar", "--output", output],
+            )
+            self.assertEqual(0, result.exit_code, result.output)
+            with open(output) as file:
+                results = json.load(file)
+        self.assertEqual(
+            [solver for solver in DEFAULT_SOLVERS if solver != "astar"],
+            results["skipped"]["8"],
+        )
+        self.assertEqual(DEFAULT_QUERIES, results["cases"][0]["queries"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+import asyncio
+from concurrent.futures.process import BrokenProcessPool
+import json
+import os
+import unittest
+from urllib.parse import urlencode
+from animations.animations import QUERY_FIELDS, KnightMoves
+from animations.loadgen import request
+from animations.server import SolverService
+import random as r
+
+
+class TestServer(unittest.TestCase):
+    def test_solve(self):
+        """
+        test that identical queries in flight, up to symmetry, are solved once
+        """
+        query = (0, 0, 7, 6, 3, 4, 8)
+        mirrored = (0, 0, 6, 7, 4, 3, 8)
+        expected = KnightMoves(*query).unoptimized_bfs()
+
+        async def solve_all():
+            service = SolverService(workers=2)
+            try:
+                results = await asyncio.gather(
+                    *(service.solve(query) for _ in range(4)), service.solve(mirrored)
+                )
+                return results, service.solved, service.coalesced, service.in_flight
+            finally:
+                service.close()
+
+        results, solved, coalesced, in_flight = asyncio.run(solve_all())
+        self.assertEqual([expected] * 5, results)
+        self.assertEqual(1, solved)
+        self.assertEqual(4, coalesced)
+        self.assertEqual({}, in_flight)
+
+    def test_http(self):
+        """
+        test that queries sent over HTTP get the same results as solving them directly
+        """
+        queries = []
+        for _ in range(20):
+            n = r.randint(3, 30)
+            query = tuple(r.randrange(n) for _ in range(6)) + (n,)
+            try:
+                KnightMoves(*query)._validate_input()
+            except ValueError:
+                continue
+            queries.append(query)
+
+        async def send_all():
+            service = SolverService(workers=2, max_n=30)
+            server = await asyncio.start_server(service.handle, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                records = [
+                    await request(reader, writer, "127.0.0.1", query)
+                    for query in queries
+                ]
+
+                # an invalid query, a board above max_n and an unknown path, the
+                # last one closing
+                writer.write(b"GET /solve?n=8 HTTP/1.1\r\n\r\n")
+                fields = urlencode(dict(zip(QUERY_FIELDS, (0, 0, 7, 6, 3, 4, 31))))
+                writer.write(f"GET /solve?{fields} HTTP/1.1\r\n\r\n".encode())
+                writer.write(b"GET /other HTTP/1.1\r\nConnection: close\r\n\r\n")
+                await writer.drain()
+                responses = await reader.read()
+                writer.close()
+
+                # the query fields can be posted as JSON too
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                body = json.dumps(dict(zip(QUERY_FIELDS, queries[0]))).encode()
+                writer.write(
+                    b"POST /solve HTTP/1.1\r\nConnection: close\r\n"
+                    + f"Content-Length: {len(body)}\r\n\r\n".encode()
+                    + body
+                )
+                await writer.drain()
+                posted = await reader.read()
+                writer.close()
+                return records, responses, posted
+            finally:
+                server.close()
+                await server.wait_closed()
+                service.close()
+
+        records, responses, posted = asyncio.run(send_all())
+        for query, record in zip(queries, records):
+            with self.subTest(query=query):
+                self.assertEqual(query, tuple(record[key] for key in QUERY_FIELDS))
+                self.assertEqual(
+                    KnightMoves(*query).unoptimized_bfs(), record["length"]
+                )
+        self.assertIn(b"400 Bad Request", responses)
+        self.assertIn(b"Board size above 30", responses)
+        self.assertIn(b"404 Not Found", responses)
+        self.assertIn(b"200 OK", posted)
+        self.assertIn(f'"length": {records[0]["length"]}'.encode(), posted)
+
+    def test_worker_failure(self):
+        """
+        test that a dead worker is replaced and a failing search answers with a 500
+        """
+        query = (0, 0, 7, 6, 3, 4, 8)
+        expected = KnightMoves(*query).unoptimized_bfs()
+
+        async def solve_after_failures():
+            service = SolverService(workers=1)
+            try:
+                # kill the worker of the only shard while it is idle
+                executor = service.executors[0]
+                with self.assertRaises(BrokenProcessPool):
+                    await asyncio.wrap_future(executor.submit(os._exit, 1))
+                first = await service.solve(query)
+
+                # and while a query is being solved
+                executor = service.executors[0]
+                future = asyncio.wrap_future(executor.submit(os._exit, 1))
+                with self.assertRaises(BrokenProcessPool):
+                    await service.solve((0, 0, 7, 5, 3, 4, 8))
+                with self.assertRaises(BrokenProcessPool):
+                    await future
+                second = await service.solve(query)
+
+                async def fail(query):
+                    raise MemoryError
+
+                service.solve = fail
+                fields = urlencode(dict(zip(QUERY_FIELDS, query)))
+                status, _ = await service._respond(
+                    f"GET /solve?{fields} HTTP/1.1\r\n".encode(), b""
+                )
+                return first, second, status
+            finally:
+                service.close()
+
+        first, second, status = asyncio.run(solve_after_failures())
+        self.assertEqual(expected, first)
+        self.assertEqual(expected, second)
+        self.assertEqual("500 Internal Server Error", status)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -71,6 +71,8 @@
                 ps: with ps; [
                   tkinter
                   click
+                  # optional dependencies
+                  numpy
                   # dev dependencies
                   black
                 ]